@@ -5,12 +5,14 @@
 @Author : caixiaorong01@outlook.com
 @File   : __init__.py.py
 """
-from .exceptions import BadRequestError, NotFoundError, ValidationError, TooManyRequestsError, ServerError
+from .exceptions import BadRequestError, NotFoundError, ValidationError, TooManyRequestsError, LLMRequestError, \
+    ServerError
 
 __all__ = [
     "BadRequestError",
     "NotFoundError",
     "ValidationError",
     "TooManyRequestsError",
+    "LLMRequestError",
     "ServerError",
 ]
@@ -47,6 +47,13 @@ class TooManyRequestsError(AppException):
         super().__init__(code=429, status_code=429, msg=msg)
 
 
+class LLMRequestError(AppException):
+    """模型调用因请求本身有误或端点不可用(鉴权失败、模型不存在)而失败，重试无意义"""
+
+    def __init__(self, msg: str = "调用模型出错,请检查请求参数与模型配置"):
+        super().__init__(code=400, status_code=400, msg=msg)
+
+
 class ServerError(AppException):
 
     def __init__(self, msg: str = "服务器异常"):
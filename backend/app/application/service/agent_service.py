@@ -8,11 +8,21 @@
 import asyncio
 import logging
 from datetime import datetime
-from typing import AsyncGenerator, Optional, List, Type, Callable
+from typing import AsyncGenerator, Optional, List, Type, Callable, Dict
 
 from pydantic import TypeAdapter
 
-from app.domain.external import Task, Sandbox, LLM, JSONParser, SearchEngine, FileStorage
+from app.domain.external import (
+    Task,
+    Sandbox,
+    LLM,
+    JSONParser,
+    SearchEngine,
+    FileStorage,
+    DistributedLock,
+    LLMTelemetry,
+    BlobStore,
+)
 from app.domain.models import (
     BaseEvent,
     ErrorEvent,
@@ -20,12 +30,16 @@ from app.domain.models import (
     AgentConfig,
     MCPConfig,
     A2AConfig,
+    LLMRole,
     Session,
     MessageEvent,
     File,
     Event,
     DoneEvent,
-    WaitEvent
+    WaitEvent,
+    MessageDeltaEvent,
+    PlanDraftEvent,
+    FileSyncEvent,
 )
 from app.domain.repositories import IUnitOfWork
 from app.domain.services.agent_task_runner import AgentTaskRunner
@@ -34,10 +48,13 @@ logger = logging.getLogger(__name__)
 
 
 class AgentService:
+    # 各会话进行中的任务创建，同一节点上的并发请求共享同一次创建
+    _task_creations: Dict[str, asyncio.Task] = {}
+    _output_poll_ms: int = 5000  # 读取输出流的最长阻塞时间，超时后检查任务是否仍在执行
 
     def __init__(
             self,
-            llm: LLM,
+            llms: Dict[LLMRole, LLM],
             agent_config: AgentConfig,
             mcp_config: MCPConfig,
             a2a_config: A2AConfig,
@@ -46,7 +63,11 @@ class AgentService:
             json_parser: JSONParser,
             search_engine: SearchEngine,
             file_storage: FileStorage,
-            uow_factory: Callable[[], IUnitOfWork]
+            uow_factory: Callable[[], IUnitOfWork],
+            session_lock: DistributedLock,
+            llm_telemetry: Optional[LLMTelemetry] = None,
+            blob_store: Optional[BlobStore] = None,
+            event_payload_store: Optional[BlobStore] = None,
     ) -> None:
         self._sandbox_cls = sandbox_cls
         self._task_cls = task_cls
@@ -56,9 +77,13 @@ class AgentService:
         self._uow_factory = uow_factory
         self._uow = uow_factory()
         self._mcp_config = mcp_config
-        self._llm = llm
+        self._llms = llms
         self._agent_config = agent_config
         self._a2a_config = a2a_config
+        self._session_lock = session_lock
+        self._llm_telemetry = llm_telemetry
+        self._blob_store = blob_store
+        self._event_payload_store = event_payload_store
         logger.info(f"初始化会话服务: {self.__class__.__name__}")
 
     async def _get_task(self, session) -> Optional[Task]:
@@ -83,14 +108,14 @@ class AgentService:
                 await self._uow.session.save(session=session)
 
         # 获取沙箱中的浏览器实例
-        browser = await sandbox.get_browser()
+        browser = await sandbox.get_browser(llm=self._llms.get(LLMRole.PAGE_EXTRACTOR))
         if not browser:
             logger.error(f"会话{session.id}的聊天请求失败: 沙箱{sandbox_id},创建浏览器失败")
             raise RuntimeError(f"会话{session.id}的聊天请求失败: 沙箱{sandbox_id},创建浏览器失败")
 
         # 创建任务运行器
         task_runner = AgentTaskRunner(
-            llm=self._llm,
+            llms=self._llms,
             agent_config=self._agent_config,
             mcp_config=self._mcp_config,
             a2a_config=self._a2a_config,
@@ -101,6 +126,9 @@ class AgentService:
             browser=browser,
             search_engine=self._search_engine,
             sandbox=sandbox,
+            llm_telemetry=self._llm_telemetry,
+            blob_store=self._blob_store,
+            event_payload_store=self._event_payload_store,
         )
 
         # 创建任务并关联到会话
@@ -111,6 +139,77 @@ class AgentService:
             await self._uow.session.save(session=session)
         return task
 
+    async def _renew_lock(self, lock_key: str, token: str) -> None:
+        """在租约到期前持续续约，沙箱创建耗时超过租约时其他节点不会获取到锁"""
+        interval = self._session_lock.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await self._session_lock.renew(lock_key, token):
+                logger.warning(f"分布式锁[{lock_key}]续约失败, 锁可能已过期")
+                return
+
+    async def _create_task_exclusively(self, session: Session) -> Task:
+        """持有会话分布式锁创建任务，保证跨节点同一会话只创建一个沙箱和任务"""
+        lock_key = f"session:{session.id}:create-task"
+        token = await self._session_lock.acquire(lock_key)
+        if not token:
+            raise RuntimeError(f"会话{session.id}的聊天请求失败: 等待任务创建超时")
+
+        renewal = asyncio.create_task(self._renew_lock(lock_key, token))
+        try:
+            # 获取锁后重新读取会话，其他请求可能已经完成了创建
+            uow = self._uow_factory()
+            async with uow:
+                latest_session = await uow.session.get_by_id(session_id=session.id)
+            if not latest_session:
+                raise RuntimeError(f"会话{session.id}不存在")
+
+            # 会话的任务仍存活时直接关联，不依赖会话状态：会话在任务开始执行后才变为运行中，
+            # 任务创建到开始执行之间的并发请求看到的仍是等待/挂起状态
+            if latest_session.task_id:
+                # 本节点的任务从创建到执行结束都在注册表中，其他节点的任务根据执行心跳判断
+                task = self._task_cls.get(latest_session.task_id)
+                if task is None:
+                    task = self._task_cls.attach(task_id=latest_session.task_id)
+                    if not await task.is_running():
+                        task = None
+                if task is not None:
+                    logger.info(f"会话{session.id}的任务仍存活, 关联任务: {latest_session.task_id}")
+                    return task
+                logger.info(f"会话{session.id}的任务{latest_session.task_id}已结束执行, 重新创建任务")
+
+            # 使用最新的会话信息创建任务，沙箱已存在时会直接复用
+            return await self._create_task(latest_session)
+        finally:
+            renewal.cancel()
+            await self._session_lock.release(lock_key, token)
+
+    async def _is_stranded(self, task: Task, event_id: str) -> bool:
+        """判断写入关联任务的消息是否无人消费：任务不在本节点执行、执行节点已结束且消息仍在输入流中"""
+        if self._task_cls.get(task.id) or await task.is_running():
+            return False
+        async for _ in task.input_stream.get_range(start_id=event_id, end_id=event_id, count=1):
+            return True
+        return False
+
+    async def _get_or_create_task(self, session: Session) -> Task:
+        """单飞创建任务，同一会话的并发调用者加入同一次进行中的创建"""
+        creation = AgentService._task_creations.get(session.id)
+        if creation is None:
+            # 在独立的asyncio Task中创建，发起者断开连接不会中断其他等待者
+            creation = asyncio.create_task(self._create_task_exclusively(session))
+            AgentService._task_creations[session.id] = creation
+
+            def _on_created(_: asyncio.Task) -> None:
+                if AgentService._task_creations.get(session.id) is creation:
+                    del AgentService._task_creations[session.id]
+
+            creation.add_done_callback(_on_created)
+        else:
+            logger.info(f"会话{session.id}存在进行中的任务创建, 等待并复用其结果")
+
+        return await asyncio.shield(creation)
+
     async def _safe_update_unread_count(self, session_id: str) -> None:
         """在独立的后台任务中安全地更新未读消息计数
 
@@ -146,9 +245,15 @@ class AgentService:
 
             # 处理用户发送的消息
             if message:
-                # 如果会话未处于运行状态，或者没有任务，则创建新任务
-                if session.status != SessionStatus.RUNNING or task is None:
-                    task = await self._create_task(session)
+                # 本节点没有存活的任务时创建新任务(任务在其他节点存活时会关联该任务)
+                # 依据本节点注册表判断而非会话状态，会话在任务开始执行后才变为运行中
+                if task is None:
+                    # 节点排空期间不再接收新任务
+                    if self._task_cls.is_draining():
+                        logger.warning(f"会话{session_id}的聊天请求被拒绝: 当前节点正在排空")
+                        raise RuntimeError("服务正在升级, 请稍后重试")
+
+                    task = await self._get_or_create_task(session)
                     if not task:
                         logger.error(f"会话{session_id}的聊天请求失败: 创建任务失败")
                         raise RuntimeError(f"会话{session_id}的聊天请求失败: 创建任务失败")
@@ -170,6 +275,13 @@ class AgentService:
 
                 # 将消息事件放入任务输入流
                 event_id = await task.input_stream.put(message_event.model_dump_json())
+
+                # 关联的其他节点任务可能在消息写入前已结束执行，消息不会再被消费，改为重新创建任务
+                if await self._is_stranded(task, event_id):
+                    logger.info(f"会话{session_id}关联的任务{task.id}已结束执行, 重新创建任务")
+                    await task.input_stream.delete_message(event_id)
+                    task = await self._get_or_create_task(session)
+                    event_id = await task.input_stream.put(message_event.model_dump_json())
                 message_event.id = event_id
 
                 # 将消息事件保存到会话历史中
@@ -185,21 +297,31 @@ class AgentService:
 
             # 持续监听任务输出流，直到任务完成
             while task and not task.done:
+                # 读取前记录任务是否仍在执行，已结束且读取不到新事件时说明不会再有输出
+                running = await task.is_running()
+
                 # 从输出流获取下一个事件
-                event_id, event_str = await task.output_stream.get(start_id=latest_event_id, block_ms=0)
-                latest_event_id = event_id
+                event_id, event_str = await task.output_stream.get(
+                    start_id=latest_event_id,
+                    block_ms=self._output_poll_ms,
+                )
                 if event_str is None:
+                    if not running:
+                        logger.warning(f"会话{session_id}的任务{task.id}已结束执行且没有新的输出事件")
+                        break
                     logger.debug(f"会话{session_id},输出队列中未发现事件内容")
                     continue
+                latest_event_id = event_id
 
                 # 解析事件数据
                 event = TypeAdapter(Event).validate_json(event_str)
                 event.id = event_id
                 logger.debug(f"会话{session_id},输出队列中已发现事件: {type(event).__name__}")
 
-                # 重置未读消息计数
-                async with self._uow:
-                    await self._uow.session.update_unread_message_count(session_id=session_id, count=0)
+                # 重置未读消息计数(增量、草稿与文件同步事件不会产生未读消息，无需更新)
+                if not isinstance(event, (MessageDeltaEvent, PlanDraftEvent, FileSyncEvent)):
+                    async with self._uow:
+                        await self._uow.session.update_unread_message_count(session_id=session_id, count=0)
 
                 # 返回事件给调用方
                 yield event
@@ -253,8 +375,40 @@ class AgentService:
         async with self._uow:
             await self._uow.session.update_status(session_id=session_id, status=SessionStatus.COMPLETED)
 
-    async def shutdown(self) -> None:
-        """关闭会话服务"""
-        logger.info("关闭会话服务并释放资源")
-        await self._task_cls.destroy()
+    async def resume_session(self, session_id: str) -> None:
+        """恢复其他节点移交的会话任务，复用原有沙箱并从最近的检查点继续执行"""
+        async with self._uow:
+            session = await self._uow.session.get_by_id(session_id=session_id)
+        if not session:
+            logger.warning(f"移交的会话{session_id}不存在, 跳过恢复")
+            return
+
+        # 只有处于移交状态的会话才需要恢复(用户可能已经发送了新消息)
+        if session.status != SessionStatus.HANDOFF:
+            logger.info(f"移交的会话{session_id}状态为{session.status}, 跳过恢复")
+            return
+
+        # 不写入输入流，任务运行器识别到移交状态后从最近的检查点继续执行
+        task = await self._get_or_create_task(session)
+        await task.invoke()
+        logger.info(f"会话{session_id}已在当前节点恢复执行, 任务实例: {task}")
+
+    async def run_handoff_watcher(self, poll_seconds: int = 5) -> None:
+        """持续认领其他节点移交的任务，直到当前节点进入排空模式"""
+        logger.info("启动任务移交监听")
+        while not self._task_cls.is_draining():
+            try:
+                session_id = await self._task_cls.claim_handoff(timeout=poll_seconds)
+                if session_id:
+                    await self.resume_session(session_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"恢复移交任务失败: {e}")
+                await asyncio.sleep(poll_seconds)
+
+    async def shutdown(self, drain_timeout: float = 20.0) -> None:
+        """关闭会话服务，排空运行中的任务并移交给其他节点"""
+        logger.info("关闭会话服务并排空运行中的任务")
+        await self._task_cls.drain(timeout=drain_timeout)
         logger.info("会话服务已关闭")
@@ -57,6 +57,22 @@ class AppConfigService:
         # 如果新的api_key为空，则保留原有的api_key
         if not llm_config.api_key.strip():
             llm_config.api_key = app_config.llm_config.api_key
+
+        # 端点的api_key为空时，保留相同base_url的原端点的api_key
+        old_api_keys = {str(endpoint.base_url): endpoint.api_key for endpoint in app_config.llm_config.endpoints}
+        for endpoint in llm_config.endpoints:
+            if not endpoint.api_key.strip():
+                endpoint.api_key = old_api_keys.get(str(endpoint.base_url), "")
+
+        # 角色模型的api_key为空时，保留同一角色相同base_url的原配置的api_key
+        for role, role_config in llm_config.roles.items():
+            old_role_config = app_config.llm_config.roles.get(role)
+            if (
+                    not role_config.api_key.strip()
+                    and old_role_config
+                    and str(old_role_config.base_url) == str(role_config.base_url)
+            ):
+                role_config.api_key = old_role_config.api_key
         app_config.llm_config = llm_config
 
         self.app_config_repository.save(app_config)
@@ -5,14 +5,15 @@
 @Author : caixiaorong01@outlook.com
 @File   : session_service.py
 """
+import json
 import logging
-from typing import List, Callable, Type
+from typing import List, Callable, Type, Optional
 
 from app.application.errors import NotFoundError, ServerError
-from app.domain.external import Sandbox
-from app.domain.models import Session, File
+from app.domain.external import Sandbox, LLMTelemetry, BlobStore
+from app.domain.models import Session, File, LLMSessionUsage, ToolEvent
 from app.domain.repositories import IUnitOfWork
-from app.interfaces.schemas import FileReadResponse, ShellReadResponse
+from app.interfaces.schemas import FileReadResponse, ShellReadResponse, ToolEventPayloadResponse
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,18 @@ logger = logging.getLogger(__name__)
 class SessionService:
     """会话服务"""
 
-    def __init__(self, uow_factory: Callable[[], IUnitOfWork], sandbox_cls: Type[Sandbox]) -> None:
+    def __init__(
+            self,
+            uow_factory: Callable[[], IUnitOfWork],
+            sandbox_cls: Type[Sandbox],
+            llm_telemetry: LLMTelemetry,
+            event_payload_store: Optional[BlobStore] = None,
+    ) -> None:
         self._uow_factory = uow_factory
         self._uow = uow_factory()
         self._sandbox_cls = sandbox_cls
+        self._llm_telemetry = llm_telemetry
+        self._event_payload_store = event_payload_store
 
     async def create_session(self) -> Session:
         logger.info("创建任务会话")
@@ -57,6 +66,15 @@ class SessionService:
         async with self._uow:
             return await self._uow.session.get_by_id(session_id=session_id)
 
+    async def get_llm_usage(self, session_id: str) -> LLMSessionUsage:
+        logger.info(f"获取任务会话模型调用用量: {session_id}")
+        async with self._uow:
+            session = await self._uow.session.get_by_id(session_id=session_id)
+        if not session:
+            logger.error(f"任务会话不存在: {session_id}")
+            raise NotFoundError(msg=f"任务会话不存在: {session_id}")
+        return await self._llm_telemetry.get_session_usage(session_id)
+
     async def get_session_files(self, session_id: str) -> List[File]:
         logger.info(f"获取任务会话文件列表: {session_id}")
         async with self._uow:
@@ -66,6 +84,29 @@ class SessionService:
             raise RuntimeError(f"任务会话不存在: {session_id}")
         return session.files
 
+    async def get_tool_event_payload(self, session_id: str, payload_ref: str) -> ToolEventPayloadResponse:
+        logger.info(f"获取会话：{session_id} 中工具事件载荷：{payload_ref}")
+        async with self._uow:
+            session = await self._uow.session.get_by_id(session_id=session_id)
+        if not session:
+            logger.error(f"任务会话不存在: {session_id}")
+            raise NotFoundError(msg=f"任务会话不存在: {session_id}")
+
+        # 只允许读取会话事件中引用的载荷
+        if not any(isinstance(event, ToolEvent) and event.payload_ref == payload_ref for event in session.events):
+            raise NotFoundError(msg=f"工具事件载荷不存在: {payload_ref}")
+
+        payload = await self._event_payload_store.get(payload_ref) if self._event_payload_store else None
+        if payload is None:
+            raise NotFoundError(msg=f"工具事件载荷不存在或已过期: {payload_ref}")
+
+        data = json.loads(payload)
+        return ToolEventPayloadResponse(
+            payload_ref=payload_ref,
+            content=data.get("tool_content"),
+            result=data.get("function_result"),
+        )
+
     async def read_file(self, session_id: str, filepath: str) -> FileReadResponse:
         logger.info(f"获取会话：{session_id} 中文件路径：{filepath} 的内容")
         # 获取指定会话信息
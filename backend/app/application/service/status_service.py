@@ -6,7 +6,7 @@
 @File   : status_service.py
 """
 import asyncio
-from typing import List
+from typing import List, Dict, Any, Callable, Awaitable, Optional
 
 from app.domain.external import HealthChecker
 from app.domain.models import HealthStatus
@@ -15,8 +15,13 @@ from app.domain.models import HealthStatus
 class StatusService:
     """系统状态服务"""
 
-    def __init__(self, checkers: List[HealthChecker]) -> None:
+    def __init__(
+            self,
+            checkers: List[HealthChecker],
+            metric_providers: Optional[Dict[str, Callable[[], Awaitable[Dict[str, Any]]]]] = None,
+    ) -> None:
         self._checkers = checkers
+        self._metric_providers = metric_providers or {}
 
     async def check_all(self) -> List[HealthStatus]:
         """检查所有服务"""
@@ -37,3 +42,15 @@ class StatusService:
                 processed_results.append(res)
 
         return processed_results
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """获取所有运行指标"""
+        names = list(self._metric_providers.keys())
+        results = await asyncio.gather(
+            *(provider() for provider in self._metric_providers.values()),
+            return_exceptions=True
+        )
+        return {
+            name: {"error": str(result)} if isinstance(result, Exception) else result
+            for name, result in zip(names, results)
+        }
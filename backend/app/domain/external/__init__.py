@@ -5,11 +5,14 @@
 @Author : caixiaorong01@outlook.com
 @File   : __init__.py.py
 """
+from .blob_store import BlobStore
 from .browser import Browser
+from .distributed_lock import DistributedLock
 from .file_storage import FileStorage
 from .health_checker import HealthChecker
 from .json_parser import JSONParser
-from .llm import LLM
+from .llm import LLM, llm_call_context
+from .llm_telemetry import LLMTelemetry
 from .message_queue import MessageQueue
 from .sandbox import Sandbox
 from .search import SearchEngine
@@ -17,6 +20,8 @@ from .task import Task, TaskRunner
 
 __all__ = [
     "LLM",
+    "llm_call_context",
+    "LLMTelemetry",
     "HealthChecker",
     "Task",
     "TaskRunner",
@@ -24,6 +29,8 @@ __all__ = [
     "JSONParser",
     "SearchEngine",
     "Browser",
+    "BlobStore",
     "Sandbox",
     "FileStorage",
+    "DistributedLock",
 ]
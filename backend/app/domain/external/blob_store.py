@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 23:30
+@Author : caixiaorong01@outlook.com
+@File   : blob_store.py
+"""
+from typing import Protocol, Optional
+
+
+class BlobStore(Protocol):
+    """大块文本内容存储协议，用于将工具输出等大体积内容移出记忆与事件，按键按需读取"""
+
+    async def put(self, key: str, content: str) -> None:
+        """
+        写入内容
+        :param key: 内容键
+        :param content: 文本内容
+        :return: None
+        """
+        ...
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        读取内容
+        :param key: 内容键
+        :return: 文本内容，不存在或已过期时返回None
+        """
+        ...
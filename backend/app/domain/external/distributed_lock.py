@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 10:12
+@Author : caixiaorong01@outlook.com
+@File   : distributed_lock.py
+"""
+from typing import Protocol, Optional
+
+
+class DistributedLock(Protocol):
+    """跨节点共享的分布式锁协议，锁带有租约，持有者异常退出后自动释放"""
+
+    async def acquire(self, key: str) -> Optional[str]:
+        """
+        获取锁
+        :param key: 锁名称
+        :return: 获取成功返回锁凭证，等待超时返回None
+        """
+        ...
+
+    @property
+    def lease_seconds(self) -> int:
+        """锁的租约时长(秒)，长时间持有锁时需在租约到期前续约"""
+        ...
+
+    async def renew(self, key: str, token: str) -> bool:
+        """
+        续约锁，将租约重置为完整的租约时长
+        :param key: 锁名称
+        :param token: 获取锁时返回的凭证
+        :return: 锁仍由当前持有者持有且续约成功时返回True
+        """
+        ...
+
+    async def release(self, key: str, token: str) -> bool:
+        """
+        释放锁
+        :param key: 锁名称
+        :param token: 获取锁时返回的凭证
+        :return: 是否释放成功
+        """
+        ...
@@ -5,7 +5,7 @@
 @Author : caixiaorong01@outlook.com
 @File   : file_storage.py
 """
-from typing import Protocol, Tuple, BinaryIO
+from typing import Protocol, Tuple, BinaryIO, Optional, AsyncIterator, AsyncGenerator
 
 from fastapi import UploadFile
 
@@ -15,10 +15,28 @@ from app.domain.models import File
 class FileStorage(Protocol):
     """文件存储桶协议"""
 
-    async def upload_file(self, upload_file: UploadFile) -> File:
-        """根据传递的文件源上传文件后返回文件信息"""
+    async def upload_file(self, upload_file: UploadFile, sha256: Optional[str] = None) -> File:
+        """
+        根据传递的文件源上传文件后返回文件信息
+        传递内容哈希时按哈希寻址存储，相同内容的文件共享同一个存储对象，对象已存在时跳过上传
+        """
+        ...
+
+    async def upload_stream(self, stream: AsyncIterator[bytes], filename: str, sha256: Optional[str] = None) -> File:
+        """
+        流式上传文件，边读取边上传，文件大小与内容哈希在上传过程中计算
+        传递内容哈希时按哈希寻址存储，对象已存在时不读取文件流直接返回
+        """
         ...
 
     async def download_file(self, file_id: str) -> Tuple[BinaryIO, File]:
         """根据传递的文件id下载文件，并返回文件源+文件信息"""
         ...
+
+    async def stream_download_file(
+            self,
+            file_id: str,
+            chunk_size: int = 1024 * 1024,
+    ) -> Tuple[AsyncGenerator[bytes, None], File]:
+        """根据传递的文件id流式下载文件，返回按块产出内容的异步生成器+文件信息"""
+        ...
@@ -5,7 +5,11 @@
 @Author : caixiaorong01@outlook.com
 @File   : llm.py
 """
-from typing import Protocol, Any, Dict
+from contextvars import ContextVar
+from typing import Protocol, Any, Dict, AsyncGenerator
+
+# 当前LLM调用的上下文信息(会话id、Agent名称、步骤id)，由Agent在调用模型前设置，供缓存、遥测等读取
+llm_call_context: ContextVar[Dict[str, Any]] = ContextVar("llm_call_context", default={})
 
 
 class LLM(Protocol):
@@ -20,6 +24,30 @@ class LLM(Protocol):
         """调用LLM接口"""
         ...
 
+    def stream(self,
+               messages: list[Dict[str, Any]],
+               tools: list[Dict[str, Any]] = None,
+               response_format: Dict[str, Any] = None,
+               tool_choice: str = None,
+               ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        流式调用LLM接口
+        生成两类数据:
+        - {"type": "delta", "content": ..., "reasoning_content": ..., "tool_calls": [...]}: 增量内容
+        - {"type": "message", "message": {...}}: 最后一条，组装完成的完整消息，格式与invoke返回一致
+        """
+        ...
+
+    @property
+    def streaming(self) -> bool:
+        """是否启用流式输出"""
+        ...
+
+    @property
+    def parallel_tool_calls(self) -> bool:
+        """是否允许单轮返回多个工具调用"""
+        ...
+
     @property
     def model_name(self) -> str:
         """获取LLM模型名称"""
@@ -34,3 +62,12 @@ class LLM(Protocol):
     def max_tokens(self) -> int:
         """获取LLM模型最大token数"""
         ...
+
+    @property
+    def context_budget(self) -> int:
+        """获取单次请求上下文的token预算"""
+        ...
+
+    async def aclose(self) -> None:
+        """关闭LLM占用的HTTP客户端等资源"""
+        ...
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 14:30
+@Author : caixiaorong01@outlook.com
+@File   : llm_telemetry.py
+"""
+from typing import Protocol, Dict, Any
+
+from app.domain.models import LLMCallRecord, LLMSessionUsage
+
+
+class LLMTelemetry(Protocol):
+    """模型调用遥测协议，记录每次调用的用量与耗时，并按会话、步骤汇总"""
+
+    async def record(self, record: LLMCallRecord) -> None:
+        """记录一次模型调用"""
+        ...
+
+    async def record_skipped_call(self, session_id: str, agent: str, reason: str) -> None:
+        """记录一次被策略跳过的模型调用(如跳过计划更新)"""
+        ...
+
+    async def get_session_usage(self, session_id: str) -> LLMSessionUsage:
+        """获取会话的模型调用用量汇总"""
+        ...
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """获取当前进程按模型汇总的调用指标，以及被策略跳过的调用次数"""
+        ...
@@ -5,9 +5,9 @@
 @Author : caixiaorong01@outlook.com
 @File   : sandbox.py
 """
-from typing import Protocol, Optional, BinaryIO, Self
+from typing import Protocol, Optional, BinaryIO, Self, AsyncGenerator, AsyncIterator
 
-from app.domain.external import Browser
+from app.domain.external import Browser, LLM
 from app.domain.models import ToolResult
 
 
@@ -112,6 +112,14 @@ class Sandbox(Protocol):
         """
         ...
 
+    async def get_file_hash(self, file_path: str) -> ToolResult:
+        """
+        计算文件内容的sha256摘要
+        :param file_path: 文件路径
+        :return:
+        """
+        ...
+
     async def delete_file(self, file_path: str) -> ToolResult:
         """
         删除文件
@@ -187,6 +195,24 @@ class Sandbox(Protocol):
         """
         ...
 
+    async def upload_file_stream(self, stream: AsyncIterator[bytes], file_path: str) -> ToolResult:
+        """
+        流式上传文件，按块发送文件内容，避免大文件整体读入内存
+        :param stream: 文件内容块
+        :param file_path: 文件路径
+        :return:
+        """
+        ...
+
+    def stream_download_file(self, file_path: str, chunk_size: int = 1024 * 1024) -> AsyncGenerator[bytes, None]:
+        """
+        流式下载文件，按块产出文件内容，避免大文件整体读入内存
+        :param file_path: 文件路径
+        :param chunk_size: 每块的字节数
+        :return:
+        """
+        ...
+
     async def ensure_sandbox(self) -> None:
         """
         确保沙盒存在
@@ -201,9 +227,10 @@ class Sandbox(Protocol):
         """
         ...
 
-    async def get_browser(self) -> Browser:
+    async def get_browser(self, llm: Optional[LLM] = None) -> Browser:
         """
         获取浏览器
+        :param llm: 用于提取页面内容的大语言模型，为空时直接返回页面的Markdown内容
         :return:
         """
         ...
@@ -7,6 +7,7 @@
 """
 from abc import ABC, abstractmethod
 from typing import Protocol, Optional
+
 from app.domain.external.message_queue import MessageQueue
 
 
@@ -28,6 +29,16 @@ class TaskRunner(ABC):
         """任务完成回调"""
         raise NotImplementedError("on_done未实现")
 
+    @abstractmethod
+    def drain(self) -> None:
+        """进入排空模式，执行器需在下一个检查点停止执行"""
+        raise NotImplementedError("drain未实现")
+
+    @abstractmethod
+    async def handoff(self, task: "Task") -> Optional[str]:
+        """移交任务(不销毁沙箱)，返回供其他节点恢复的会话id，无需移交时返回None"""
+        raise NotImplementedError("handoff未实现")
+
 
 class Task(Protocol):
     """任务抽象类"""
@@ -60,6 +71,10 @@ class Task(Protocol):
         """任务是否完成"""
         ...
 
+    async def is_running(self) -> bool:
+        """任务是否仍在执行，关联其他节点的任务时根据执行节点的心跳判断"""
+        ...
+
     @classmethod
     def get(cls, task_id: str) -> Optional["Task"]:
         """获取任务"""
@@ -70,7 +85,27 @@ class Task(Protocol):
         """创建任务"""
         ...
 
+    @classmethod
+    def attach(cls, task_id: str) -> "Task":
+        """关联一个已存在的任务(可能运行在其他节点)，仅通过共享的输入/输出流与其交互"""
+        ...
+
     @classmethod
     async def destroy(cls) -> None:
         """销毁任务"""
         ...
+
+    @classmethod
+    def is_draining(cls) -> bool:
+        """当前节点是否处于排空模式"""
+        ...
+
+    @classmethod
+    async def drain(cls, timeout: float) -> None:
+        """排空当前节点的任务，超时未到达检查点的任务将被中断并移交给其他节点"""
+        ...
+
+    @classmethod
+    async def claim_handoff(cls, timeout: int) -> Optional[str]:
+        """认领其他节点移交的任务，返回待恢复的会话id"""
+        ...
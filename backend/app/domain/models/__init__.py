@@ -8,6 +8,13 @@
 from .app_config import (
     AppConfig,
     LLMConfig,
+    LLMEndpointConfig,
+    LLMRole,
+    LLMRoleConfig,
+    LLMCacheConfig,
+    LLMCacheBackend,
+    ContextStrategyType,
+    ReplanPolicyType,
     AgentConfig,
     MCPConfig,
     MCPTransport,
@@ -20,6 +27,10 @@ from .event import (
     TitleEvent,
     StepEvent,
     MessageEvent,
+    MessageDeltaEvent,
+    PlanDraftEvent,
+    FileSyncEvent,
+    FileSyncStatus,
     ToolEvent,
     WaitEvent,
     ErrorEvent,
@@ -27,18 +38,21 @@ from .event import (
     Event,
     ToolEventStatus,
     PlanEventStatus,
+    StepEventStatus,
     BrowserToolContent,
     SearchToolContent,
     ShellToolContent,
     FileToolContent,
     MCPToolContent,
     A2AToolContent,
+    ToolContent,
 )
 from .file import File
 from .health_status import HealthStatus
+from .llm_usage import LLMCallRecord, LLMUsageStats, LLMSessionUsage
 from .memory import Memory
 from .message import Message
-from .plan import Plan, Step, ExecutionStatus
+from .plan import Plan, Step, ExecutionStatus, PlanOperation, PlanOperationType
 from .search import SearchResults, SearchResultItem
 from .session import Session, SessionStatus
 from .tool_result import ToolResult
@@ -46,13 +60,25 @@ from .tool_result import ToolResult
 __all__ = [
     "AppConfig",
     "LLMConfig",
+    "LLMEndpointConfig",
+    "LLMRole",
+    "LLMRoleConfig",
+    "LLMCacheConfig",
+    "LLMCacheBackend",
+    "ContextStrategyType",
+    "ReplanPolicyType",
     "AgentConfig",
     "MCPConfig",
     "MCPTransport",
     "MCPServerConfig",
     "HealthStatus",
+    "LLMCallRecord",
+    "LLMUsageStats",
+    "LLMSessionUsage",
     "Memory",
     "Plan",
+    "PlanOperation",
+    "PlanOperationType",
     "Step",
     "ExecutionStatus",
     "BaseEvent",
@@ -60,6 +86,10 @@ __all__ = [
     "TitleEvent",
     "StepEvent",
     "MessageEvent",
+    "MessageDeltaEvent",
+    "PlanDraftEvent",
+    "FileSyncEvent",
+    "FileSyncStatus",
     "ToolEvent",
     "WaitEvent",
     "ErrorEvent",
@@ -67,6 +97,7 @@ __all__ = [
     "Event",
     "ToolEventStatus",
     "PlanEventStatus",
+    "StepEventStatus",
     "ToolResult",
     "File",
     "Message",
@@ -81,4 +112,5 @@ __all__ = [
     "FileToolContent",
     "MCPToolContent",
     "A2AToolContent",
+    "ToolContent",
 ]
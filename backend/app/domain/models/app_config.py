@@ -12,6 +12,32 @@ from typing import Any, Dict, Optional, List
 from pydantic import BaseModel, ConfigDict, HttpUrl, Field, model_validator
 
 
+class LLMEndpointConfig(BaseModel):
+    """语言模型端点配置"""
+    base_url: HttpUrl
+    api_key: str = ""
+    weight: int = Field(default=1, gt=0)  # 负载均衡权重
+
+
+class LLMRole(str, Enum):
+    """模型角色，不同角色可以路由到不同的模型"""
+    PLANNER = "planner"  # 创建/更新计划、生成标题
+    EXECUTOR = "executor"  # ReAct执行步骤
+    SUMMARIZER = "summarizer"  # 任务总结与上下文压缩
+    PAGE_EXTRACTOR = "page_extractor"  # 浏览器页面内容提取，未配置时不使用模型提取
+
+
+class LLMRoleConfig(BaseModel):
+    """角色模型配置，未设置的字段沿用基础模型配置"""
+    base_url: Optional[HttpUrl] = None  # 设置后使用独立的端点，不再使用基础配置的多端点
+    api_key: str = ""
+    model_name: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = Field(default=None, ge=0)
+    prompt_price: Optional[float] = Field(default=None, ge=0)
+    completion_price: Optional[float] = Field(default=None, ge=0)
+
+
 class LLMConfig(BaseModel):
     """语言模型配置"""
     base_url: HttpUrl = "https://api.deepseek.com"
@@ -19,6 +45,62 @@ class LLMConfig(BaseModel):
     model_name: str = "deepseek-reasoner"
     temperature: float = Field(default=0.7)
     max_tokens: int = Field(default=8192, ge=0)
+    stream: bool = True  # 是否使用流式输出，开启后前端可以实时看到模型生成的内容
+    parallel_tool_calls: bool = False  # 是否允许模型单轮返回多个工具调用，仅当全部为只读工具时并行执行
+    endpoints: List[LLMEndpointConfig] = Field(default_factory=list)  # 多端点/多密钥配置，为空时使用base_url与api_key
+    max_attempts: int = Field(default=4, gt=0, lt=20)  # 单次模型调用在端点池上的最大尝试次数
+    context_budget: int = Field(default=60000, gt=0)  # 单次请求上下文(消息+工具定义)的token预算，超出后裁剪Agent记忆
+    prompt_price: float = Field(default=0.0, ge=0)  # 每百万提示词token的价格，用于按角色统计成本
+    completion_price: float = Field(default=0.0, ge=0)  # 每百万生成token的价格
+    roles: Dict[LLMRole, LLMRoleConfig] = Field(default_factory=dict)  # 按角色覆盖的模型配置
+
+    def for_role(self, role: LLMRole) -> "LLMConfig":
+        """获取指定角色生效的模型配置，未配置该角色时使用基础配置"""
+        role_config = self.roles.get(role)
+        update: Dict[str, Any] = {"roles": {}}
+        if role_config is None:
+            return self.model_copy(update=update)
+
+        # 角色配置了独立端点时不再使用基础配置的端点与多端点
+        if role_config.base_url:
+            update.update(base_url=role_config.base_url, api_key=role_config.api_key, endpoints=[])
+        for field in ("model_name", "temperature", "max_tokens", "prompt_price", "completion_price"):
+            value = getattr(role_config, field)
+            if value is not None:
+                update[field] = value
+        return self.model_copy(update=update)
+
+
+class LLMCacheBackend(str, Enum):
+    """模型响应缓存后端"""
+    MEMORY = "memory"
+    REDIS = "redis"
+
+
+class LLMCacheConfig(BaseModel):
+    """模型响应缓存配置，对请求完全相同的模型调用直接返回缓存结果"""
+    enabled: bool = False
+    backend: LLMCacheBackend = LLMCacheBackend.REDIS
+    agents: List[str] = Field(default_factory=lambda: ["planner"])  # 启用缓存的Agent名称列表
+    deterministic_only: bool = True  # 仅缓存temperature为0的调用
+    ttl_seconds: int = Field(default=86400, gt=0)  # 缓存过期时间
+    max_entries: int = Field(default=1000, gt=0)  # 最大缓存条目数，超出后淘汰最久未使用的条目
+
+
+class ContextStrategyType(str, Enum):
+    """上下文超出预算时的裁剪策略"""
+    DROP_TOOL_OUTPUTS = "drop_tool_outputs"  # 仅截断较早的工具输出
+    SUMMARIZE = "summarize"  # 仅将较早的对话总结为摘要
+    DROP_TOOL_OUTPUTS_THEN_SUMMARIZE = "drop_tool_outputs_then_summarize"  # 先截断工具输出，仍超出则总结
+
+
+class ReplanPolicyType(str, Enum):
+    """步骤执行完成后更新计划的策略，任一步骤执行失败时始终更新计划"""
+    ALWAYS = "always"  # 每个步骤执行完成后都更新计划
+    ON_FAILURE = "on_failure"  # 仅步骤执行失败时更新计划
+    SIGNIFICANT_RESULT = "significant_result"  # 步骤产出附件或较长结果时更新计划
+    EVERY_N_STEPS = "every_n_steps"  # 每执行N个步骤更新一次计划
+    CLASSIFIER = "classifier"  # 由轻量的模型调用判断是否需要更新计划
 
 
 class AgentConfig(BaseModel):
@@ -26,6 +108,19 @@ class AgentConfig(BaseModel):
     max_iterations: int = Field(default=100, gt=0, lt=1000)  # Agent执行的最大迭代次数，有效范围(0, 1000)
     max_retries: int = Field(default=3, gt=1, lt=10)  # Agent执行失败后的最大重试次数，有效范围(1, 10)
     max_search_results: int = Field(default=10, gt=1, lt=30)  # Agent搜索结果的最大返回数量，有效范围(1, 30)
+    max_parallel_tool_calls: int = Field(default=4, gt=0, le=16)  # 并行执行工具调用的最大并发数，有效范围(0, 16]
+    max_parallel_steps: int = Field(default=1, gt=0, le=8)  # 并行执行无依赖计划步骤的最大并发数，1表示顺序执行
+    context_strategy: ContextStrategyType = ContextStrategyType.DROP_TOOL_OUTPUTS_THEN_SUMMARIZE  # 上下文裁剪策略
+    replan_policy: ReplanPolicyType = ReplanPolicyType.ALWAYS  # 步骤执行完成后更新计划的策略
+    replan_interval: int = Field(default=3, gt=0, le=20)  # every_n_steps策略下更新计划的步骤间隔
+    replan_result_chars: int = Field(default=1000, gt=0)  # significant_result策略下视为重要结果的最小结果长度
+    tool_output_spill_chars: int = Field(default=20000, ge=0)  # 工具结果超过该长度时转存并在记忆中只保留预览，0表示不转存
+    tool_output_preview_chars: int = Field(default=2000, gt=0)  # 转存的工具结果在记忆中保留的预览长度
+    tool_enrichment_workers: int = Field(default=4, gt=0, le=16)  # 异步补充工具事件扩展内容(截图上传、文件同步等)的最大并发数
+    attachment_sync_workers: int = Field(default=4, gt=0, le=16)  # 消息附件在存储与沙箱之间同步的最大并发数
+    tool_cache_ttl_seconds: int = Field(default=300, ge=0)  # 会话内只读工具结果的缓存时长，0表示不缓存
+    memory_flush_interval: float = Field(default=5.0, ge=0)  # 记忆变更后延迟写入存储的最长间隔(秒)，0表示每次变更立即写入
+    tool_event_payload_chars: int = Field(default=8192, ge=0)  # 工具事件载荷超过该长度时外部化存储，0表示不外部化
 
 
 class MCPTransport(str, Enum):
@@ -86,6 +181,7 @@ class AppConfig(BaseModel):
     agent_config: AgentConfig
     mcp_config: MCPConfig
     a2a_config: A2AConfig
+    llm_cache_config: LLMCacheConfig = Field(default_factory=LLMCacheConfig)
 
     # 允许传递额外的字段初始化
     model_config = ConfigDict(extra="allow")
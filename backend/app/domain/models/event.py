@@ -13,7 +13,7 @@ from typing import Literal, List, Any, Union, Optional, Dict, Annotated
 from pydantic import BaseModel, Field
 
 from .file import File
-from .plan import Plan, Step
+from .plan import Plan, Step, PlanOperation
 from .search import SearchResultItem
 from .tool_result import ToolResult
 
@@ -36,6 +36,7 @@ class ToolEventStatus(str, Enum):
     """工具事件状态"""
     CALLING = "calling"
     CALLED = "called"
+    UPDATED = "updated"  # 工具调用完成后异步补充的扩展内容
 
 
 class BaseEvent(BaseModel):
@@ -46,10 +47,21 @@ class BaseEvent(BaseModel):
 
 
 class PlanEvent(BaseEvent):
-    """计划事件模型"""
+    """
+    计划事件模型
+    快照事件携带完整计划，增量事件只携带相对base_version的变更操作，持久化与推送前由任务运行器完成增量编码
+    """
     type: Literal["plan"] = "plan"
-    plan: Plan  # 规划
+    plan: Optional[Plan] = None  # 完整计划快照，增量事件中为空
     status: PlanEventStatus = PlanEventStatus.CREATED
+    version: int = 0  # 应用本事件后的计划版本
+    base_version: Optional[int] = None  # 增量事件基于的计划版本，为空表示快照事件
+    operations: List[PlanOperation] = Field(default_factory=list)  # 增量事件的变更操作
+
+    @property
+    def is_snapshot(self) -> bool:
+        """是否为携带完整计划的快照事件"""
+        return self.base_version is None
 
 
 class TitleEvent(BaseEvent):
@@ -73,6 +85,42 @@ class MessageEvent(BaseEvent):
     attachments: List[File] = Field(default_factory=list)  # 消息附件列表
 
 
+class MessageDeltaEvent(BaseEvent):
+    """消息增量事件模型，用于实时推送模型生成过程中的部分内容，不持久化到会话事件中"""
+    type: Literal["message_delta"] = "message_delta"
+    stream_id: str = ""  # 流id，同一次模型调用产生的增量共享同一个流id
+    agent: str = ""  # 产生增量的Agent名称
+    content: str = ""  # 内容增量
+    reasoning_content: str = ""  # 推理内容增量
+    format: str = "text"  # 内容格式，text为可直接展示的文本，json_object为结构化输出的原始json片段
+    done: bool = False  # 是否为本次模型调用的最后一个增量(调用成功或中途失败)
+
+
+class PlanDraftEvent(BaseEvent):
+    """计划草稿事件，规划模型流式输出过程中推送已解析出的步骤，不持久化到会话事件中"""
+    type: Literal["plan_draft"] = "plan_draft"
+    stream_id: str = ""  # 流id，与同一次模型调用的消息增量事件一致
+    steps: List[Step] = Field(default_factory=list)  # 目前已解析出的全部步骤
+
+
+class FileSyncStatus(str, Enum):
+    """文件同步状态"""
+    SYNCING = "syncing"
+    SYNCED = "synced"
+    FAILED = "failed"
+
+
+class FileSyncEvent(BaseEvent):
+    """文件同步事件，推送消息附件在存储与沙箱之间同步的逐文件进度，不持久化到会话事件中"""
+    type: Literal["file_sync"] = "file_sync"
+    direction: Literal["to_sandbox", "to_storage"] = "to_sandbox"  # 同步方向
+    filename: str = ""  # 文件名
+    filepath: str = ""  # 文件在沙箱中的路径
+    status: FileSyncStatus = FileSyncStatus.SYNCING  # 同步状态
+    index: int = 0  # 文件在本批附件中的序号
+    total: int = 0  # 本批附件数量
+
+
 class BrowserToolContent(BaseModel):
     """浏览器工具扩展内容"""
     screenshot: str  # 浏览器快照截图
@@ -122,6 +170,9 @@ class ToolEvent(BaseEvent):
     function_args: Dict[str, Any]  # 工具调用的函数参数
     function_result: Optional[ToolResult] = None  # 工具调用结果
     status: ToolEventStatus = ToolEventStatus.CALLING  # 工具事件状态
+    payload_ref: Optional[str] = None  # 外部化载荷的内容哈希，不为空时工具扩展内容与调用结果数据需按引用读取
+    payload_summary: str = ""  # 外部化载荷的摘要
+    payload_size: int = 0  # 外部化载荷的长度
 
 
 class WaitEvent(BaseEvent):
@@ -146,6 +197,9 @@ Event = Annotated[
         TitleEvent,
         StepEvent,
         MessageEvent,
+        MessageDeltaEvent,
+        PlanDraftEvent,
+        FileSyncEvent,
         ToolEvent,
         WaitEvent,
         ErrorEvent,
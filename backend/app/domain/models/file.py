@@ -19,3 +19,4 @@ class File(BaseModel):
     extension: str = ""  # 扩展名
     mime_type: str = ""  # mime-type类型
     size: int = 0  # 文件大小，单位为字节
+    sha256: str = ""  # 文件内容的sha256摘要，用于判断文件是否变化及内容寻址存储
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 14:20
+@Author : caixiaorong01@outlook.com
+@File   : llm_usage.py
+"""
+from datetime import datetime
+from typing import Optional, Dict
+
+from pydantic import BaseModel, Field
+
+
+class LLMCallRecord(BaseModel):
+    """单次模型调用的用量与耗时记录"""
+    session_id: str = ""  # 会话id
+    agent: str = ""  # 发起调用的Agent名称
+    role: str = ""  # 模型角色
+    step_id: Optional[str] = None  # 调用时所在的计划步骤id
+    model: str = ""  # 模型名称
+    streaming: bool = False  # 是否为流式调用
+    success: bool = True  # 调用是否成功
+    prompt_tokens: int = 0  # 提示词token数
+    completion_tokens: int = 0  # 生成内容token数
+    reasoning_tokens: int = 0  # 推理内容token数(包含在生成内容中)
+    cached_tokens: int = 0  # 命中提供方前缀缓存的提示词token数
+    ttft_ms: Optional[float] = None  # 首token耗时(毫秒)，仅流式调用
+    latency_ms: float = 0.0  # 总耗时(毫秒)
+    retries: int = 0  # 重试次数
+    cost: float = 0.0  # 按模型单价估算的成本
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class LLMUsageStats(BaseModel):
+    """模型调用用量汇总"""
+    calls: int = 0
+    failures: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    cost: float = 0.0
+    latency_ms_total: float = 0.0
+    ttft_ms_total: float = 0.0
+    ttft_count: int = 0
+
+    @property
+    def latency_ms_avg(self) -> float:
+        return self.latency_ms_total / self.calls if self.calls else 0.0
+
+    @property
+    def ttft_ms_avg(self) -> float:
+        return self.ttft_ms_total / self.ttft_count if self.ttft_count else 0.0
+
+    def add(self, record: LLMCallRecord) -> None:
+        """累加一次调用记录"""
+        self.calls += 1
+        self.failures += 0 if record.success else 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.reasoning_tokens += record.reasoning_tokens
+        self.cached_tokens += record.cached_tokens
+        self.retries += record.retries
+        self.cost += record.cost
+        self.latency_ms_total += record.latency_ms
+        if record.ttft_ms is not None:
+            self.ttft_ms_total += record.ttft_ms
+            self.ttft_count += 1
+
+
+class LLMSessionUsage(BaseModel):
+    """会话维度的模型调用用量，包含总计以及按Agent、按模型角色、按步骤的汇总"""
+    session_id: str
+    total: LLMUsageStats = Field(default_factory=LLMUsageStats)
+    by_agent: Dict[str, LLMUsageStats] = Field(default_factory=dict)
+    by_role: Dict[str, LLMUsageStats] = Field(default_factory=dict)
+    by_step: Dict[str, LLMUsageStats] = Field(default_factory=dict)
+    skipped_calls: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # Agent->跳过原因->被策略跳过的调用次数
@@ -7,7 +7,7 @@
 """
 import uuid
 from enum import Enum
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 
 from pydantic import BaseModel, Field
 
@@ -20,6 +20,14 @@ class ExecutionStatus(str, Enum):
     FAILED = "failed"
 
 
+class PlanOperationType(str, Enum):
+    """计划变更操作类型"""
+    ADD_STEP = "add_step"  # 新增步骤
+    REMOVE_STEP = "remove_step"  # 删除步骤
+    UPDATE_STEP = "update_step"  # 更新步骤字段(状态、结果等)
+    UPDATE_PLAN = "update_plan"  # 更新计划字段(标题、状态等)
+
+
 class Step(BaseModel):
     """
     步骤/子任务
@@ -31,6 +39,7 @@ class Step(BaseModel):
     error: Optional[str] = None
     success: bool = False  # 是否执行成功
     attachments: List[str] = Field(default_factory=list)  # 附件信息
+    depends_on: Optional[List[str]] = None  # 依赖的步骤id列表，为空时表示依赖之前的所有步骤
 
     @property
     def done(self) -> bool:
@@ -59,3 +68,100 @@ class Plan(BaseModel):
     def get_next_step(self) -> Optional[Step]:
         """获取下一个未完成的步骤"""
         return next((step for step in self.steps if not step.done), None)
+
+    def get_ready_steps(self) -> List[Step]:
+        """
+        获取所有依赖已满足、可以立即执行的步骤，按计划中的顺序返回。
+        未声明依赖的步骤依赖之前的所有步骤，引用不存在的步骤id的依赖视为已满足。
+        """
+        step_ids = {step.id for step in self.steps}
+        done_ids = {step.id for step in self.steps if step.done}
+        ready_steps: List[Step] = []
+        for index, step in enumerate(self.steps):
+            if step.done:
+                continue
+            if step.depends_on is None:
+                # 未声明依赖时保持顺序执行语义
+                if all(previous.done for previous in self.steps[:index]):
+                    ready_steps.append(step)
+            elif all(dep in done_ids or dep not in step_ids for dep in step.depends_on):
+                ready_steps.append(step)
+
+        # 依赖存在环时没有可执行的步骤，退化为顺序执行下一个未完成的步骤
+        if not ready_steps:
+            next_step = self.get_next_step()
+            if next_step:
+                ready_steps.append(next_step)
+        return ready_steps
+
+    def diff(self, other: "Plan") -> List["PlanOperation"]:
+        """
+        计算由当前计划变更为目标计划所需的操作列表
+        :param other: 目标计划
+        :return: 按顺序应用即可得到目标计划的操作列表
+        """
+        operations: List[PlanOperation] = []
+
+        # 计划字段的变化
+        current = self.model_dump(mode="json", exclude={"steps"})
+        target = other.model_dump(mode="json", exclude={"steps"})
+        fields = {key: value for key, value in target.items() if current.get(key) != value}
+        if fields:
+            operations.append(PlanOperation(op=PlanOperationType.UPDATE_PLAN, fields=fields))
+
+        # 删除目标计划中不存在的步骤
+        target_ids = {step.id for step in other.steps}
+        steps = {step.id: step for step in self.steps}
+        order = [step.id for step in self.steps if step.id in target_ids]
+        for step in self.steps:
+            if step.id not in target_ids:
+                operations.append(PlanOperation(op=PlanOperationType.REMOVE_STEP, step_id=step.id))
+
+        # 按目标顺序逐个比较，位置变化的步骤先删除再在新位置插入
+        for index, step in enumerate(other.steps):
+            if index < len(order) and order[index] == step.id:
+                current = steps[step.id].model_dump(mode="json")
+                target = step.model_dump(mode="json")
+                fields = {key: value for key, value in target.items() if current.get(key) != value}
+                if fields:
+                    operations.append(PlanOperation(op=PlanOperationType.UPDATE_STEP, step_id=step.id, fields=fields))
+                continue
+            if step.id in order:
+                order.remove(step.id)
+                operations.append(PlanOperation(op=PlanOperationType.REMOVE_STEP, step_id=step.id))
+            order.insert(index, step.id)
+            operations.append(PlanOperation(op=PlanOperationType.ADD_STEP, index=index, step=step.model_copy(deep=True)))
+
+        return operations
+
+    def apply(self, operations: List["PlanOperation"]) -> "Plan":
+        """
+        按顺序应用操作列表，返回变更后的新计划，当前计划保持不变
+        :param operations: 操作列表
+        :return: 新计划
+        """
+        plan = self.model_copy(deep=True)
+        for operation in operations:
+            if operation.op == PlanOperationType.UPDATE_PLAN:
+                plan = Plan.model_validate({**plan.model_dump(exclude={"steps"}), **operation.fields, "steps": plan.steps})
+            elif operation.op == PlanOperationType.ADD_STEP:
+                index = len(plan.steps) if operation.index is None else operation.index
+                plan.steps.insert(index, operation.step.model_copy(deep=True))
+            elif operation.op == PlanOperationType.REMOVE_STEP:
+                plan.steps = [step for step in plan.steps if step.id != operation.step_id]
+            elif operation.op == PlanOperationType.UPDATE_STEP:
+                plan.steps = [
+                    Step.model_validate({**step.model_dump(), **operation.fields})
+                    if step.id == operation.step_id else step
+                    for step in plan.steps
+                ]
+        return plan
+
+
+class PlanOperation(BaseModel):
+    """计划变更操作"""
+    op: PlanOperationType
+    step_id: Optional[str] = None  # 删除/更新的步骤id
+    index: Optional[int] = None  # 新增步骤的插入位置
+    step: Optional[Step] = None  # 新增的步骤
+    fields: Dict[str, Any] = Field(default_factory=dict)  # 更新的字段及其新值
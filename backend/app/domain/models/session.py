@@ -5,6 +5,7 @@
 @Author : caixiaorong01@outlook.com
 @File   : session.py
 """
+import logging
 import uuid
 from datetime import datetime
 from enum import Enum
@@ -12,17 +13,20 @@ from typing import Optional, List, Dict
 
 from pydantic import BaseModel, Field
 
-from .event import Event, PlanEvent
+from .event import Event, PlanEvent, MessageEvent, StepEvent, StepEventStatus
 from .file import File
 from .memory import Memory
 from .plan import Plan
 
+logger = logging.getLogger(__name__)
+
 
 class SessionStatus(str, Enum):
     """会话状态类型枚举"""
     PENDING = "pending"  # 等待任务
     RUNNING = "running"  # 运行中
     WAITING = "waiting"  # 等待人类响应
+    HANDOFF = "handoff"  # 节点下线时中断，等待其他节点接管并从检查点继续执行
     COMPLETED = "completed"  # 已完成
 
 
@@ -43,11 +47,58 @@ class Session(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)  # 创建时间
 
     def get_latest_plan(self) -> Optional[Plan]:
-        """获取会话中的最新计划"""
-        # 倒序遍历会话中所有事件消息
+        """
+        获取会话中的最新计划，由最近一次计划快照依次应用之后的增量得到
+        增量的基准版本与上一个计划事件的版本不一致时(增量事件丢失或乱序)停止应用，使用最后一个一致的计划
+        之后已结束的步骤(步骤检查点)会合并到计划中，恢复执行时不会重复执行这些步骤
+        """
+        # 倒序查找最近一次计划快照
+        start = next(
+            (index for index in range(len(self.events) - 1, -1, -1)
+             if isinstance(self.events[index], PlanEvent) and self.events[index].is_snapshot),
+            None,
+        )
+        if start is None:
+            return None
+
+        # 从快照开始顺序应用版本连续的增量，并收集最后一次应用的计划事件之后的步骤事件
+        snapshot: PlanEvent = self.events[start]
+        plan, version, consistent = snapshot.plan, snapshot.version, True
+        step_events: List[StepEvent] = []
+        for event in self.events[start + 1:]:
+            if isinstance(event, StepEvent):
+                step_events.append(event)
+            elif isinstance(event, PlanEvent) and consistent:
+                if event.base_version != version:
+                    logger.warning(
+                        f"会话{self.id}的计划增量版本不连续(基准版本{event.base_version}, 当前版本{version}), "
+                        f"使用最后一个一致的计划"
+                    )
+                    consistent = False
+                    continue
+                plan, version = plan.apply(event.operations), event.version
+                step_events = []
+
+        return self._merge_step_results(plan, step_events)
+
+    @classmethod
+    def _merge_step_results(cls, plan: Plan, step_events: List[StepEvent]) -> Plan:
+        """将已结束步骤的状态与结果合并到计划中"""
+        finished = {
+            event.step.id: event.step
+            for event in step_events
+            if event.status in [StepEventStatus.COMPLETED, StepEventStatus.FAILED]
+        }
+        if not finished:
+            return plan
+        plan = plan.model_copy(deep=True)
+        plan.steps = [finished[step.id].model_copy(deep=True) if step.id in finished else step for step in plan.steps]
+        return plan
+
+    def get_latest_user_message(self) -> Optional[MessageEvent]:
+        """获取会话中最新的用户消息事件"""
         for event in reversed(self.events):
-            # 判断事件的类型是否为PlanEvent，如果是则提取计划后返回
-            if isinstance(event, PlanEvent):
-                return event.plan
+            if isinstance(event, MessageEvent) and event.role == "user":
+                return event
 
         return None
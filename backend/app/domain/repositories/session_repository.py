@@ -63,6 +63,10 @@ class SessionRepository(Protocol):
         """往会话中新增文件"""
         ...
 
+    async def add_files(self, session_id: str, files: List[File]) -> None:
+        """批量往会话中新增文件，会话中已存在相同路径的文件时替换"""
+        ...
+
     async def remove_file(self, session_id: str, file_id: str) -> None:
         """根据传递的会话id+文件id移除文件"""
         ...
@@ -6,10 +6,11 @@
 @File   : agent_task_runner.py
 """
 import asyncio
+import hashlib
 import io
 import logging
 import uuid
-from typing import List, AsyncGenerator, Callable, BinaryIO
+from typing import List, AsyncGenerator, Callable, Optional, Dict, Set, Awaitable, Tuple, Literal
 
 from fastapi import UploadFile
 from pydantic import TypeAdapter
@@ -22,16 +23,23 @@ from app.domain.external import (
     JSONParser,
     Browser,
     SearchEngine,
+    LLMTelemetry,
+    BlobStore,
     Sandbox
 )
 from app.domain.models import (
     AgentConfig,
     MCPConfig,
     A2AConfig,
+    LLMRole,
     ErrorEvent,
     SessionStatus,
     Event,
     MessageEvent,
+    MessageDeltaEvent,
+    PlanDraftEvent,
+    FileSyncEvent,
+    FileSyncStatus,
     File,
     Message,
     BaseEvent,
@@ -42,11 +50,17 @@ from app.domain.models import (
     DoneEvent,
     TitleEvent,
     WaitEvent,
+    Plan,
+    PlanEvent,
+    PlanEventStatus,
+    StepEvent,
+    StepEventStatus,
     BrowserToolContent,
     SearchToolContent,
     ShellToolContent,
     FileToolContent,
     MCPToolContent,
+    ToolContent,
     A2AToolContent,
 )
 from app.domain.repositories import IUnitOfWork
@@ -60,10 +74,11 @@ class AgentTaskRunner(TaskRunner):
     """
     任务执行者，用于执行任务，并返回结果
     """
+    _enrichment_wait_timeout: float = 30.0  # 等待/完成事件发送前等待工具事件补充任务的最长时间(秒)
 
     def __init__(
             self,
-            llm: LLM,
+            llms: Dict[LLMRole, LLM],
             agent_config: AgentConfig,
             mcp_config: MCPConfig,
             a2a_config: A2AConfig,
@@ -74,6 +89,9 @@ class AgentTaskRunner(TaskRunner):
             browser: Browser,
             search_engine: SearchEngine,
             sandbox: Sandbox,
+            llm_telemetry: Optional[LLMTelemetry] = None,
+            blob_store: Optional[BlobStore] = None,
+            event_payload_store: Optional[BlobStore] = None,
     ) -> None:
         self._session_id = session_id
         self._sandbox = sandbox
@@ -85,8 +103,22 @@ class AgentTaskRunner(TaskRunner):
         self._browser = browser
         self._uow_factory = uow_factory
         self._uow = uow_factory()
+        self._event_payload_store = event_payload_store
+        self._event_payload_chars = agent_config.tool_event_payload_chars
+        self._stored_payload_refs: Set[str] = set()  # 已写入存储的载荷哈希，相同内容只写入一次
+        self._enrichment_semaphore = asyncio.Semaphore(agent_config.tool_enrichment_workers)
+        self._enrichment_tasks: Set[asyncio.Task] = set()  # 进行中的工具事件补充任务
+        self._pending_enrichments: Dict[str, Callable[[], Awaitable[ToolContent]]] = {}  # 待事件发送后启动的补充函数
+        self._pending_sync_filepaths: Set[str] = set()  # 当前步骤内涉及、待同步到存储的文件路径
+        self._file_sync_tasks: Set[asyncio.Task] = set()  # 进行中的文件同步任务，任务结束时等待完成而不取消
+        self._file_sync_locks: Dict[str, asyncio.Lock] = {}  # 按文件路径串行化同步
+        self._file_sync_semaphore = asyncio.Semaphore(agent_config.attachment_sync_workers)  # 限制文件同步的并发数
+        self._plan_snapshot: Optional[Plan] = None  # 最近一次推送的计划副本，作为下一次增量编码的基准
+        self._plan_version = 0  # 最近一次推送的计划版本
+        self._draining = False  # 是否处于排空模式
+        self._interrupted = False  # 是否因排空而中断，需要移交给其他节点
         self._flow = PlannerReActFlow(
-            llm=llm,
+            llms=llms,
             agent_config=agent_config,
             session_id=session_id,
             uow_factory=self._uow_factory,
@@ -96,16 +128,24 @@ class AgentTaskRunner(TaskRunner):
             search_engine=search_engine,
             mcp_tool=self._mcp_tool,
             a2a_tool=self._a2a_tool,
+            llm_telemetry=llm_telemetry,
+            blob_store=blob_store,
         )
 
-    async def _put_and_add_event(self, task: Task, event: Event) -> None:
+    @classmethod
+    async def _put_event(cls, task: Task, event: Event) -> None:
         # 将事件数据放入输出流并获取事件ID
         event_id = await task.output_stream.put(event.model_dump_json())
         # 设置事件ID
         event.id = event_id
-        # 将事件添加到会话存储中
-        async with self._uow:
-            await self._uow.session.add_event(self._session_id, event)
+
+    async def _put_and_add_event(self, task: Task, event: Event) -> None:
+        # 将事件放入输出流
+        await self._put_event(task, event)
+        # 将事件添加到会话存储中，后台补充任务也会调用，因此使用独立的UoW
+        uow = self._uow_factory()
+        async with uow:
+            await uow.session.add_event(self._session_id, event)
 
     @classmethod
     async def _pop_event(cls, task: Task) -> Event:
@@ -121,47 +161,88 @@ class AgentTaskRunner(TaskRunner):
         event.id = event_id
         return event
 
-    async def _sync_file_to_sandbox(self, file_id: str) -> File:
-
+    async def _sync_file_to_sandbox(self, file_id: str) -> Optional[File]:
+        """将存储中的文件流式传输到沙箱，不在内存中缓存整个文件，文件记录由调用方批量写入"""
         try:
-            # 从文件存储中下载文件数据和文件元信息
-            file_data, file = await self._file_storage.download_file(file_id=file_id)
+            # 从文件存储中流式下载文件数据并获取文件元信息
+            stream, file = await self._file_storage.stream_download_file(file_id=file_id)
             # 构建沙箱中的文件路径
             filepath = f"/home/ubuntu/upload/{file.filename}"
 
-            # 将文件上传到沙箱环境中
-            tool_result = await self._sandbox.upload_file(
-                file_data=file_data,
-                file_path=filepath,
-                filename=file.filename,
-            )
+            # 将文件流式上传到沙箱环境中
+            try:
+                tool_result = await self._sandbox.upload_file_stream(stream=stream, file_path=filepath)
+            finally:
+                await stream.aclose()
 
-            # 如果上传成功，则更新文件的存储路径并保存到文件仓库
+            # 如果上传成功，则更新文件的沙箱路径
             if tool_result.success:
                 file.filepath = filepath
-                async with self._uow:
-                    await self._uow.file.save(file=file)
                 return file
+            logger.warning(f"同步文件 [{file_id}] 到沙箱失败: {tool_result.message}")
         except Exception as e:
             # 记录同步文件到沙箱时出现的异常
             logger.exception(f"同步文件 [{file_id}] 到沙箱失败: {e}")
+        return None
 
-    async def _sync_message_attachments_to_sandbox(self, event: MessageEvent) -> None:
-        # 初始化附件列表
-        attachments: List[File] = []
+    async def _sync_attachments(
+            self,
+            task: Task,
+            attachments: List[File],
+            direction: Literal["to_sandbox", "to_storage"],
+            sync: Callable[[File], Awaitable[Optional[File]]],
+    ) -> List[Optional[File]]:
+        """并发同步一批附件，并发数受限，逐文件推送同步进度，返回结果与附件顺序一致"""
+        total = len(attachments)
+
+        async def sync_one(index: int, attachment: File) -> Optional[File]:
+            filename = attachment.filename or attachment.filepath.split("/")[-1]
+            async with self._file_sync_semaphore:
+                await self._put_event(task, FileSyncEvent(
+                    direction=direction,
+                    filename=filename,
+                    filepath=attachment.filepath,
+                    status=FileSyncStatus.SYNCING,
+                    index=index,
+                    total=total,
+                ))
+                file = await sync(attachment)
+                await self._put_event(task, FileSyncEvent(
+                    direction=direction,
+                    filename=filename,
+                    filepath=file.filepath if file else attachment.filepath,
+                    status=FileSyncStatus.SYNCED if file else FileSyncStatus.FAILED,
+                    index=index,
+                    total=total,
+                ))
+                return file
+
+        return list(await asyncio.gather(*(
+            sync_one(index, attachment) for index, attachment in enumerate(attachments, start=1)
+        )))
+
+    async def _sync_message_attachments_to_sandbox(self, task: Task, event: MessageEvent) -> None:
         try:
             # 检查事件是否包含附件
             if event.attachments:
-                # 遍历所有附件，同步到沙箱环境
-                for attachment in event.attachments:
-                    # 将附件同步到沙箱
-                    file = await self._sync_file_to_sandbox(file_id=attachment.id)
-                    if file:
-                        # 添加到附件列表
-                        attachments.append(file)
-                        # 将文件添加到会话存储中
-                        async with self._uow:
-                            await self._uow.session.add_file(session_id=self._session_id, file=file)
+                # 并发将附件同步到沙箱环境
+                results = await self._sync_attachments(
+                    task,
+                    event.attachments,
+                    "to_sandbox",
+                    lambda attachment: self._sync_file_to_sandbox(file_id=attachment.id),
+                )
+                attachments = [file for file in results if file]
+                # 附件写入了沙箱，缓存的文件与目录读取结果可能已过期
+                self._flow.invalidate_file_cache()
+
+                # 在同一个事务中写入全部文件记录并添加到会话存储中
+                if attachments:
+                    uow = self._uow_factory()
+                    async with uow:
+                        for file in attachments:
+                            await uow.file.save(file=file)
+                        await uow.session.add_files(session_id=self._session_id, files=attachments)
 
                 # 更新事件中的附件列表为已同步的文件
                 event.attachments = attachments
@@ -169,93 +250,147 @@ class AgentTaskRunner(TaskRunner):
             # 记录同步附件到沙箱时发生的异常
             logger.exception(f"同步消息附件到沙箱失败: {e}")
 
-    @classmethod
-    def _get_stream_size(cls, f: BinaryIO) -> int:
-        # 获取当前文件指针位置
-        current_pos = f.tell()
-        # 将文件指针移动到文件末尾
-        f.seek(0, 2)
-        # 获取文件大小（当前位置即为文件大小）
-        size = f.tell()
-        # 将文件指针恢复到原来的位置
-        f.seek(current_pos)
-        # 返回文件大小
-        return size
-
-    async def _sync_file_to_storage(self, filepath: str) -> File:
-
+    async def _get_sandbox_file_hash(self, filepath: str) -> Optional[str]:
+        """在沙箱中计算文件的sha256，沙箱不支持或计算失败时返回None，由调用方下载后在本地计算"""
         try:
-            # 根据文件路径从会话存储中获取文件信息
-            async with self._uow:
-                file = await self._uow.session.get_file_by_path(session_id=self._session_id, filepath=filepath)
-
-            # 从沙箱环境中下载文件数据
-            file_data = await self._sandbox.download_file(file_path=filepath)
-
-            # 如果文件存在，则从会话存储中移除该文件
-            if file:
-                async with self._uow:
-                    await self._uow.session.remove_file(session_id=self._session_id, file_id=file.filepath)
-
-            # 从路径中提取文件名
-            filename = filepath.split("/")[-1]
-
-            # 创建UploadFile对象用于上传
-            upload_file = UploadFile(file=file_data, filename=filename, size=self._get_stream_size(file_data))
-
-            # 将文件上传到文件存储系统
-            await self._file_storage.upload_file(upload_file=upload_file)
-
-            # 更新文件的存储路径
-            file.filepath = filepath
-
-            # 将文件重新添加到会话存储中
-            async with self._uow:
-                await self._uow.session.add_file(session_id=self._session_id, file=file)
-
-            # 返回同步后的文件对象
-            return file
+            result = await self._sandbox.get_file_hash(file_path=filepath)
+            if result.success and result.data:
+                return result.data.get("sha256") or None
         except Exception as e:
-            # 记录同步文件到存储时发生的异常
-            logger.exception(f"同步文件到存储失败: {e}")
+            logger.warning(f"获取沙箱文件[{filepath}]哈希失败: {e}")
+        return None
 
-    async def _sync_message_attachments_to_storage(self, event: MessageEvent) -> None:
-        attachments: List[File] = []
+    async def _upload_file_to_storage(self, filepath: str) -> Tuple[Optional[File], bool]:
+        """
+        将沙箱文件上传到存储，先在沙箱中计算内容哈希，与会话中记录的哈希一致时跳过下载与上传
+        文件从沙箱流式下载并分块上传，内存占用与文件大小无关，会话文件由调用方批量写入
+        :return: (同步后的文件, 是否需要写入会话)，同步失败时文件为None
+        """
+        # 同一路径的上传串行执行，避免重复上传
+        async with self._file_sync_locks.setdefault(filepath, asyncio.Lock()):
+            # 工具事件补充任务会在后台调用，使用独立的UoW
+            uow = self._uow_factory()
+            try:
+                # 根据文件路径从会话存储中获取文件信息
+                async with uow:
+                    file = await uow.session.get_file_by_path(session_id=self._session_id, filepath=filepath)
+
+                # 文件内容未变化时直接返回已同步的文件
+                sha256 = await self._get_sandbox_file_hash(filepath)
+                if file and sha256 and file.sha256 == sha256:
+                    logger.debug(f"文件[{filepath}]内容未变化, 跳过同步")
+                    return file, False
+
+                # 将沙箱文件流式上传到文件存储系统，沙箱未返回哈希时在上传过程中计算，并记录文件在沙箱中的路径
+                stream = self._sandbox.stream_download_file(file_path=filepath)
+                try:
+                    new_file = await self._file_storage.upload_stream(
+                        stream=stream,
+                        filename=filepath.split("/")[-1],
+                        sha256=sha256,
+                    )
+                finally:
+                    await stream.aclose()
+                new_file.filepath = filepath
+                return new_file, True
+            except Exception as e:
+                # 记录同步文件到存储时发生的异常
+                logger.exception(f"同步文件到存储失败: {e}")
+                return None, False
+
+    async def _save_session_files(self, files: List[File]) -> None:
+        """将同步到存储的文件一次性写入会话，替换相同路径的旧文件"""
+        if not files:
+            return
+        uow = self._uow_factory()
+        async with uow:
+            await uow.session.add_files(session_id=self._session_id, files=files)
 
+    async def _sync_message_attachments_to_storage(self, task: Task, event: MessageEvent) -> None:
         try:
             if event.attachments:
-                for attachment in event.attachments:
-                    # 将附件上传到存储
-                    file = await self._sync_file_to_storage(attachment.filepath)
-                    if file:
-                        attachments.append(file)
+                changed_files: List[File] = []
+
+                async def sync(attachment: File) -> Optional[File]:
+                    file, changed = await self._upload_file_to_storage(attachment.filepath)
+                    if file and changed:
+                        changed_files.append(file)
+                    return file
+
+                # 并发将附件上传到存储，完成后一次性写入会话
+                results = await self._sync_attachments(task, event.attachments, "to_storage", sync)
+                await self._save_session_files(changed_files)
 
                 # 更新事件中的附件列表为已上传的文件
-                event.attachments = attachments
+                event.attachments = [file for file in results if file]
         except Exception as e:
             # 记录同步附件到存储时发生的异常
             logger.exception(f"同步消息附件到存储失败: {e}")
 
-    async def _get_browser_screenshot(self) -> str:
-        # 获取浏览器截图
-        screenshot = await self._browser.screenshot()
+    async def _upload_browser_screenshot(self, screenshot: bytes) -> BrowserToolContent:
+        # 上传浏览器截图
         file = await self._file_storage.upload_file(
             upload_file=UploadFile(
                 file=io.BytesIO(screenshot),
                 filename=f"{str(uuid.uuid4())}.png"
             )
         )
-        return file.id
+        return BrowserToolContent(screenshot=file.id)
+
+    async def _read_shell_console(self, shell_session_id: str) -> ShellToolContent:
+        # 读取对应会话的shell输出
+        shell_result = await self._sandbox.read_shell_output(session_id=shell_session_id, console=True)
+        return ShellToolContent(console=shell_result.data.get("console_records", []))
+
+    async def _read_file_content(self, filepath: str) -> FileToolContent:
+        # 从沙箱中读取文件内容
+        file_read_result = await self._sandbox.read_file(filepath)
+        file_content: str = (file_read_result.data or {}).get("content", "")
+        return FileToolContent(content=file_content)
 
-    async def _handle_tool_event(self, event: ToolEvent) -> None:
+    async def _sync_pending_files(self, filepaths: List[str]) -> None:
+        """并发同步步骤内涉及的文件并一次性写入会话，内容未变化的文件只需一次哈希计算"""
+
+        async def upload(filepath: str) -> Tuple[Optional[File], bool]:
+            async with self._file_sync_semaphore:
+                return await self._upload_file_to_storage(filepath)
+
+        results = await asyncio.gather(*(upload(filepath) for filepath in filepaths))
+        await self._save_session_files([file for file, changed in results if file and changed])
+
+    def _schedule_file_sync(self) -> None:
+        """在步骤边界于后台同步步骤内涉及的文件，同一文件在一个步骤内多次修改只同步一次"""
+        if not self._pending_sync_filepaths:
+            return
+        filepaths = sorted(self._pending_sync_filepaths)
+        self._pending_sync_filepaths.clear()
+        sync_task = asyncio.create_task(self._run_file_sync(filepaths))
+        self._file_sync_tasks.add(sync_task)
+        sync_task.add_done_callback(self._file_sync_tasks.discard)
+
+    async def _run_file_sync(self, filepaths: List[str]) -> None:
+        """后台同步文件，同步失败或被中断时将文件路径放回待同步集合，由下一个步骤边界或任务结束时重新同步"""
+        try:
+            await self._sync_pending_files(filepaths)
+        except BaseException as e:
+            self._pending_sync_filepaths.update(filepaths)
+            if not isinstance(e, Exception):
+                raise
+            logger.warning(f"同步步骤文件失败, 稍后重试: {e}")
+
+    async def _handle_tool_event(self, event: ToolEvent) -> Optional[Callable[[], Awaitable[ToolContent]]]:
+        """
+        填充工具事件的扩展内容，仅依赖内存数据的内容直接填充
+        需要访问沙箱或存储的内容(截图上传、shell输出、文件同步)返回补充函数，由后台任务在事件发送后执行
+        """
         try:
             # 检查工具事件的状态是否为已调用
             if event.status == ToolEventStatus.CALLED:
                 # 处理浏览器工具事件 - 生成屏幕截图
                 if event.tool_name == "browser":
-                    event.tool_content = BrowserToolContent(
-                        screenshot=await self._get_browser_screenshot(),
-                    )
+                    # 截图需反映本次调用后的页面，在Agent继续操作浏览器前获取，上传在后台进行
+                    screenshot = await self._browser.screenshot()
+                    return lambda: self._upload_browser_screenshot(screenshot)
                 # 处理搜索工具事件 - 提取搜索结果
                 elif event.tool_name == "search":
                     search_results: ToolResult[SearchResults] = event.function_result
@@ -264,26 +399,19 @@ class AgentTaskRunner(TaskRunner):
                 # 处理Shell工具事件 - 读取Shell命令输出
                 elif event.tool_name == "shell":
                     if "session_id" in event.function_args:
-                        # 如果提供了session_id参数，读取对应会话的shell输出
-                        shell_result = await self._sandbox.read_shell_output(
-                            session_id=event.function_args["session_id"],
-                            console=True
-                        )
-                        event.tool_content = ShellToolContent(console=shell_result.data.get("console_records", []))
+                        # 如果提供了session_id参数，在后台读取对应会话的shell输出
+                        shell_session_id = event.function_args["session_id"]
+                        return lambda: self._read_shell_console(shell_session_id)
                     else:
                         # 如果没有session_id参数，设置默认值
                         event.tool_content = ShellToolContent(console="(No console)")
-                # 处理文件工具事件 - 读取文件内容并同步到存储
+                # 处理文件工具事件 - 读取文件内容，并记录待同步到存储的文件
                 elif event.tool_name == "file":
                     if "filepath" in event.function_args:
-                        # 从函数参数中获取文件路径
+                        # 从函数参数中获取文件路径，在后台读取文件内容，文件在步骤结束时统一同步到存储
                         filepath = event.function_args["filepath"]
-                        # 从沙箱中读取文件内容
-                        file_read_result = await self._sandbox.read_file(filepath)
-                        file_content: str = (file_read_result.data or {}).get("content", "")
-                        event.tool_content = FileToolContent(content=file_content)
-                        # 将文件同步到沙存储
-                        await self._sync_file_to_storage(filepath=filepath)
+                        self._pending_sync_filepaths.add(filepath)
+                        return lambda: self._read_file_content(filepath)
                     else:
                         # 如果没有提供文件路径参数，设置默认内容
                         event.tool_content = FileToolContent(content="(No Content)")
@@ -323,8 +451,107 @@ class AgentTaskRunner(TaskRunner):
         except Exception as e:
             # 记录处理工具事件时发生的异常
             logger.exception(f"处理工具事件失败: {e}")
+        return None
+
+    def _schedule_tool_enrichment(self, task: Task, event: ToolEvent) -> None:
+        """事件发送后启动对应的后台补充任务，并发数由信号量限制，不阻塞Agent循环"""
+        enrichment = self._pending_enrichments.pop(event.tool_call_id, None)
+        if enrichment is None:
+            return
+        enrichment_task = asyncio.create_task(self._enrich_tool_event(task, event, enrichment))
+        self._enrichment_tasks.add(enrichment_task)
+        enrichment_task.add_done_callback(self._enrichment_tasks.discard)
 
-    async def _run_flow(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+    async def _enrich_tool_event(
+            self,
+            task: Task,
+            event: ToolEvent,
+            enrichment: Callable[[], Awaitable[ToolContent]],
+    ) -> None:
+        """执行工具事件的补充函数，并发送携带扩展内容的工具更新事件"""
+        async with self._enrichment_semaphore:
+            try:
+                tool_content = await enrichment()
+                updated_event = ToolEvent(
+                    tool_call_id=event.tool_call_id,
+                    tool_name=event.tool_name,
+                    function_name=event.function_name,
+                    function_args=event.function_args,
+                    tool_content=tool_content,
+                    status=ToolEventStatus.UPDATED,
+                )
+                await self._externalize_tool_payload(updated_event)
+                await self._put_and_add_event(task, updated_event)
+            except Exception as e:
+                logger.exception(f"补充工具事件[{event.function_name}]扩展内容失败: {e}")
+
+    async def _wait_tool_enrichments(self) -> None:
+        """等待进行中的补充与文件同步任务完成，保证等待/完成事件之前已发送全部工具更新事件"""
+        tasks = self._enrichment_tasks | self._file_sync_tasks
+        if tasks:
+            await asyncio.wait(tasks, timeout=self._enrichment_wait_timeout)
+
+    def _cancel_tool_enrichments(self) -> None:
+        """取消尚未完成的补充任务，文件同步任务不取消，避免超时后大文件的同步被静默丢弃"""
+        for enrichment_task in self._enrichment_tasks:
+            enrichment_task.cancel()
+        self._pending_enrichments.clear()
+
+    async def _externalize_tool_payload(self, event: ToolEvent) -> None:
+        """
+        工具事件载荷(扩展内容与调用结果)超过阈值时，按内容哈希存储一次，事件只保留引用与摘要
+        避免页面、文件、搜索等大块内容重复写入输出流与会话事件，前端展开工具卡片时再按引用读取
+        """
+        if (
+                self._event_payload_store is None
+                or self._event_payload_chars <= 0
+                or event.status == ToolEventStatus.CALLING
+        ):
+            return
+
+        payload = event.model_dump_json(include={"tool_content", "function_result"})
+        if len(payload) <= self._event_payload_chars:
+            return
+
+        try:
+            payload_ref = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            if payload_ref not in self._stored_payload_refs:
+                await self._event_payload_store.put(payload_ref, payload)
+                self._stored_payload_refs.add(payload_ref)
+        except Exception as e:
+            logger.warning(f"外部化工具事件载荷失败, 保留完整载荷: {e}")
+            return
+
+        # 重新赋值而非修改原结果对象，Agent仍使用完整的工具结果构建工具消息
+        result = event.function_result
+        event.payload_ref = payload_ref
+        event.payload_size = len(payload)
+        event.payload_summary = ((result.message if result else None) or payload)[:200]
+        event.tool_content = None
+        event.function_result = ToolResult(success=result.success) if result else None
+
+    def _encode_plan_event(self, event: PlanEvent) -> None:
+        """
+        对计划事件进行增量编码：计划创建或缺少基准(如任务在其他节点恢复)时保留完整快照，
+        否则只保留相对上一版本的变更操作，避免每次更新都在事件流与会话事件中写入完整计划
+        """
+        plan = event.plan
+        if plan is None:
+            return
+
+        self._plan_version += 1
+        event.version = self._plan_version
+        if (
+                event.status != PlanEventStatus.CREATED
+                and self._plan_snapshot is not None
+                and self._plan_snapshot.id == plan.id
+        ):
+            event.base_version = self._plan_version - 1
+            event.operations = self._plan_snapshot.diff(plan)
+            event.plan = None
+        self._plan_snapshot = plan.model_copy(deep=True)
+
+    async def _run_flow(self, task: Task, message: Message) -> AsyncGenerator[BaseEvent, None]:
         # 检查消息是否为空，如果为空则记录警告并返回错误事件
         if not message.message:
             logger.warning(f"接收了一条空消息")
@@ -335,14 +562,59 @@ class AgentTaskRunner(TaskRunner):
         async for event in self._flow.invoke(message):
             # 处理工具事件，根据工具类型进行相应的内容填充
             if isinstance(event, ToolEvent):
-                await self._handle_tool_event(event)
+                enrichment = await self._handle_tool_event(event)
+                if enrichment:
+                    self._pending_enrichments[event.tool_call_id] = enrichment
+                await self._externalize_tool_payload(event)
             # 处理消息事件，同步附件到存储
             elif isinstance(event, MessageEvent):
-                await self._sync_message_attachments_to_storage(event)
+                await self._sync_message_attachments_to_storage(task, event)
+            # 计划事件增量编码
+            elif isinstance(event, PlanEvent):
+                self._encode_plan_event(event)
 
             # 产出事件
             yield event
 
+    @classmethod
+    def _is_checkpoint(cls, event: BaseEvent) -> bool:
+        """
+        判断事件是否为检查点：计划创建/更新后持久化的计划，或步骤执行结束(成功或失败)后持久化的步骤结果
+        恢复时会话的最新计划会合并之后的步骤结果，已结束的步骤不会重复执行
+        """
+        if isinstance(event, PlanEvent):
+            return event.status in [PlanEventStatus.CREATED, PlanEventStatus.UPDATED]
+        if isinstance(event, StepEvent):
+            return event.status in [StepEventStatus.COMPLETED, StepEventStatus.FAILED]
+        return False
+
+    async def _get_resume_message(self, task: Task) -> Optional[Message]:
+        """
+        接管其他节点移交的任务时输入流中没有新消息，使用会话最新的用户消息从最近的检查点继续执行
+        用户消息的附件已同步到复用的沙箱中，直接使用会话文件中记录的沙箱路径
+        """
+        if not await task.input_stream.is_empty():
+            return None
+
+        uow = self._uow_factory()
+        async with uow:
+            session = await uow.session.get_by_id(self._session_id)
+        if not session or session.status != SessionStatus.HANDOFF:
+            return None
+
+        user_message = session.get_latest_user_message()
+        if not user_message:
+            logger.warning(f"移交的会话{self._session_id}中不存在用户消息, 无法恢复")
+            return None
+
+        files = {file.id: file for file in session.files}
+        return Message(
+            message=user_message.message,
+            attachments=[
+                files[attachment.id].filepath for attachment in user_message.attachments if attachment.id in files
+            ],
+        )
+
     async def _cleanup_tools(self) -> None:
         """清理MCP和A2A工具资源，确保在同一任务上下文中释放
 
@@ -370,34 +642,63 @@ class AgentTaskRunner(TaskRunner):
             await self._mcp_tool.initialize(self._mcp_config)
             await self._a2a_tool.initialize(self._a2a_config)
 
-            # 循环处理输入流中的事件，直到输入流为空
-            while not await task.input_stream.is_empty():
-                # 从输入流中取出事件
-                event = await self._pop_event(task)
+            # 接管移交的任务时先从最近的检查点继续执行
+            resume_message = await self._get_resume_message(task)
+            if resume_message:
+                logger.info(f"恢复移交的任务: {task.id}, 会话: {self._session_id}")
 
-                # 初始化消息变量
-                message = ""
-
-                # 如果事件是消息事件，处理消息内容和附件
-                if isinstance(event, MessageEvent):
-                    message = event.message or ""
-
-                    # 同步消息附件到沙箱环境
-                    await self._sync_message_attachments_to_sandbox(event)
-
-                    # 记录接收到的消息日志
-                    logger.info(f"收到消息: {message[:50]}...")
-
-                # 创建消息对象，包含消息内容和附件路径列表
-                message_obj = Message(
-                    message=message,
-                    attachments=[attachment.filepath for attachment in event.attachments]
-                )
+            # 循环处理输入流中的事件，直到输入流为空
+            while resume_message or not await task.input_stream.is_empty():
+                if resume_message:
+                    message_obj, resume_message = resume_message, None
+                else:
+                    # 从输入流中取出事件
+                    event = await self._pop_event(task)
+
+                    # 初始化消息变量
+                    message = ""
+
+                    # 如果事件是消息事件，处理消息内容和附件
+                    if isinstance(event, MessageEvent):
+                        message = event.message or ""
+
+                        # 同步消息附件到沙箱环境
+                        await self._sync_message_attachments_to_sandbox(task, event)
+
+                        # 记录接收到的消息日志
+                        logger.info(f"收到消息: {message[:50]}...")
+
+                    # 创建消息对象，包含消息内容和附件路径列表
+                    message_obj = Message(
+                        message=message,
+                        attachments=[attachment.filepath for attachment in event.attachments]
+                    )
 
                 # 运行流程并处理每个产生的事件
-                async for event in self._run_flow(message_obj):
-                    # 将事件添加到输出流和会话存储
-                    await self._put_and_add_event(task, event)
+                async for event in self._run_flow(task, message_obj):
+                    # 消息增量与计划草稿事件仅用于实时展示，只写入输出流不持久化到会话存储
+                    if isinstance(event, (MessageDeltaEvent, PlanDraftEvent)):
+                        await self._put_event(task, event)
+                    else:
+                        # 等待/完成前先同步待同步的文件并发送全部工具更新事件
+                        if isinstance(event, (WaitEvent, DoneEvent)):
+                            self._schedule_file_sync()
+                            await self._wait_tool_enrichments()
+                        # 将事件添加到输出流和会话存储
+                        await self._put_and_add_event(task, event)
+
+                    # 工具事件发送后在后台补充扩展内容
+                    if isinstance(event, ToolEvent):
+                        self._schedule_tool_enrichment(task, event)
+                    # 步骤结束时在后台同步步骤内涉及的文件
+                    elif isinstance(event, StepEvent) and event.status != StepEventStatus.STARTED:
+                        self._schedule_file_sync()
+
+                    # 排空模式下到达检查点后停止执行，剩余步骤由接管节点继续
+                    if self._draining and self._is_checkpoint(event):
+                        logger.info(f"任务[{task.id}]到达检查点, 停止执行等待移交")
+                        self._interrupted = True
+                        return
 
                     # 根据事件类型更新会话状态或信息
                     if isinstance(event, TitleEvent):
@@ -413,8 +714,12 @@ class AgentTaskRunner(TaskRunner):
                                 timestamp=event.created_at,
                             )
                             await self._uow.session.increment_unread_message_count(session_id=self._session_id)
+                    elif isinstance(event, DoneEvent):
+                        # 流程完成时写入各Agent的记忆
+                        await self._flow.flush_memories()
                     elif isinstance(event, WaitEvent):
-                        # 如果是等待事件，将会话状态设置为等待并返回
+                        # 如果是等待事件，写入各Agent的记忆后将会话状态设置为等待并返回
+                        await self._flow.flush_memories()
                         async with self._uow:
                             await self._uow.session.update_status(
                                 session_id=self._session_id,
@@ -430,6 +735,12 @@ class AgentTaskRunner(TaskRunner):
             async with self._uow:
                 await self._uow.session.update_status(session_id=self._session_id, status=SessionStatus.COMPLETED)
         except asyncio.CancelledError:
+            # 排空模式下被中断的任务保持会话状态，由接管节点从最近的检查点恢复
+            if self._draining:
+                logger.info(f"AgentTaskRunner任务在排空模式下被中断, 等待移交")
+                self._interrupted = True
+                raise
+
             # 处理任务被取消的情况
             logger.info(f"AgentTaskRunner任务运行取消")
             await self._put_and_add_event(task=task, event=DoneEvent())
@@ -444,6 +755,22 @@ class AgentTaskRunner(TaskRunner):
             async with self._uow:
                 await self._uow.session.update_status(session_id=self._session_id, status=SessionStatus.COMPLETED)
         finally:
+            self._cancel_tool_enrichments()
+
+            # 等待后台文件同步完成，再同步尚未同步或同步失败的文件
+            try:
+                await asyncio.gather(*self._file_sync_tasks, return_exceptions=True)
+                await self._sync_pending_files(sorted(self._pending_sync_filepaths))
+                self._pending_sync_filepaths.clear()
+            except Exception as e:
+                logger.warning(f"同步待同步文件失败: {e}")
+
+            # 任务结束、取消或因排空中断时写入各Agent尚未写入的记忆，接管节点从存储中恢复记忆
+            try:
+                await self._flow.flush_memories()
+            except Exception as e:
+                logger.warning(f"写入Agent记忆失败: {e}")
+
             # 在同一个asyncio Task上下文中清理MCP/A2A工具资源
             # 这是关键：streamablehttp_client内部使用anyio.create_task_group()，
             # 要求在同一个Task中进入和退出cancel scope，
@@ -461,3 +788,20 @@ class AgentTaskRunner(TaskRunner):
 
     async def on_done(self, task: Task) -> None:
         logger.info(f"任务完成: {task.id}")
+
+    def drain(self) -> None:
+        logger.info(f"AgentTaskRunner进入排空模式, 会话: {self._session_id}")
+        self._draining = True
+
+    async def handoff(self, task: Task) -> Optional[str]:
+        # 未被中断的任务已正常结束，无需移交
+        if not self._interrupted:
+            return None
+
+        # 将会话置为移交状态(区别于等待用户回复)，接管节点恢复时将从最新计划的下一个步骤继续执行
+        uow = self._uow_factory()
+        async with uow:
+            await uow.session.update_status(session_id=self._session_id, status=SessionStatus.HANDOFF)
+
+        logger.info(f"AgentTaskRunner移交任务: {task.id}, 会话: {self._session_id}, 保留沙箱: {self._sandbox.id}")
+        return self._session_id
@@ -6,12 +6,15 @@
 @File   : base.py
 """
 import asyncio
+import json
 import logging
+import time
 import uuid
 from abc import ABC
-from typing import Optional, List, AsyncGenerator, Dict, Any, Callable
+from contextlib import aclosing
+from typing import Optional, List, AsyncGenerator, Dict, Any, Callable, Union, Tuple
 
-from app.domain.external import LLM, JSONParser
+from app.domain.external import LLM, JSONParser, BlobStore, llm_call_context
 from app.domain.models import (
     AgentConfig,
     Event,
@@ -21,10 +24,13 @@ from app.domain.models import (
     ErrorEvent,
     Message,
     MessageEvent,
+    MessageDeltaEvent,
     Memory,
 )
 from app.domain.repositories import IUnitOfWork
-from app.domain.services.tools import BaseTool
+from app.domain.services.context import build_context_manager
+from app.domain.services.tools import BaseTool, ToolResultCache, tool_output_key
+from app.domain.services.tools.base import ToolSpec
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +42,7 @@ class BaseAgent(ABC):
     _format: Optional[str] = None  # 输出格式
     _retry_interval: float = 1.0  # 重试间隔
     _tool_choice: Optional[str] = None  # 工具选择策略
+    _delta_flush_interval: float = 0.1  # 流式输出时合并增量事件的时间间隔(秒)
 
     def __init__(self,
                  session_id: str,
@@ -43,47 +50,211 @@ class BaseAgent(ABC):
                  agent_config: AgentConfig,
                  llm: LLM,
                  json_parser: JSONParser,
-                 tools: List[BaseTool]) -> None:
+                 tools: List[BaseTool],
+                 name: Optional[str] = None,
+                 summarizer_llm: Optional[LLM] = None,
+                 blob_store: Optional[BlobStore] = None,
+                 tool_cache: Optional[ToolResultCache] = None) -> None:
         """
         :param agent_config: 智能体配置信息
         :param llm: 大语言模型实例
         :param json_parser: JSON解析器实例
         :param tools: 工具列表
+        :param name: 智能体名称，为空时使用类上声明的名称，同一会话中名称不同的智能体使用各自独立的记忆
+        :param summarizer_llm: 用于总结(含上下文压缩)的大语言模型，为空时使用llm
+        :param blob_store: 过长工具结果的转存存储，为空时工具结果完整写入记忆
+        :param tool_cache: 会话级只读工具结果缓存，为空时不缓存
         """
+        if name:
+            self.name = name
         self._session_id = session_id
         self._uow_factory = uow_factory
         self._uow = uow_factory()
         self._agent_config = agent_config
         self._llm = llm
+        self._summarizer_llm = summarizer_llm or llm
+        self._blob_store = blob_store
+        self._tool_cache = tool_cache
         self._memory: Optional[Memory] = None
+        self._memory_dirty = False  # 记忆是否有尚未写入存储的变更
+        self._memory_flush_task: Optional[asyncio.Task] = None  # 延迟写入记忆的定时任务
+        self._memory_flush_lock = asyncio.Lock()  # 保证记忆按变更顺序写入
         self._json_parser = json_parser
         self._tools = tools
+        self._tool_index: Dict[str, BaseTool] = {}  # 工具名称->工具集合索引
+        self._available_tools: List[Dict[str, Any]] = []  # 所有工具集合的工具声明
+        self._tool_versions: Optional[tuple] = None  # 构建索引时各工具集合的版本号
+        self._step_id: Optional[str] = None  # 当前处理的计划步骤id，用于模型调用遥测按步骤汇总
+        self._context_manager = build_context_manager(
+            llm=llm,
+            strategy_type=agent_config.context_strategy,
+            summarizer_llm=self._summarizer_llm,
+        )
 
     async def _ensure_memory(self) -> None:
         if self._memory is None:
             async with self._uow:
                 self._memory = await self._uow.session.get_memory(self._session_id, self.name)
 
-    def _get_available_tools(self) -> List[Dict[str, Any]]:
-        """获取可用的工具列表"""
-        available_tools = []
+    async def _save_memory(self) -> None:
+        """
+        标记记忆已变更，在刷新间隔后统一写入存储，间隔内的多次变更只写入一次
+        步骤结束、等待用户、任务完成与取消时由流程调用flush_memory立即写入，异常退出最多丢失一个刷新间隔内的变更
+        """
+        self._memory_dirty = True
+        interval = self._agent_config.memory_flush_interval
+        if interval <= 0:
+            await self.flush_memory()
+        elif self._memory_flush_task is None or self._memory_flush_task.done():
+            self._memory_flush_task = asyncio.create_task(self._flush_memory_later(interval))
+
+    async def _flush_memory_later(self, interval: float) -> None:
+        """等待刷新间隔后写入记忆"""
+        await asyncio.sleep(interval)
+        try:
+            await self.flush_memory()
+        except Exception as e:
+            logger.warning(f"定时写入{self.name} Agent记忆失败: {e}")
+
+    async def flush_memory(self) -> None:
+        """将尚未写入的记忆变更立即写入存储"""
+        async with self._memory_flush_lock:
+            if not self._memory_dirty or self._memory is None:
+                return
+            # 先清除标记，写入期间产生的新变更会重新标记并在下次写入
+            self._memory_dirty = False
+            # 定时任务与Agent主流程并发执行，使用独立的UoW
+            uow = self._uow_factory()
+            try:
+                async with uow:
+                    await uow.session.save_memory(self._session_id, self.name, self._memory)
+            except BaseException:
+                self._memory_dirty = True
+                raise
+
+    def _ensure_tool_index(self) -> None:
+        """工具集合版本发生变化(如MCP/A2A初始化完成)时，重建工具名称索引与工具声明列表"""
+        versions = tuple(tool.version for tool in self._tools)
+        if versions == self._tool_versions:
+            return
+
+        tool_index: Dict[str, BaseTool] = {}
+        available_tools: List[Dict[str, Any]] = []
         for tool in self._tools:
+            for tool_schema in tool.get_tools():
+                # 工具重名时保持与列表顺序一致，优先使用靠前的工具集合
+                tool_index.setdefault(tool_schema["function"]["name"], tool)
             available_tools.extend(tool.get_tools())
-        return available_tools
+
+        self._tool_index = tool_index
+        self._available_tools = available_tools
+        self._tool_versions = versions
+
+    def _get_available_tools(self) -> List[Dict[str, Any]]:
+        """获取可用的工具列表"""
+        self._ensure_tool_index()
+        return self._available_tools
 
     def _get_tool(self, tool_name: str) -> BaseTool:
+        """根据工具名称获取对应的工具集合"""
+        self._ensure_tool_index()
+        tool = self._tool_index.get(tool_name)
+        if tool is None:
+            raise ValueError(f"无效工具: {tool_name}")
+        return tool
 
-        for tool in self._tools:
-            if tool.has_tool(tool_name):
-                return tool
-        raise ValueError(f"无效工具: {tool_name}")
+    def _build_delta_event(self, stream_id: str, content: List[str], reasoning_content: List[str],
+                           format: str, done: bool = False) -> MessageDeltaEvent:
+        """将累积的增量内容构建为消息增量事件"""
+        return MessageDeltaEvent(
+            stream_id=stream_id,
+            agent=self.name,
+            content="".join(content),
+            reasoning_content="".join(reasoning_content),
+            format=format,
+            done=done,
+        )
 
-    async def _invoke_llm(self, messages: List[Dict[str, Any]], format: Optional[str] = None) -> Dict[str, Any]:
+    async def _call_llm(
+            self,
+            response_format: Optional[Dict[str, Any]] = None,
+            llm: Optional[LLM] = None,
+    ) -> AsyncGenerator[Union[MessageDeltaEvent, Dict[str, Any]], None]:
+        """
+        使用记忆中的消息调用大语言模型
+        流式模式下先产出增量事件，最后产出模型返回的完整消息
+        :param llm: 本次调用使用的大语言模型，为空时使用智能体默认的模型
+        """
+        llm = llm or self._llm
+        # 设置本次调用的上下文，供缓存、遥测等LLM包装器识别调用方
+        llm_call_context.set({"session_id": self._session_id, "agent": self.name, "step_id": self._step_id})
+
+        # 上下文超出本次调用所用模型的token预算时裁剪记忆，并保存裁剪后的记忆
+        tools = self._get_available_tools()
+        if await self._context_manager.fit(self._memory, tools, budget=llm.context_budget):
+            await self._save_memory()
+
+        kwargs = {
+            "messages": self._memory.get_messages(),
+            "tools": tools,
+            "response_format": response_format,
+            "tool_choice": self._tool_choice,
+        }
+
+        # 未开启流式输出时直接返回完整消息
+        if not llm.streaming:
+            yield await llm.invoke(**kwargs)
+            return
+
+        # 同一次调用的增量共享流id，重试时使用新的流id，便于前端丢弃未完成的内容
+        stream_id = str(uuid.uuid4())
+        # 结构化输出时增量为原始json片段，标记格式供前端区分
+        delta_format = response_format.get("type", "text") if response_format else "text"
+        content: List[str] = []
+        reasoning_content: List[str] = []
+        last_flush_at = time.monotonic()
+        message: Optional[Dict[str, Any]] = None
+        try:
+            # 收到完整消息后立即关闭模型的流，使租约释放、遥测记录与HTTP连接关闭在返回消息前、
+            # 当前调用上下文中完成，而不是等到事件循环回收生成器时才执行
+            async with aclosing(llm.stream(**kwargs)) as stream:
+                async for chunk in stream:
+                    if chunk.get("type") == "message":
+                        message = chunk["message"]
+                        break
+
+                    content.append(chunk.get("content") or "")
+                    reasoning_content.append(chunk.get("reasoning_content") or "")
+
+                    # 按时间间隔合并增量，避免每个token都写入一次输出流
+                    if time.monotonic() - last_flush_at >= self._delta_flush_interval:
+                        yield self._build_delta_event(stream_id, content, reasoning_content, delta_format)
+                        content, reasoning_content = [], []
+                        last_flush_at = time.monotonic()
+
+            if message is None:
+                raise RuntimeError("模型流式输出未返回完整消息")
+        except Exception:
+            # 调用中途失败时同样标记本次流结束，前端据此结束该流的展示
+            yield self._build_delta_event(stream_id, content, reasoning_content, delta_format, done=True)
+            raise
+
+        # 发送剩余的增量内容并标记本次调用结束
+        yield self._build_delta_event(stream_id, content, reasoning_content, delta_format, done=True)
+        yield message
+
+    async def _invoke_llm(
+            self,
+            messages: List[Dict[str, Any]],
+            format: Optional[str] = None,
+            llm: Optional[LLM] = None,
+    ) -> AsyncGenerator[Union[MessageDeltaEvent, Dict[str, Any]], None]:
         """
         调用大语言模型
         :param messages: 消息列表
         :param format: 输出格式
-        :return: 模型响应结果
+        :param llm: 本次调用使用的大语言模型，为空时使用智能体默认的模型
+        :return: 流式模式下的消息增量事件，最后一条为模型响应结果
         """
         # 将输入消息添加到记忆存储中
         await self._add_to_memery(messages)
@@ -91,65 +262,135 @@ class BaseAgent(ABC):
         # 构造响应格式参数
         response_format = {"type": format} if format else None
 
-        # 最多重试max_retries次
+        # 模型返回空结果时最多重试max_retries次，调用异常由模型客户端的端点池负责重试，这里直接抛出
         for _ in range(self._agent_config.max_retries):
-            try:
-                # 调用大语言模型
-                message = await self._llm.invoke(
-                    messages=self._memory.get_messages(),
-                    tools=self._get_available_tools(),
-                    response_format=response_format,
-                    tool_choice=self._tool_choice,
-                )
-
-                # 如果模型返回的是assistant角色的消息
-                if message.get("role") == "assistant":
-                    # 如果既没有内容也没有工具调用，则记录警告并重试
-                    if not message.get("content") and not message.get("tool_calls"):
-                        logger.warning("LLM返回空结果, 重试")
-                        # 添加空响应和提示消息到记忆存储中
-                        await self._add_to_memery([
-                            {"role": "assistant", "content": ""},
-                            {"role": "user", "content": "AI无响应内容,请继续。"}
-                        ])
-                        # 等待重试间隔后继续重试
-                        await asyncio.sleep(self._retry_interval)
-                        continue
-
-                    # 过滤消息内容，只保留必要信息
-                    filtered_message = {"role": "assistant", "content": message.get("content")}
-                    # 兼容Deepseek思考模型写法
-                    if message.get("reasoning_content"):
-                        filtered_message["reasoning_content"] = message.get("reasoning_content")
-                    # 如果存在工具调用，只保留第一个工具调用
-                    if message.get("tool_calls"):
-                        filtered_message["tool_calls"] = message["tool_calls"][:1]
+            # 调用大语言模型，透传流式增量事件
+            message = None
+            async for item in self._call_llm(response_format, llm):
+                if isinstance(item, MessageDeltaEvent):
+                    yield item
                 else:
-                    # 如果不是assistant角色的消息，记录警告并直接使用原消息
-                    logger.warning(f"LLM返回非assistant消息: {message.get('role')}")
-                    filtered_message = message
+                    message = item
 
-                # 将过滤后的消息添加到记忆存储中
-                await self._add_to_memery([filtered_message])
-                return filtered_message
-            except Exception as e:
-                # 捕获异常，记录错误日志并等待重试间隔后继续重试
-                logger.error(f"调用大语言模型失败: {e}")
-                await asyncio.sleep(self._retry_interval)
-                continue
+            # 如果模型返回的是assistant角色的消息
+            if message.get("role") == "assistant":
+                # 如果既没有内容也没有工具调用，则记录警告并重试
+                if not message.get("content") and not message.get("tool_calls"):
+                    logger.warning("LLM返回空结果, 重试")
+                    # 添加空响应和提示消息到记忆存储中
+                    await self._add_to_memery([
+                        {"role": "assistant", "content": ""},
+                        {"role": "user", "content": "AI无响应内容,请继续。"}
+                    ])
+                    # 等待重试间隔后继续重试
+                    await asyncio.sleep(self._retry_interval)
+                    continue
+
+                # 过滤消息内容，只保留必要信息
+                filtered_message = {"role": "assistant", "content": message.get("content")}
+                # 兼容Deepseek思考模型写法
+                if message.get("reasoning_content"):
+                    filtered_message["reasoning_content"] = message.get("reasoning_content")
+                # 如果存在工具调用，默认只保留第一个工具调用，开启并行工具调用且全部为只读工具时保留全部
+                if message.get("tool_calls"):
+                    filtered_message["tool_calls"] = self._filter_tool_calls(message["tool_calls"], llm or self._llm)
+            else:
+                # 如果不是assistant角色的消息，记录警告并直接使用原消息
+                logger.warning(f"LLM返回非assistant消息: {message.get('role')}")
+                filtered_message = message
+
+            # 将过滤后的消息添加到记忆存储中
+            await self._add_to_memery([filtered_message])
+            yield filtered_message
+            return
+
+        raise RuntimeError(f"LLM连续{self._agent_config.max_retries}次返回空结果")
+
+    def _filter_tool_calls(self, tool_calls: List[Dict[str, Any]], llm: LLM) -> List[Dict[str, Any]]:
+        """
+        过滤模型返回的工具调用
+        仅当开启并行工具调用且所有调用都是只读工具时保留全部调用，否则只保留第一个，保证有副作用的工具按顺序执行
+        :param llm: 本次调用实际使用的大语言模型，按角色路由时其并行工具调用配置可能与默认模型不同
+        """
+        if len(tool_calls) <= 1 or not llm.parallel_tool_calls:
+            return tool_calls[:1]
+
+        for tool_call in tool_calls:
+            function_name = (tool_call.get("function") or {}).get("name")
+            try:
+                if not self._get_tool(function_name).is_parallel_safe(function_name):
+                    return tool_calls[:1]
+            except ValueError:
+                return tool_calls[:1]
+        return tool_calls
+
+    async def _invoke_tools_concurrently(
+            self,
+            calls: List[Tuple[str, BaseTool, str, Dict[str, Any]]],
+    ) -> AsyncGenerator[Tuple[int, ToolResult], None]:
+        """
+        以有限并发执行多个只读工具调用，按完成顺序产出(调用下标, 结果)
+        :param calls: (工具调用id, 工具集合, 函数名称, 函数参数)列表
+        """
+        semaphore = asyncio.Semaphore(self._agent_config.max_parallel_tool_calls)
+
+        async def run(index: int, tool: BaseTool, function_name: str, function_args: Dict[str, Any]):
+            async with semaphore:
+                return index, await self._invoke_tool(tool, function_name, function_args)
+
+        tasks = [
+            asyncio.create_task(run(index, tool, function_name, function_args))
+            for index, (_, tool, function_name, function_args) in enumerate(calls)
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            # 生成器提前结束(如任务被取消)时取消尚未完成的工具调用
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _invalidate_tool_cache(self, tool: BaseTool, tool_name: str, spec: Optional[ToolSpec],
+                               arguments: Dict[str, Any]) -> None:
+        """
+        工具调用后失效受影响的缓存结果，声明了元信息的工具按其失效规则处理
+        动态注册的工具(如MCP工具)无法声明失效规则，非只读时可能修改沙箱文件，失效全部文件与目录结果
+        """
+        if not self._tool_cache:
+            return
+        if spec is not None:
+            self._tool_cache.invalidate(spec, arguments)
+        elif not tool.is_parallel_safe(tool_name):
+            self._tool_cache.invalidate_scopes(ToolResultCache.FILE_SCOPES)
 
     async def _invoke_tool(self, tool: BaseTool, tool_name: str, arguments: Dict[str, Any]) -> ToolResult:
+        # 可缓存的只读工具优先使用会话内缓存的结果，避免重复访问沙箱或网络
+        spec = tool.get_spec(tool_name)
+        generation = 0
+        if self._tool_cache and spec is not None:
+            cached_result = self._tool_cache.get(spec, tool_name, arguments)
+            if cached_result is not None:
+                return cached_result
+            generation = self._tool_cache.generation
+
         # 初始化错误信息为空字符串
         err = ""
         # 根据最大重试次数进行循环重试
         for _ in range(self._agent_config.max_retries):
             try:
                 # 尝试调用工具的invoke方法并返回结果
-                return await tool.invoke(tool_name, **arguments)
+                result = await tool.invoke(tool_name, **arguments)
+                self._invalidate_tool_cache(tool, tool_name, spec, arguments)
+                if self._tool_cache and spec is not None:
+                    self._tool_cache.put(spec, tool_name, arguments, result, generation)
+                return result
             except Exception as e:
                 # 捕获异常，记录错误日志，并保存错误信息
                 err = str(e)
                 logger.error(f"调用工具失败: {e}")
+                # 执行失败的写操作也可能已产生部分影响，同样失效相关缓存
+                self._invalidate_tool_cache(tool, tool_name, spec, arguments)
                 # 等待重试间隔后继续重试
                 await asyncio.sleep(self._retry_interval)
                 continue
@@ -160,6 +401,40 @@ class BaseAgent(ABC):
             message=err,
         )
 
+    async def _build_tool_message(self, tool_call_id: str, function_name: str, result: ToolResult) -> Dict[str, Any]:
+        """
+        构建工具消息，结果超过转存阈值时将完整结果写入内容存储，记忆中只保留预览与读取句柄
+        避免过长的页面、文件或命令输出在后续每次迭代中重复发送给模型并重复持久化
+        """
+        content = result.model_dump_json()
+        spill_chars = self._agent_config.tool_output_spill_chars
+        if (
+                self._blob_store is not None
+                and 0 < spill_chars < len(content)
+                and function_name != "read_tool_output"
+        ):
+            try:
+                await self._blob_store.put(tool_output_key(self._session_id, tool_call_id), content)
+                content = json.dumps({
+                    "success": result.success,
+                    "message": result.message,
+                    "truncated": True,
+                    "handle": tool_call_id,
+                    "total_chars": len(content),
+                    "preview": content[:self._agent_config.tool_output_preview_chars],
+                    "hint": "结果过长仅保留预览，如需完整内容请使用read_tool_output工具并传入handle分页读取",
+                }, ensure_ascii=False)
+            except Exception as e:
+                # 转存失败时退化为写入完整结果，不影响任务执行
+                logger.warning(f"转存工具结果[{function_name}]失败, 写入完整结果: {e}")
+
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "function_name": function_name,
+            "content": content,
+        }
+
     async def _add_to_memery(self, messages: List[Dict[str, Any]]) -> None:
         """
         将消息添加到记忆存储中
@@ -176,14 +451,14 @@ class BaseAgent(ABC):
 
         # 将传入的消息列表添加到记忆存储中
         self._memory.add_messages(messages)
-        async with self._uow:
-            await self._uow.session.save_memory(self._session_id, self.name, self._memory)
+        await self._save_memory()
 
     async def compact_memory(self) -> None:
+        """压缩记忆，压缩发生在步骤结束时，因此立即写入存储"""
         await self._ensure_memory()
         self._memory.compact()
-        async with self._uow:
-            await self._uow.session.save_memory(self._session_id, self.name, self._memory)
+        self._memory_dirty = True
+        await self.flush_memory()
 
     async def roll_back(self, message: Message) -> None:
         """状态回滚，确保Agent消息列表状态是正确的，用于发送新消息、暂停/停止任务、通知用户"""
@@ -214,32 +489,38 @@ class BaseAgent(ABC):
         else:
             # 否则执行记忆存储回滚操作
             self._memory.roll_back()
-        async with self._uow:
-            await self._uow.session.save_memory(self._session_id, self.name, self._memory)
+        await self._save_memory()
 
-    async def invoke(self, query: str, format: Optional[str] = None) -> AsyncGenerator[Event, None]:
+    async def invoke(
+            self,
+            query: str,
+            format: Optional[str] = None,
+            llm: Optional[LLM] = None,
+    ) -> AsyncGenerator[Event, None]:
         """
         调用智能体
         :param query: 查询内容
         :param format: 输出格式
+        :param llm: 本次调用使用的大语言模型，为空时使用智能体默认的模型
         :return: 智能体事件生成器
         """
         # 设置输出格式，如果未指定则使用默认格式
         format = format if format else self._format
-        # 调用大语言模型处理用户查询
-        message = await self._invoke_llm(
-            [{"role": "user", "content": query}, ],
-            format,
-        )
+        # 调用大语言模型处理用户查询，流式模式下实时产出增量事件
+        message = None
+        async for item in self._invoke_llm([{"role": "user", "content": query}, ], format, llm):
+            if isinstance(item, MessageDeltaEvent):
+                yield item
+            else:
+                message = item
         # 根据最大迭代次数进行循环处理
         for _ in range(self._agent_config.max_iterations):
             # 如果没有工具调用需求，则跳出循环
             if not message.get("tool_calls"):
                 break
 
-            # 存储工具调用相关消息
-            tool_messages = []
-            # 遍历所有工具调用
+            # 解析所有工具调用: (工具调用id, 工具集合, 函数名称, 函数参数)
+            calls: List[Tuple[str, BaseTool, str, Dict[str, Any]]] = []
             for tool_call in message["tool_calls"]:
                 # 如果工具调用没有函数信息，则跳过
                 if not tool_call.get("function"):
@@ -251,40 +532,70 @@ class BaseAgent(ABC):
                 function_name = tool_call["function"]["name"]
                 function_args = await self._json_parser.invoke(tool_call["function"]["arguments"])
 
-                # 根据函数名称获取对应工具
+                # 根据函数名称获取对应工具，并由工具调整参数(如为Shell会话id加上Agent专属前缀)
                 tool = self._get_tool(function_name)
+                function_args = tool.prepare_args(function_name, function_args)
+                calls.append((tool_call_id, tool, function_name, function_args))
+
+            # 工具执行结果，下标与calls一致
+            results: List[Optional[ToolResult]] = [None] * len(calls)
+            if len(calls) > 1:
+                # 多个只读工具调用：先发送全部调用事件，再并行执行，每个调用完成时发送完成事件
+                for tool_call_id, tool, function_name, function_args in calls:
+                    yield ToolEvent(
+                        tool_call_id=tool_call_id,
+                        tool_name=tool.name,
+                        function_name=function_name,
+                        function_args=function_args,
+                        status=ToolEventStatus.CALLING,
+                    )
+                async for index, result in self._invoke_tools_concurrently(calls):
+                    results[index] = result
+                    tool_call_id, tool, function_name, function_args = calls[index]
+                    yield ToolEvent(
+                        tool_call_id=tool_call_id,
+                        tool_name=tool.name,
+                        function_name=function_name,
+                        function_args=function_args,
+                        function_result=result,
+                        status=ToolEventStatus.CALLED,
+                    )
+            else:
+                for index, (tool_call_id, tool, function_name, function_args) in enumerate(calls):
+                    # 发送工具调用事件
+                    yield ToolEvent(
+                        tool_call_id=tool_call_id,
+                        tool_name=tool.name,
+                        function_name=function_name,
+                        function_args=function_args,
+                        status=ToolEventStatus.CALLING,
+                    )
 
-                # 发送工具调用事件
-                yield ToolEvent(
-                    tool_call_id=tool_call_id,
-                    tool_name=tool.name,
-                    function_name=function_name,
-                    function_args=function_args,
-                    status=ToolEventStatus.CALLING,
-                )
-
-                # 执行工具调用
-                result = await self._invoke_tool(tool, function_name, function_args)
-                # 发送工具调用完成事件
-                yield ToolEvent(
-                    tool_call_id=tool_call_id,
-                    tool_name=tool.name,
-                    function_name=function_name,
-                    function_args=function_args,
-                    function_result=result,
-                    status=ToolEventStatus.CALLED,
-                )
-
-                # 将工具执行结果添加到工具消息列表中
-                tool_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call_id,
-                    "function_name": function_name,
-                    "content": result.model_dump_json(),
-                })
+                    # 执行工具调用
+                    results[index] = await self._invoke_tool(tool, function_name, function_args)
+                    # 发送工具调用完成事件
+                    yield ToolEvent(
+                        tool_call_id=tool_call_id,
+                        tool_name=tool.name,
+                        function_name=function_name,
+                        function_args=function_args,
+                        function_result=results[index],
+                        status=ToolEventStatus.CALLED,
+                    )
+
+            # 按原始调用顺序将工具执行结果添加到工具消息列表中，过长的结果转存后只保留预览
+            tool_messages = [
+                await self._build_tool_message(tool_call_id, function_name, result)
+                for (tool_call_id, _, function_name, _), result in zip(calls, results)
+            ]
 
             # 使用工具执行结果再次调用大语言模型
-            message = await self._invoke_llm(tool_messages)
+            message = None
+            async for item in self._invoke_llm(tool_messages, llm=llm):
+                if isinstance(item, MessageDeltaEvent):
+                    yield item
+                else:
+                    message = item
         else:
             # 如果达到最大迭代次数仍未完成，则发送错误事件
             yield ErrorEvent(error=f"迭代次数超出限制:{self._agent_config.max_iterations},任务处理失败")
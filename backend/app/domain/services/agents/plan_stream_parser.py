@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 23:10
+@Author : caixiaorong01@outlook.com
+@File   : plan_stream_parser.py
+"""
+import json
+import logging
+from typing import List, Optional
+
+from app.domain.models import Step
+
+logger = logging.getLogger(__name__)
+
+
+class PlanStreamParser:
+    """
+    增量计划解析器，在规划模型流式输出json的过程中解析出已完整生成的步骤
+    只扫描新增的内容，记录字符串/转义/嵌套深度等状态，整个输出只扫描一遍
+    """
+
+    def __init__(self) -> None:
+        self._text = ""  # 已接收的全部内容
+        self._pos = 0  # 下一个待扫描字符的位置
+        self._in_string = False  # 当前是否位于字符串内
+        self._escaped = False  # 上一个字符是否为转义符
+        self._depth = 0  # 当前的对象/数组嵌套深度
+        self._string_start: Optional[int] = None  # 最近一个字符串的起始位置
+        self._last_string = ""  # 最近一个完整的字符串
+        self._current_key: Optional[str] = None  # 当前正在解析的值对应的键
+        self._steps_depth: Optional[int] = None  # steps数组所在的嵌套深度，为空表示尚未进入steps数组
+        self._steps_done = False  # steps数组是否已结束
+        self._step_start: Optional[int] = None  # 当前步骤对象的起始位置
+        self.steps: List[Step] = []  # 已解析出的步骤
+
+    def feed(self, content: str) -> List[Step]:
+        """
+        追加一段流式输出的内容
+        :param content: 内容增量
+        :return: 本次新解析出的步骤
+        """
+        if not content or self._steps_done:
+            return []
+        self._text += content
+
+        new_steps: List[Step] = []
+        text = self._text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                # 字符串内只需要处理转义与字符串结束
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:self._pos]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char == ":":
+                self._current_key = self._last_string
+            elif char == ",":
+                self._current_key = None
+            elif char in "{[":
+                # 进入顶层steps键对应的数组，或进入steps数组中的一个步骤对象
+                if char == "[" and self._steps_depth is None and self._depth == 1 and self._current_key == "steps":
+                    self._steps_depth = self._depth + 1
+                elif char == "{" and self._steps_depth is not None and self._depth == self._steps_depth:
+                    self._step_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._step_start is not None and self._depth == self._steps_depth:
+                    step = self._parse_step(text[self._step_start:self._pos + 1])
+                    self._step_start = None
+                    if step:
+                        self.steps.append(step)
+                        new_steps.append(step)
+                elif char == "]" and self._steps_depth is not None and self._depth == self._steps_depth - 1:
+                    self._steps_done = True
+                    self._pos += 1
+                    break
+            self._pos += 1
+        return new_steps
+
+    @classmethod
+    def _parse_step(cls, text: str) -> Optional[Step]:
+        """解析单个步骤对象，步骤对象不完整或格式错误时忽略，最终以完整输出解析的结果为准"""
+        try:
+            return Step.model_validate(json.loads(text))
+        except ValueError as e:
+            logger.debug(f"增量解析计划步骤失败: {e}")
+            return None
@@ -5,12 +5,31 @@
 @Author : caixiaorong01@outlook.com
 @File   : planner.py
 """
+import json
 import logging
-from typing import Optional, AsyncGenerator
+from typing import Optional, AsyncGenerator, List
 
-from app.domain.models import Message, Event, MessageEvent, Plan, PlanEvent, PlanEventStatus, Step
-from app.domain.services.prompts import SYSTEM_PROMPT, PLANNER_SYSTEM_PROMPT, CREATE_PLAN_PROMPT, UPDATE_PLAN_PROMPT
+from app.domain.external import llm_call_context
+from app.domain.models import (
+    Message,
+    Event,
+    MessageEvent,
+    MessageDeltaEvent,
+    Plan,
+    PlanEvent,
+    PlanDraftEvent,
+    PlanEventStatus,
+    Step,
+)
+from app.domain.services.prompts import (
+    SYSTEM_PROMPT,
+    PLANNER_SYSTEM_PROMPT,
+    CREATE_PLAN_PROMPT,
+    UPDATE_PLAN_PROMPT,
+    REPLAN_CHECK_PROMPT,
+)
 from .base import BaseAgent
+from .plan_stream_parser import PlanStreamParser
 
 """
 多Agent系统/flow=PlannerAgent+ReActAgent
@@ -40,6 +59,17 @@ class PlannerAgent(BaseAgent):
     _system_prompt: str = SYSTEM_PROMPT + PLANNER_SYSTEM_PROMPT
     _format: Optional[str] = "json_object"
     _tool_choice: Optional[str] = "none"
+    _draft_stream_id: Optional[str] = None  # 当前增量解析的流id
+    _draft_parser: Optional[PlanStreamParser] = None  # 当前流的增量计划解析器
+
+    def _build_draft_event(self, event: MessageDeltaEvent) -> Optional[PlanDraftEvent]:
+        """将内容增量送入增量解析器，解析出新的步骤时构建计划草稿事件，重试产生新的流时重新解析"""
+        if self._draft_parser is None or self._draft_stream_id != event.stream_id:
+            self._draft_stream_id = event.stream_id
+            self._draft_parser = PlanStreamParser()
+        if self._draft_parser.feed(event.content):
+            return PlanDraftEvent(stream_id=event.stream_id, steps=list(self._draft_parser.steps))
+        return None
 
     async def create_plan(self, message: Message) -> AsyncGenerator[Event, None]:
         """
@@ -48,6 +78,7 @@ class PlannerAgent(BaseAgent):
         :return: 异步生成器，产生规划相关的事件流
         """
         # 构造创建计划的查询提示词，包含用户消息内容和附件信息
+        self._step_id = None
         query = CREATE_PLAN_PROMPT.format(
             message=message.content,
             attachments="\n".join(message.attachments),
@@ -67,10 +98,48 @@ class PlannerAgent(BaseAgent):
                     plan=plan,
                     status=PlanEventStatus.CREATED
                 )
+            elif isinstance(event, MessageDeltaEvent):
+                # 透传内容增量，并推送增量解析出的计划草稿
+                yield event
+                draft_event = self._build_draft_event(event)
+                if draft_event:
+                    yield draft_event
             else:
                 # 产出其他类型的事件
                 yield event
 
+    async def needs_replan(self, plan: Plan, steps: List[Step]) -> bool:
+        """
+        以一次不写入记忆的轻量模型调用判断是否需要更新计划，判断失败时视为需要更新
+        :param plan: 当前计划
+        :param steps: 上次更新计划后执行完成的步骤
+        :return: 是否需要更新计划
+        """
+        # 只携带步骤结果与后续步骤描述，不携带完整的计划与对话记忆
+        executed = [
+            {"id": step.id, "description": step.description, "success": step.success,
+             "result": step.result, "attachments": step.attachments}
+            for step in steps
+        ]
+        pending = [{"id": step.id, "description": step.description} for step in plan.steps if not step.done]
+        query = REPLAN_CHECK_PROMPT.format(
+            steps=json.dumps(executed, ensure_ascii=False),
+            pending_steps=json.dumps(pending, ensure_ascii=False),
+        )
+
+        llm_call_context.set({"session_id": self._session_id, "agent": f"{self.name}:replan_check",
+                              "step_id": steps[-1].id if steps else None})
+        try:
+            message = await self._llm.invoke(
+                messages=[{"role": "user", "content": query}],
+                response_format={"type": "json_object"},
+            )
+            parsed_obj = await self._json_parser.invoke(message.get("content") or "")
+            return bool(parsed_obj.get("replan", True)) if isinstance(parsed_obj, dict) else True
+        except Exception as e:
+            logger.warning(f"判断是否需要更新计划失败, 按需要更新处理: {e}")
+            return True
+
     async def update_plan(self, plan: Plan, step: Step) -> AsyncGenerator[Event, None]:
         """
         根据步骤执行结果更新计划
@@ -79,6 +148,7 @@ class PlannerAgent(BaseAgent):
         :return: 异步生成器，产生更新计划相关事件流
         """
         # 构造更新计划的查询提示词，包含当前步骤和计划信息
+        self._step_id = step.id
         query = UPDATE_PLAN_PROMPT.format(
             step=step.model_dump_json(),
             plan=plan.model_dump_json(),
@@ -103,10 +173,14 @@ class PlannerAgent(BaseAgent):
                         first_pending_index = idx
                         break
 
-                # 如果找到未完成的步骤，则用新步骤替换原计划中从该步骤开始的所有步骤
+                # 如果找到未完成的步骤，则用新步骤替换原计划中从该步骤开始的所有未完成步骤
+                # 并行执行时已完成的步骤可能位于未完成步骤之后，需要保留这些步骤及其结果
                 if first_pending_index is not None:
                     updated_steps = plan.steps[:first_pending_index]
-                    updated_steps.extend(new_steps)
+                    done_steps = [step for step in plan.steps[first_pending_index:] if step.done]
+                    updated_steps.extend(done_steps)
+                    done_ids = {step.id for step in updated_steps}
+                    updated_steps.extend(step for step in new_steps if step.id not in done_ids)
 
                     plan.steps = updated_steps
 
@@ -115,6 +189,12 @@ class PlannerAgent(BaseAgent):
                     plan=plan,
                     status=PlanEventStatus.UPDATED
                 )
+            elif isinstance(event, MessageDeltaEvent):
+                # 透传内容增量，并推送增量解析出的计划草稿
+                yield event
+                draft_event = self._build_draft_event(event)
+                if draft_event:
+                    yield draft_event
             else:
                 # 产出其他类型的事件
                 yield event
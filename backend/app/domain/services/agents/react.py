@@ -5,8 +5,9 @@
 @Author : caixiaorong01@outlook.com
 @File   : react.py
 """
+import json
 import logging
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 
 from app.domain.models import Plan, Step, Message, Event, ExecutionStatus, File
 from app.domain.models.event import (
@@ -18,7 +19,13 @@ from app.domain.models.event import (
     ToolEventStatus,
     WaitEvent
 )
-from app.domain.services.prompts import SYSTEM_PROMPT, REACT_SYSTEM_PROMPT, EXECUTION_PROMPT, SUMMARIZE_PROMPT
+from app.domain.services.prompts import (
+    SYSTEM_PROMPT,
+    REACT_SYSTEM_PROMPT,
+    EXECUTION_PROMPT,
+    SUMMARIZE_PROMPT,
+    PARALLEL_STEP_RESULTS_PROMPT,
+)
 from .base import BaseAgent
 
 logger = logging.getLogger(__name__)
@@ -50,6 +57,7 @@ class ReActAgent(BaseAgent):
         )
 
         # 设置步骤状态为运行中，并产出步骤开始事件
+        self._step_id = step.id
         step.status = ExecutionStatus.RUNNING
         yield StepEvent(
             step=step,
@@ -116,16 +124,44 @@ class ReActAgent(BaseAgent):
         # 确保步骤最终状态为完成（如果没有提前返回或出错）
         step.status = ExecutionStatus.COMPLETED
 
+    async def merge_step_results(self, steps: List[Step]) -> None:
+        """
+        将其他Agent并行完成的步骤结果写入记忆，保证后续步骤与总结能看到完整的执行结果
+
+        :param steps: 按计划顺序排列的已完成步骤
+        """
+        if not steps:
+            return
+        results = [
+            {"id": step.id, "description": step.description, "success": step.success,
+             "result": step.result, "error": step.error, "attachments": step.attachments}
+            for step in steps
+        ]
+        merge_message = {
+            "role": "user",
+            "content": PARALLEL_STEP_RESULTS_PROMPT.format(steps=json.dumps(results, ensure_ascii=False)),
+        }
+
+        # 等待用户回复时最后一条消息是尚未响应的工具调用，需要插入到其之前以保证消息顺序合法
+        await self._ensure_memory()
+        last_message = self._memory.get_last_message()
+        if last_message and last_message.get("tool_calls"):
+            self._memory.messages.insert(len(self._memory.messages) - 1, merge_message)
+            await self._save_memory()
+        else:
+            await self._add_to_memery([merge_message])
+
     async def summarize(self) -> AsyncGenerator[Event, None]:
         """
         总结ReAct Agent的运行结果
 
         :return: 异步生成器，产生总结过程中的事件流
         """
-        # 构造总结提示词
+        # 构造总结提示词，总结不属于任何步骤
+        self._step_id = None
         query = SUMMARIZE_PROMPT
         # 调用模型执行总结任务
-        async for event in self.invoke(query):
+        async for event in self.invoke(query, llm=self._summarizer_llm):
             if isinstance(event, MessageEvent):
                 # 记录生成的总结内容
                 logger.info(f"执行Agent生成汇总内容：{event.message}")
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 11:00
+@Author : caixiaorong01@outlook.com
+@File   : __init__.py.py
+"""
+from .context_manager import (
+    ContextManager,
+    ContextTrimStrategy,
+    DropToolOutputsStrategy,
+    SummarizeStrategy,
+    build_context_manager,
+)
+from .token_counter import count_message_tokens, count_messages_tokens, count_tools_tokens, estimate_tokens
+
+__all__ = [
+    "ContextManager",
+    "ContextTrimStrategy",
+    "DropToolOutputsStrategy",
+    "SummarizeStrategy",
+    "build_context_manager",
+    "count_message_tokens",
+    "count_messages_tokens",
+    "count_tools_tokens",
+    "estimate_tokens",
+]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 11:10
+@Author : caixiaorong01@outlook.com
+@File   : context_manager.py
+"""
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+from app.domain.external import LLM
+from app.domain.models import Memory, ContextStrategyType
+from app.domain.services.prompts import SUMMARIZE_CONTEXT_PROMPT
+from .token_counter import count_message_tokens, count_messages_tokens, count_tools_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextTrimStrategy(ABC):
+    """上下文裁剪策略，原地裁剪记忆中的消息，使其尽量不超出token预算"""
+
+    @abstractmethod
+    async def trim(self, memory: Memory, budget: int) -> bool:
+        """
+        裁剪记忆
+        :param memory: Agent记忆
+        :param budget: 消息可用的token预算
+        :return: 记忆是否发生了变化
+        """
+        ...
+
+
+class DropToolOutputsStrategy(ContextTrimStrategy):
+    """从最早的工具输出开始截断，只保留简短预览，工具消息本身保留以维持tool_call与结果的配对"""
+
+    def __init__(self, keep_recent: int = 3, preview_chars: int = 200) -> None:
+        self._keep_recent = keep_recent
+        self._preview_chars = preview_chars
+
+    async def trim(self, memory: Memory, budget: int) -> bool:
+        total = count_messages_tokens(memory.messages)
+        tool_messages = [message for message in memory.messages if memory.get_message_role(message) == "tool"]
+
+        # 最近的若干条工具输出是当前推理最依赖的信息，保持完整
+        candidates = tool_messages[:-self._keep_recent] if self._keep_recent > 0 else tool_messages
+        changed = False
+        for message in candidates:
+            if total <= budget:
+                break
+
+            content = message.get("content")
+            if not isinstance(content, str) or len(content) <= self._preview_chars:
+                continue
+
+            # 截断为预览内容并更新总token数
+            before = count_message_tokens(message)
+            message["content"] = f"{content[:self._preview_chars]}...(内容过长已截断)"
+            total -= before - count_message_tokens(message)
+            changed = True
+            logger.debug(f"截断工具输出以节省上下文: {message.get('function_name')}")
+
+        return changed
+
+
+class SummarizeStrategy(ContextTrimStrategy):
+    """将较早的对话总结为一条摘要消息，保留系统提示与最近的若干条消息"""
+
+    def __init__(self, llm: LLM, keep_recent: int = 6, max_chars_per_message: int = 2000) -> None:
+        self._llm = llm
+        self._keep_recent = keep_recent
+        self._max_chars_per_message = max_chars_per_message
+
+    def _render(self, messages: List[Dict[str, Any]]) -> str:
+        """将消息渲染为纯文本记录，避免在摘要请求中出现未配对的工具调用"""
+        lines = []
+        for message in messages:
+            role = message.get("role")
+            content = message.get("content") or ""
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False)
+            if role == "tool":
+                role = f"tool({message.get('function_name', '')})"
+            for tool_call in message.get("tool_calls") or []:
+                function = tool_call.get("function") or {}
+                content += f"\n[调用工具 {function.get('name')}: {function.get('arguments')}]"
+            lines.append(f"[{role}] {content[:self._max_chars_per_message]}")
+        return "\n".join(lines)
+
+    async def trim(self, memory: Memory, budget: int) -> bool:
+        messages = memory.messages
+        head = 1 if messages and memory.get_message_role(messages[0]) == "system" else 0
+
+        # 1.确定摘要范围的结束位置，保留的消息不能以工具结果开头，否则会与其工具调用分离
+        split = len(messages) - self._keep_recent
+        while split > head and memory.get_message_role(messages[split]) == "tool":
+            split -= 1
+        if split <= head + 1:
+            return False
+
+        # 2.调用模型生成摘要，失败时保持记忆不变
+        older = messages[head:split]
+        try:
+            result = await self._llm.invoke(messages=[{
+                "role": "user",
+                "content": SUMMARIZE_CONTEXT_PROMPT.format(transcript=self._render(older)),
+            }])
+        except Exception as e:
+            logger.error(f"总结上下文失败: {e}")
+            return False
+        summary = (result or {}).get("content")
+        if not summary:
+            return False
+
+        # 3.使用摘要替换较早的消息
+        memory.messages = messages[:head] + [{
+            "role": "user",
+            "content": f"(以下是之前交互记录的摘要)\n{summary}",
+        }] + messages[split:]
+        logger.info(f"已将{len(older)}条较早的消息总结为摘要")
+        return True
+
+
+class ContextManager:
+    """上下文管理器，在调用模型前检查记忆的token数量，超出预算时依次应用裁剪策略"""
+
+    def __init__(self, budget: int, strategies: List[ContextTrimStrategy]) -> None:
+        self._budget = budget
+        self._strategies = strategies
+
+    async def fit(self, memory: Memory, tools: List[Dict[str, Any]], budget: Optional[int] = None) -> bool:
+        """
+        使记忆适配token预算
+        :param memory: Agent记忆
+        :param tools: 本次请求携带的工具定义，其占用的token从预算中扣除
+        :param budget: 本次调用所用模型的token预算，按角色路由到上下文窗口不同的模型时传入，为空时使用默认预算
+        :return: 记忆是否发生了变化
+        """
+        budget = (budget or self._budget) - count_tools_tokens(tools)
+        total = count_messages_tokens(memory.messages)
+        if total <= budget:
+            return False
+
+        logger.info(f"上下文超出预算({total} > {budget} tokens), 开始裁剪记忆")
+        changed = False
+        for strategy in self._strategies:
+            changed = await strategy.trim(memory, budget) or changed
+            total = count_messages_tokens(memory.messages)
+            if total <= budget:
+                break
+
+        if total > budget:
+            logger.warning(f"裁剪后上下文仍超出预算: {total} > {budget} tokens")
+        return changed
+
+
+def build_context_manager(
+        llm: LLM,
+        strategy_type: ContextStrategyType,
+        summarizer_llm: Optional[LLM] = None,
+) -> ContextManager:
+    """根据配置的裁剪策略类型构建上下文管理器，token预算取自llm，总结较早的对话时使用summarizer_llm"""
+    strategies: List[ContextTrimStrategy] = []
+    if strategy_type in (ContextStrategyType.DROP_TOOL_OUTPUTS, ContextStrategyType.DROP_TOOL_OUTPUTS_THEN_SUMMARIZE):
+        strategies.append(DropToolOutputsStrategy())
+    if strategy_type in (ContextStrategyType.SUMMARIZE, ContextStrategyType.DROP_TOOL_OUTPUTS_THEN_SUMMARIZE):
+        strategies.append(SummarizeStrategy(llm=summarizer_llm or llm))
+    return ContextManager(budget=llm.context_budget, strategies=strategies)
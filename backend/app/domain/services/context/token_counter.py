@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 11:00
+@Author : caixiaorong01@outlook.com
+@File   : token_counter.py
+"""
+import json
+import math
+import re
+from typing import Dict, Any, List, Optional
+
+# 中日韩字符通常单独成token，其余字符按平均4个字符一个token估算
+_CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]")
+
+# 每条消息在请求中的格式开销(角色、分隔符等)
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """估算文本的token数量，不依赖具体模型的分词器，结果偏保守"""
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """估算单条消息的token数量，包含内容、推理内容与工具调用参数"""
+    tokens = _MESSAGE_OVERHEAD
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += estimate_tokens(content)
+    elif content:
+        tokens += estimate_tokens(json.dumps(content, ensure_ascii=False))
+    tokens += estimate_tokens(message.get("reasoning_content"))
+
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        tokens += estimate_tokens(function.get("name")) + estimate_tokens(function.get("arguments"))
+    return tokens
+
+
+def count_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """估算消息列表的token数量"""
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def count_tools_tokens(tools: List[Dict[str, Any]]) -> int:
+    """估算工具定义的token数量"""
+    if not tools:
+        return 0
+    return estimate_tokens(json.dumps(tools, ensure_ascii=False))
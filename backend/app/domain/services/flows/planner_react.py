@@ -5,21 +5,25 @@
 @Author : caixiaorong01@outlook.com
 @File   : planner_react.py
 """
+import asyncio
 import logging
-from typing import AsyncGenerator, Optional, Callable
+from typing import AsyncGenerator, Optional, Callable, List, Tuple, Dict
 
-from app.domain.external import Sandbox, Browser, SearchEngine, LLM, JSONParser
+from app.domain.external import Sandbox, Browser, SearchEngine, LLM, JSONParser, LLMTelemetry, BlobStore
 from app.domain.models import (
     Message,
     BaseEvent,
     Plan,
+    Step,
     AgentConfig,
+    LLMRole,
     SessionStatus,
     DoneEvent,
     PlanEvent,
     PlanEventStatus,
     TitleEvent,
     MessageEvent,
+    WaitEvent,
     ExecutionStatus
 )
 from app.domain.repositories import IUnitOfWork
@@ -32,8 +36,13 @@ from app.domain.services.tools import (
     MCPTool,
     A2ATool,
     MessageTool,
+    NotifyMessageTool,
+    ToolOutputTool,
+    ToolResultCache,
+    BaseTool,
 )
 from .base import BaseFlow, FlowStatus
+from .replan_policy import ReplanPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +51,7 @@ class PlannerReActFlow(BaseFlow):
 
     def __init__(
             self,
-            llm: LLM,
+            llms: Dict[LLMRole, LLM],
             agent_config: AgentConfig,
             session_id: str,
             uow_factory: Callable[[], IUnitOfWork],
@@ -52,6 +61,8 @@ class PlannerReActFlow(BaseFlow):
             search_engine: SearchEngine,
             mcp_tool: MCPTool,
             a2a_tool: A2ATool,
+            llm_telemetry: Optional[LLMTelemetry] = None,
+            blob_store: Optional[BlobStore] = None,
     ):
         # 初始化会话ID和会话仓库，用于后续的交互和状态管理
         self._session_id = session_id
@@ -61,41 +72,170 @@ class PlannerReActFlow(BaseFlow):
         # 设置流程初始状态为待机状态，并初始化计划为空
         self.status = FlowStatus.IDLE
         self.plan: Optional[Plan] = None
+        self._llm_telemetry = llm_telemetry
+        self._executed_steps: List[Step] = []  # 上次更新计划后执行完成的步骤
+
+        # 按角色选择模型，规划使用planner模型，执行使用executor模型，总结与上下文压缩使用summarizer模型
+        planner_llm = llms[LLMRole.PLANNER]
+        executor_llm = llms[LLMRole.EXECUTOR]
+        summarizer_llm = llms[LLMRole.SUMMARIZER]
+
+        # 并行执行步骤时多个Agent共享同一个浏览器，通过租约保证同一时间只有一个步骤操作浏览器
+        self._max_parallel_steps = agent_config.max_parallel_steps
+        browser_lease = asyncio.Lock() if self._max_parallel_steps > 1 else None
+        self._browser_tools: List[BrowserTool] = []
 
         # 构建工具列表，包括文件操作、shell命令执行、浏览器控制、搜索功能、消息处理、MCP和A2A工具
+        browser_tool = BrowserTool(browser=browser, lease=browser_lease)
+        self._browser_tools.append(browser_tool)
         tools = [
             FileTool(sandbox=sandbox),  # 文件操作工具
             ShellTool(sandbox=sandbox),  # Shell命令执行工具
-            BrowserTool(browser=browser),  # 浏览器控制工具
+            browser_tool,  # 浏览器控制工具
             SearchTool(search_engine=search_engine),  # 搜索引擎工具
             MessageTool(),  # 消息处理工具
             mcp_tool,  # MCP工具
             a2a_tool,  # A2A工具
         ]
+        # 配置了内容存储时，过长的工具结果会被转存，需要提供分页读取完整结果的工具
+        extra_tools: List[BaseTool] = []
+        if blob_store is not None:
+            extra_tools.append(ToolOutputTool(session_id=session_id, blob_store=blob_store))
+        tools.extend(extra_tools)
+        # 会话内共享的只读工具结果缓存，并行执行的辅助代理与主代理共享缓存及失效规则
+        self._tool_cache = ToolResultCache(ttl_seconds=agent_config.tool_cache_ttl_seconds)
 
         # 创建规划代理实例，负责制定任务计划
         self.planner = PlannerAgent(
             session_id=self._session_id,
             uow_factory=self._uow_factory,
             agent_config=agent_config,
-            llm=llm,
+            llm=planner_llm,
             tools=tools,
             json_parser=json_parser,
+            summarizer_llm=summarizer_llm,
         )
         logger.debug(f"创建PlannerAgent成功, 会话id: {self._session_id}")
+        self._replan_policy = ReplanPolicy(agent_config=agent_config, planner=self.planner)
 
         # 创建ReAct代理实例，负责执行计划并进行推理和行动
         self.react = ReActAgent(
             session_id=self._session_id,
             uow_factory=self._uow_factory,
             agent_config=agent_config,
-            llm=llm,
+            llm=executor_llm,
             tools=tools,
             json_parser=json_parser,
+            summarizer_llm=summarizer_llm,
+            blob_store=blob_store,
+            tool_cache=self._tool_cache,
         )
 
         logger.debug(f"创建ReActAgent成功, 会话id: {self._session_id}")
 
+        # 创建辅助ReAct代理，与主ReAct代理并行执行无依赖的步骤，每个辅助代理使用独立的记忆
+        # 辅助代理只能通知用户而不能向用户提问，需要用户输入的步骤由主ReAct代理执行
+        self.helpers: List[ReActAgent] = []
+        for index in range(1, self._max_parallel_steps):
+            helper_name = f"{ReActAgent.name}-{index}"
+            helper_browser_tool = BrowserTool(browser=browser, lease=browser_lease)
+            self._browser_tools.append(helper_browser_tool)
+            self.helpers.append(ReActAgent(
+                session_id=self._session_id,
+                uow_factory=self._uow_factory,
+                agent_config=agent_config,
+                llm=executor_llm,
+                tools=[
+                    FileTool(sandbox=sandbox),
+                    # 辅助代理与主代理同时使用同一个沙箱，Shell会话id加上代理专属前缀，避免相互覆盖命令
+                    ShellTool(sandbox=sandbox, session_prefix=f"{helper_name}-"),
+                    helper_browser_tool,
+                    SearchTool(search_engine=search_engine),
+                    NotifyMessageTool(),
+                    mcp_tool,
+                    a2a_tool,
+                    *extra_tools,
+                ],
+                json_parser=json_parser,
+                name=helper_name,
+                summarizer_llm=summarizer_llm,
+                blob_store=blob_store,
+                tool_cache=self._tool_cache,
+            ))
+        if self.helpers:
+            logger.debug(f"创建{len(self.helpers)}个辅助ReActAgent成功, 会话id: {self._session_id}")
+
+    def invalidate_file_cache(self) -> None:
+        """沙箱文件在工具调用之外被修改(如同步消息附件)时，失效会话内缓存的文件与目录读取结果"""
+        self._tool_cache.invalidate_scopes(ToolResultCache.FILE_SCOPES)
+
+    async def flush_memories(self) -> None:
+        """将各Agent尚未写入的记忆变更立即写入存储"""
+        for agent in [self.planner, self.react, *self.helpers]:
+            await agent.flush_memory()
+
+    def _next_steps(self) -> List[Step]:
+        """获取下一批待执行的步骤，未开启并行时与顺序执行一致，只返回下一个未完成的步骤"""
+        if self._max_parallel_steps <= 1:
+            step = self.plan.get_next_step()
+            return [step] if step else []
+
+        # 正在执行中(如等待用户回复后恢复)的步骤排在最前面，交由主ReAct代理继续执行
+        steps = self.plan.get_ready_steps()
+        steps.sort(key=lambda item: item.status != ExecutionStatus.RUNNING)
+        return steps[:self._max_parallel_steps]
+
+    async def _execute_steps(self, steps: List[Step], message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """
+        在独立的ReAct上下文中并行执行一批步骤，按到达顺序实时转发各步骤的事件。
+        主ReAct代理产出的等待事件会推迟到其余步骤全部结束后再转发，保证等待用户回复时没有仍在运行的步骤。
+        """
+        queue: asyncio.Queue[Tuple[int, Optional[BaseEvent]]] = asyncio.Queue()
+        workers = [self.react, *self.helpers]
+
+        async def run(index: int, step: Step) -> None:
+            try:
+                async for event in workers[index].execute_step(plan=self.plan, step=step, message=message):
+                    await queue.put((index, event))
+            finally:
+                # 步骤结束后释放浏览器租约，并通知主循环该步骤已结束
+                self._browser_tools[index].release_lease()
+                await queue.put((index, None))
+
+        tasks = [asyncio.create_task(run(index, step)) for index, step in enumerate(steps)]
+        wait_event: Optional[WaitEvent] = None
+        try:
+            finished = 0
+            while finished < len(tasks):
+                index, event = await queue.get()
+                if event is None:
+                    finished += 1
+                elif isinstance(event, WaitEvent):
+                    wait_event = event
+                else:
+                    yield event
+
+            # 任一步骤执行异常时向上抛出，与顺序执行的行为保持一致
+            for task in tasks:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for index in range(len(steps)):
+            logger.info(f"压缩{workers[index].name} Agent记忆...")
+            await workers[index].compact_memory()
+
+        # 按计划顺序将辅助代理完成的步骤结果合并到主ReAct代理的记忆中
+        helper_step_ids = {step.id for step in steps[1:]}
+        helper_steps = [step for step in self.plan.steps if step.id in helper_step_ids]
+        await self.react.merge_step_results(helper_steps)
+
+        if wait_event:
+            yield wait_event
+
     async def invoke(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
         # 获取当前会话信息，如果会话不存在则抛出异常
         async with self._uow:
@@ -108,22 +248,26 @@ class PlannerReActFlow(BaseFlow):
             logger.debug(f"会话 {self._session_id} 未处于空闲状态, 回滚数据确保消息列表格式正常")
             await self.planner.roll_back(message=message)
             await self.react.roll_back(message=message)
+            for helper in self.helpers:
+                await helper.roll_back(message=message)
 
         # 根据会话状态设置当前flow的状态
         if session.status == SessionStatus.RUNNING:
             logger.debug(f"会话 {self._session_id} 正在运行中, 重新规划")
             self.status = FlowStatus.PLANNING
 
-        if session.status == SessionStatus.WAITING:
-            logger.debug(f"会话 {self._session_id} 正在等待中, 继续执行")
+        if session.status in [SessionStatus.WAITING, SessionStatus.HANDOFF]:
+            logger.debug(f"会话 {self._session_id} 正在等待中或由其他节点移交, 继续执行")
             self.status = FlowStatus.EXECUTING
 
         # 更新会话状态为RUNNING
         async with self._uow:
             await self._uow.session.update_status(self._session_id, SessionStatus.RUNNING)
 
-        # 获取最新的计划
+        # 获取最新的计划，没有可继续执行的计划时重新规划
         self.plan = session.get_latest_plan()
+        if self.status == FlowStatus.EXECUTING and not self.plan:
+            self.status = FlowStatus.PLANNING
         logger.info(f"Planner&ReAct流接收消息：{message.message[:50]}...")
 
         # 初始化step变量
@@ -162,32 +306,60 @@ class PlannerReActFlow(BaseFlow):
             elif self.status == FlowStatus.EXECUTING:
                 self.plan.status = ExecutionStatus.RUNNING
 
-                # 获取下一个待执行的步骤
-                step = self.plan.get_next_step()
-                if not step:
+                # 获取下一批待执行的步骤
+                steps = self._next_steps()
+                if not steps:
                     logger.info(
                         f"Planner&ReAct流没有更多步骤,状态变更 {FlowStatus.EXECUTING} -> {FlowStatus.SUMMARIZING}")
                     self.status = FlowStatus.SUMMARIZING
                     continue
 
-                logger.info(f"Planner&ReAct流开始执行步骤 {step.id}: {step.description[:50]}...")
-                # 执行当前步骤
-                async for event in self.react.execute_step(plan=self.plan, step=step, message=message):
-                    yield event
-
-                logger.info(f"压缩{self.react.name} Agent记忆...")
-                # 压缩ReAct Agent的记忆，释放资源
-                await self.react.compact_memory()
+                if len(steps) == 1:
+                    step = steps[0]
+                    logger.info(f"Planner&ReAct流开始执行步骤 {step.id}: {step.description[:50]}...")
+                    # 执行当前步骤，结束后释放浏览器租约，避免在后续步骤中阻塞辅助代理使用浏览器
+                    try:
+                        async for event in self.react.execute_step(plan=self.plan, step=step, message=message):
+                            yield event
+                    finally:
+                        self._browser_tools[0].release_lease()
+
+                    logger.info(f"压缩{self.react.name} Agent记忆...")
+                    # 压缩ReAct Agent的记忆，释放资源
+                    await self.react.compact_memory()
+                else:
+                    logger.info(f"Planner&ReAct流开始并行执行步骤: {[item.id for item in steps]}")
+                    async for event in self._execute_steps(steps, message):
+                        yield event
+
+                    # 一批步骤只更新一次计划，以计划中最靠后的步骤作为更新依据
+                    step_ids = {item.id for item in steps}
+                    step = next(item for item in reversed(self.plan.steps) if item.id in step_ids)
 
                 # 切换到UPDATING状态，准备更新计划
+                self._executed_steps.extend(steps)
                 self.status = FlowStatus.UPDATING
 
-            # UPDATING状态：更新计划
+            # UPDATING状态：根据计划更新策略判断是否需要更新计划
             elif self.status == FlowStatus.UPDATING:
-                logger.info(f"Planner&ReAct流开始更新计划")
-                # 使用planner更新计划
-                async for event in self.planner.update_plan(plan=self.plan, step=step):
-                    yield event
+                replan, reason = await self._replan_policy.decide(self.plan, self._executed_steps)
+                if replan:
+                    logger.info(f"Planner&ReAct流开始更新计划, 原因: {reason}")
+                    # 使用planner更新计划
+                    async for event in self.planner.update_plan(plan=self.plan, step=step):
+                        yield event
+                    self._executed_steps = []
+                else:
+                    # 跳过本次模型调用并记录到遥测中，仍推送当前计划(含刚完成步骤的状态与结果)作为检查点
+                    logger.info(f"Planner&ReAct流跳过计划更新, 原因: {reason}")
+                    if self._llm_telemetry:
+                        await self._llm_telemetry.record_skipped_call(
+                            self._session_id, f"{self.planner.name}:update_plan", reason
+                        )
+                    yield PlanEvent(status=PlanEventStatus.UPDATED, plan=self.plan)
+
+                # 步骤及计划更新完成后写入各Agent的记忆
+                await self.flush_memories()
 
                 logger.info(f"Planner&ReAct流状态变更 {FlowStatus.UPDATING} -> {FlowStatus.EXECUTING}")
                 self.status = FlowStatus.EXECUTING
@@ -212,6 +384,9 @@ class PlannerReActFlow(BaseFlow):
                 yield PlanEvent(status=PlanEventStatus.COMPLETED, plan=self.plan)
                 break
 
+        if self._tool_cache.enabled:
+            logger.info(f"会话 {self._session_id} 工具结果缓存统计: {self._tool_cache.stats()}")
+
         # 发送结束事件
         yield DoneEvent()
         logger.info(f"Planner&ReAct流完成")
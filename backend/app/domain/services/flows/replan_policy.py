@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 22:50
+@Author : caixiaorong01@outlook.com
+@File   : replan_policy.py
+"""
+import logging
+from typing import List, Tuple
+
+from app.domain.models import AgentConfig, Plan, Step, ReplanPolicyType, ExecutionStatus
+from app.domain.services.agents import PlannerAgent
+
+logger = logging.getLogger(__name__)
+
+
+class ReplanPolicy:
+    """计划更新策略，决定步骤执行完成后是否需要调用planner更新计划"""
+
+    def __init__(self, agent_config: AgentConfig, planner: PlannerAgent) -> None:
+        self._policy = agent_config.replan_policy
+        self._interval = agent_config.replan_interval
+        self._result_chars = agent_config.replan_result_chars
+        self._planner = planner
+
+    def _significant(self, step: Step) -> bool:
+        """步骤产出了附件或较长的结果时视为重要结果"""
+        return bool(step.attachments) or len(step.result or "") >= self._result_chars
+
+    async def decide(self, plan: Plan, steps: List[Step]) -> Tuple[bool, str]:
+        """
+        判断是否需要更新计划
+        :param plan: 当前计划
+        :param steps: 上次更新计划后执行完成的步骤
+        :return: (是否需要更新计划, 原因)
+        """
+        if self._policy == ReplanPolicyType.ALWAYS:
+            return True, "always"
+
+        # 任一步骤执行失败时始终更新计划，由planner调整后续步骤
+        if any(step.status == ExecutionStatus.FAILED or not step.success for step in steps):
+            return True, "failure"
+
+        if self._policy == ReplanPolicyType.ON_FAILURE:
+            return False, "success"
+
+        if self._policy == ReplanPolicyType.SIGNIFICANT_RESULT:
+            if any(self._significant(step) for step in steps):
+                return True, "significant_result"
+            return False, "insignificant_result"
+
+        if self._policy == ReplanPolicyType.EVERY_N_STEPS:
+            if len(steps) >= self._interval:
+                return True, "interval"
+            return False, "interval_not_reached"
+
+        # 分类器策略：由不携带记忆的轻量模型调用判断
+        if await self._planner.needs_replan(plan, steps):
+            return True, "classifier"
+        return False, "classifier_skip"
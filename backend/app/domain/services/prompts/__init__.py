@@ -6,14 +6,18 @@
 @File   : __init__.py.py
 """
 from .system import SYSTEM_PROMPT
-from .planner import PLANNER_SYSTEM_PROMPT, CREATE_PLAN_PROMPT, UPDATE_PLAN_PROMPT
-from .react import REACT_SYSTEM_PROMPT, EXECUTION_PROMPT, SUMMARIZE_PROMPT
+from .planner import PLANNER_SYSTEM_PROMPT, CREATE_PLAN_PROMPT, UPDATE_PLAN_PROMPT, REPLAN_CHECK_PROMPT
+from .react import REACT_SYSTEM_PROMPT, EXECUTION_PROMPT, SUMMARIZE_PROMPT, PARALLEL_STEP_RESULTS_PROMPT
+from .context import SUMMARIZE_CONTEXT_PROMPT
 __all__ = [
     "SYSTEM_PROMPT",
     "PLANNER_SYSTEM_PROMPT",
     "CREATE_PLAN_PROMPT",
     "UPDATE_PLAN_PROMPT",
+    "REPLAN_CHECK_PROMPT",
     "REACT_SYSTEM_PROMPT",
     "EXECUTION_PROMPT",
     "SUMMARIZE_PROMPT",
+    "PARALLEL_STEP_RESULTS_PROMPT",
+    "SUMMARIZE_CONTEXT_PROMPT",
 ]
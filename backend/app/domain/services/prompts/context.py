@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 11:20
+@Author : caixiaorong01@outlook.com
+@File   : context.py
+"""
+# 上下文摘要提示词模板，包含transcript
+SUMMARIZE_CONTEXT_PROMPT = """
+以下是你与用户、工具之间较早的交互记录，由于上下文长度有限，需要将其压缩为摘要：
+
+{transcript}
+
+请输出一份简洁但完整的摘要，要求：
+- 保留用户的原始需求、关键约束与已确认的信息；
+- 保留已完成的操作及其关键结果（文件路径、链接、数据、结论等）；
+- 保留尚未解决的问题与失败原因；
+- 使用与记录中用户消息相同的语言；
+- 直接输出摘要正文，不要添加额外说明。
+"""
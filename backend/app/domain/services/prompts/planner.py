@@ -24,6 +24,7 @@ CREATE_PLAN_PROMPT = """
 - 你的计划必须简洁明了，不要添加任何不必要的细节
 - 你的步骤必须是原子性且独立的，以便下一个执行者可以使用工具逐一执行它们
 - 你需要判断任务是否可以拆分为多个步骤，如果可以，返回多个步骤；否则，返回单个步骤
+- 如果某些步骤之间互不依赖(例如分别调研不同的主题)，请通过"depends_on"声明依赖关系，以便这些步骤可以并行执行
 
 返回格式要求：
 - 必须返回符合以下 TypeScript 接口定义的 JSON 格式
@@ -43,6 +44,8 @@ interface CreatePlanResponse {{
     id: string;
     /** 步骤描述 **/
     description: string;
+    /** (可选)该步骤依赖的步骤id数组，空数组表示可与其他步骤并行执行，省略时表示依赖之前的所有步骤 **/
+    depends_on?: string[];
   }}>;
   /** 根据上下文生成的计划目标 **/
   goal: string;
@@ -60,7 +63,13 @@ JSON 输出示例:
   "steps": [
     {{
       "id": "1",
-      "description": "步骤1描述"
+      "description": "步骤1描述",
+      "depends_on": []
+    }},
+    {{
+      "id": "2",
+      "description": "步骤2描述",
+      "depends_on": ["1"]
     }}
   ]
 }}
@@ -92,6 +101,7 @@ UPDATE_PLAN_PROMPT = """
 - 如果步骤已完成或者不再必要，请将其删除
 - 仔细阅读步骤结果以确定是否成功，如果不成功，请更改后续步骤
 - 根据步骤结果，你需要相应地更新计划步骤
+- 保留或更新步骤的"depends_on"依赖关系，依赖的步骤id必须是计划中存在的步骤
 
 返回格式要求：
 - 必须返回符合以下 TypeScript 接口定义的 JSON 格式
@@ -106,6 +116,8 @@ interface UpdatePlanResponse {{
     id: string;
     /** 步骤描述 **/
     description: string;
+    /** (可选)该步骤依赖的步骤id数组，空数组表示可与其他步骤并行执行，省略时表示依赖之前的所有步骤 **/
+    depends_on?: string[];
   }}>;
 }}
 ```
@@ -115,7 +127,13 @@ JSON输出示例：
   "steps": [
     {{
       "id": "1",
-      "description": "步骤1描述"
+      "description": "步骤1描述",
+      "depends_on": []
+    }},
+    {{
+      "id": "2",
+      "description": "步骤2描述",
+      "depends_on": ["1"]
     }}
   ]
 }}
@@ -133,3 +151,34 @@ JSON输出示例：
 计划 (plan):
 {plan}
 """
+
+# 判断是否需要更新计划的提示词模板，只携带步骤结果与后续步骤，用于以较小的代价跳过不必要的计划更新
+REPLAN_CHECK_PROMPT = """
+你需要判断在以下步骤执行完成后，是否需要更新后续的计划步骤。
+
+已执行的步骤 (steps):
+{steps}
+
+后续未完成的步骤 (pending_steps):
+{pending_steps}
+
+判断标准：
+- 如果步骤结果表明后续步骤已不再必要、需要新增步骤、或者后续步骤的描述与结果不符，则需要更新计划
+- 如果步骤结果符合预期，后续步骤可以直接执行，则不需要更新计划
+
+返回格式要求：
+- 必须返回符合以下 TypeScript 接口定义的 JSON 格式
+
+TypeScript接口定义：
+```typescript
+interface ReplanCheckResponse {{
+  /** 是否需要更新计划 **/
+  replan: boolean;
+}}
+```
+
+JSON输出示例：
+{{
+  "replan": false
+}}
+"""
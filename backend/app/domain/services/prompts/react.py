@@ -112,3 +112,9 @@ JSON 输出示例：
     ]
 }}
 """
+
+# 并行步骤结果合并提示词模板，将其他执行者并行完成的步骤结果同步给主执行Agent
+PARALLEL_STEP_RESULTS_PROMPT = """
+以下步骤已由其他执行者并行完成，请将这些结果作为后续步骤与总结的上下文 (无需回复):
+{steps}
+"""
@@ -10,9 +10,11 @@ from .base import BaseTool
 from .browser import BrowserTool
 from .file import FileTool
 from .mcp import MCPClientManager, MCPTool
-from .message import MessageTool
+from .message import MessageTool, NotifyMessageTool
 from .search import SearchTool
 from .shell import ShellTool
+from .tool_cache import ToolResultCache
+from .tool_output import ToolOutputTool, tool_output_key
 
 __all__ = [
     "BaseTool",
@@ -23,5 +25,9 @@ __all__ = [
     "BrowserTool",
     "ShellTool",
     "A2ATool",
-    "MessageTool"
+    "MessageTool",
+    "NotifyMessageTool",
+    "ToolOutputTool",
+    "ToolResultCache",
+    "tool_output_key",
 ]
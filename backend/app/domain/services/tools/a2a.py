@@ -136,13 +136,17 @@ class A2ATool(BaseTool):
         if not self._initialized:
             self.manager = A2AClientManager(a2a_config)
             await self.manager.initialize()
+            # 远程Agent集合发生变化，递增版本号通知Agent重建工具索引
+            self.version += 1
             self._initialized = True
 
     @tool(
         name="get_remote_agent_cards",
         description="获取可远程调用的Agent卡片信息, 包含Agent id、名称、描述、技能、请求端点等。",
         parameters={},
-        required=[]
+        required=[],
+        parallel_safe=True,
+        cache_scopes=[],
     )
     async def get_remote_agent_cards(self) -> ToolResult:
         """获取远程Agent卡片信息列表"""
@@ -173,6 +177,8 @@ class A2ATool(BaseTool):
             },
         },
         required=["id", "query"],
+        # 远程Agent可能修改共享的沙箱文件
+        invalidates=["file:*", "dir:*"],
     )
     async def call_remote_agent(self, id: str, query: str) -> ToolResult:
         """调用远程Agent并完成对应需求"""
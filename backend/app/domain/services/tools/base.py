@@ -6,7 +6,7 @@
 @File   : base.py
 """
 import inspect
-from typing import Dict, Any, List, Callable
+from typing import Dict, Any, List, Callable, FrozenSet, Optional
 
 from app.domain.models import ToolResult
 
@@ -15,7 +15,10 @@ def tool(
         name: str,
         description: str,
         parameters: Dict[str, Dict[str, Any]],
-        required: List[str] = None
+        required: List[str] = None,
+        parallel_safe: bool = False,
+        cache_scopes: Optional[List[str]] = None,
+        invalidates: Optional[List[str]] = None,
 ) -> Callable:
     """
     工具装饰器
@@ -23,6 +26,9 @@ def tool(
     :param description: 工具描述
     :param parameters: 工具参数
     :param required: 必填参数
+    :param parallel_safe: 是否为只读、可与其他工具并行执行的工具
+    :param cache_scopes: 结果可在会话内缓存时声明其所属的作用域模板(如"file:{filepath}")，为空表示不可缓存
+    :param invalidates: 调用后需要失效的缓存作用域模板，支持通配符(如"file:*")
     :return:
     """
 
@@ -47,39 +53,75 @@ def tool(
         func._tool_name = name
         func._tool_description = description
         func._tool_schema = tool_schema
+        func._tool_parallel_safe = parallel_safe
+        func._tool_cache_scopes = cache_scopes
+        func._tool_invalidates = invalidates or []
         return func
 
     return decorator
 
 
+class ToolSpec:
+    """工具元信息，在工具类定义时预先计算，避免每次调用时反射方法与签名"""
+
+    def __init__(self, method_name: str, schema: Dict[str, Any], parameters: FrozenSet[str],
+                 accepts_kwargs: bool, parallel_safe: bool, cache_scopes: Optional[List[str]] = None,
+                 invalidates: Optional[List[str]] = None) -> None:
+        self.method_name = method_name  # 对应的方法名称
+        self.schema = schema  # 工具声明
+        self.parameters = parameters  # 方法签名中定义的参数名称集合
+        self.accepts_kwargs = accepts_kwargs  # 方法是否接收**kwargs
+        self.parallel_safe = parallel_safe  # 是否可与其他工具并行执行
+        self.cache_scopes = cache_scopes  # 可缓存时结果所属的作用域模板，为空表示不可缓存
+        self.invalidates = invalidates or []  # 调用后需要失效的缓存作用域模板
+
+
 class BaseTool:
     """
     工具基类
     """
     name: str = ""  # 工具集合名称
+    _tool_specs: Dict[str, ToolSpec] = {}  # 工具名称->工具元信息，每个工具类定义时计算一次
+    _tool_schemas: List[Dict[str, Any]] = []  # 工具声明列表，每个工具类定义时计算一次
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """子类定义时扫描被@tool装饰的方法，预先计算工具声明、名称映射与参数集合"""
+        super().__init_subclass__(**kwargs)
+        specs: Dict[str, ToolSpec] = {}
+        for method_name, member in inspect.getmembers(cls, inspect.isfunction):
+            if not hasattr(member, "_tool_name"):
+                continue
+            sign = inspect.signature(member)
+            specs[member._tool_name] = ToolSpec(
+                method_name=method_name,
+                schema=member._tool_schema,
+                parameters=frozenset(name for name in sign.parameters if name != "self"),
+                accepts_kwargs=any(param.kind == inspect.Parameter.VAR_KEYWORD for param in sign.parameters.values()),
+                parallel_safe=getattr(member, "_tool_parallel_safe", False),
+                cache_scopes=getattr(member, "_tool_cache_scopes", None),
+                invalidates=getattr(member, "_tool_invalidates", None),
+            )
+        cls._tool_specs = specs
+        cls._tool_schemas = [spec.schema for spec in specs.values()]
 
     def __init__(self):
         """
         初始化
         """
-        self._tools_cache = None
+        self._tool_methods: Optional[Dict[str, Callable]] = None  # 工具名称->绑定方法，首次调用时构建
+        self.version = 0  # 工具集合版本号，工具集合动态变化时递增，用于Agent重建工具索引
 
     @classmethod
-    def _filter_parameters(cls, method: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    def _filter_parameters(cls, spec: ToolSpec, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """
-        根据方法签名过滤传入的参数，只保留方法签名中定义的参数
-        :param method: 需要检查签名的方法
+        根据预先计算的方法参数集合过滤传入的参数，只保留方法签名中定义的参数
+        :param spec: 工具元信息
         :param kwargs: 待过滤的参数字典
         :return: 过滤后的参数字典
         """
-        filtered_kwargs = {}
-        sign = inspect.signature(method)
-
-        for key, value in kwargs.items():
-            # 检查参数是否在方法签名中定义，如果是则保留
-            if key in sign.parameters:
-                filtered_kwargs[key] = value
-        return filtered_kwargs
+        if spec.accepts_kwargs:
+            return kwargs
+        return {key: value for key, value in kwargs.items() if key in spec.parameters}
 
     def has_tool(self, tool_name: str) -> bool:
         """
@@ -87,29 +129,40 @@ class BaseTool:
         :param tool_name: 工具名称
         :return:
         """
-        return any(hasattr(method, "_tool_name") and getattr(method, "_tool_name") == tool_name
-                   for _, method in inspect.getmembers(self, inspect.ismethod))
+        return tool_name in self._tool_specs
+
+    def is_parallel_safe(self, tool_name: str) -> bool:
+        """
+        检查指定工具是否为只读工具，可与其他工具并行执行
+        :param tool_name: 工具名称
+        :return:
+        """
+        spec = self._tool_specs.get(tool_name)
+        return spec is not None and spec.parallel_safe
+
+    def get_spec(self, tool_name: str) -> Optional[ToolSpec]:
+        """
+        获取指定工具的元信息
+        :param tool_name: 工具名称
+        :return: 工具元信息，工具不存在时返回None
+        """
+        return self._tool_specs.get(tool_name)
+
+    def prepare_args(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在发送工具事件与执行工具前调整模型给出的参数，默认原样返回
+        :param tool_name: 工具名称
+        :param args: 模型给出的工具参数
+        :return: 调整后的工具参数
+        """
+        return args
 
     def get_tools(self) -> List[Dict[str, Any]]:
         """
         获取当前工具集合中的所有工具
         :return: 工具列表
         """
-        if self._tools_cache is not None:
-            return self._tools_cache
-
-        # 如果工具缓存为空，则遍历当前对象的所有方法，查找被@tool装饰器标记的方法
-        tools = []
-        for _, method in inspect.getmembers(self, inspect.ismethod):
-            # 检查方法是否具有_tool_name属性，即是否被@tool装饰器标记过
-            if hasattr(method, "_tool_name"):
-                # 将该方法的工具模式(_tool_schema)添加到工具列表中
-                tools.append(getattr(method, "_tool_schema"))
-
-        # 将获取到的工具列表缓存到_tools_cache属性中，避免重复计算
-        self._tools_cache = tools
-        # 返回工具列表
-        return tools
+        return self._tool_schemas
 
     async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
         """
@@ -118,13 +171,14 @@ class BaseTool:
         :param kwargs: 工具参数
         :return:
         """
-        # 遍历当前对象的所有方法，查找与请求的工具名称匹配的方法
-        for _, method in inspect.getmembers(self, inspect.ismethod):
-            # 检查方法是否具有_tool_name属性且与请求的工具名称相匹配
-            if hasattr(method, "_tool_name") and getattr(method, "_tool_name") == tool_name:
-                # 过滤掉不在方法签名中的参数，防止传递无效参数
-                filtered_kwargs = self._filter_parameters(method, kwargs)
-                # 异步调用匹配到的工具方法并返回结果
-                return await method(**filtered_kwargs)
+        spec = self._tool_specs.get(tool_name)
+        if spec is None:
+            raise ValueError(f"无效工具: {tool_name}")
+
+        # 首次调用时构建工具名称到绑定方法的映射
+        if self._tool_methods is None:
+            self._tool_methods = {name: getattr(self, item.method_name) for name, item in self._tool_specs.items()}
 
-        raise ValueError(f"无效工具: {tool_name}")
+        # 过滤掉不在方法签名中的参数，防止传递无效参数
+        filtered_kwargs = self._filter_parameters(spec, kwargs)
+        return await self._tool_methods[tool_name](**filtered_kwargs)
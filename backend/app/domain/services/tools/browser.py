@@ -5,6 +5,7 @@
 @Author : caixiaorong01@outlook.com
 @File   : browser.py
 """
+import asyncio
 from typing import Optional
 
 from .base import BaseTool, tool
@@ -15,9 +16,28 @@ from app.domain.models import ToolResult
 class BrowserTool(BaseTool):
     name: str = "browser"
 
-    def __init__(self, browser: Browser) -> None:
+    def __init__(self, browser: Browser, lease: Optional[asyncio.Lock] = None) -> None:
+        """
+        :param browser: 浏览器实例
+        :param lease: 多个Agent共享同一个浏览器时使用的租约锁，首次调用时获取，步骤结束时由调用方释放
+        """
         super().__init__()
         self.browser = browser
+        self._lease = lease
+        self._holding_lease = False
+
+    async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
+        """调用浏览器工具，共享浏览器时先获取租约，避免多个步骤交替操作同一个页面"""
+        if self._lease is not None and not self._holding_lease:
+            await self._lease.acquire()
+            self._holding_lease = True
+        return await super().invoke(tool_name, **kwargs)
+
+    def release_lease(self) -> None:
+        """释放浏览器租约，供其他Agent使用浏览器"""
+        if self._holding_lease:
+            self._holding_lease = False
+            self._lease.release()
 
     @tool(
         name="browser_view",
@@ -47,6 +47,8 @@ class FileTool(BaseTool):
             }
         },
         required=["filepath"],
+        parallel_safe=True,
+        cache_scopes=["file:{filepath}"],
     )
     async def read_file(
             self,
@@ -94,7 +96,8 @@ class FileTool(BaseTool):
                 "description": "(可选)是否使用 sudo 权限"
             }
         },
-        required=["filepath", "content"]
+        required=["filepath", "content"],
+        invalidates=["file:{filepath}", "dir:*"],
     )
     async def write_file(
             self,
@@ -135,7 +138,8 @@ class FileTool(BaseTool):
                 "description": "(可选)是否使用 sudo 权限"
             }
         },
-        required=["filepath", "old_str", "new_str"]
+        required=["filepath", "old_str", "new_str"],
+        invalidates=["file:{filepath}", "dir:*"],
     )
     async def replace_in_file(
             self,
@@ -168,7 +172,9 @@ class FileTool(BaseTool):
                 "description": "(可选)是否使用 sudo 权限"
             }
         },
-        required=["filepath", "regex"]
+        required=["filepath", "regex"],
+        parallel_safe=True,
+        cache_scopes=["file:{filepath}"],
     )
     async def search_in_file(
             self,
@@ -195,7 +201,9 @@ class FileTool(BaseTool):
                 "description": "使用 glob 语法通配符的文件名模式"
             }
         },
-        required=["dir_path", "glob_pattern"]
+        required=["dir_path", "glob_pattern"],
+        parallel_safe=True,
+        cache_scopes=["dir:{dir_path}"],
     )
     async def find_files(
             self,
@@ -216,7 +224,9 @@ class FileTool(BaseTool):
                 "description": "要列出文件列表的目录的绝对路径"
             },
         },
-        required=["dir_path"]
+        required=["dir_path"],
+        parallel_safe=True,
+        cache_scopes=["dir:{dir_path}"],
     )
     async def list_files(self, dir_path: str) -> ToolResult:
         return await self.sandbox.list_files(dir_path)
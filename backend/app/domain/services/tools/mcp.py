@@ -8,7 +8,7 @@
 import logging
 import os
 from contextlib import AsyncExitStack
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Set
 
 from mcp import ClientSession, Tool, StdioServerParameters, stdio_client
 from mcp.client.sse import sse_client
@@ -29,6 +29,7 @@ class MCPClientManager:
         self._clients: Dict[str, ClientSession] = {}
         self._tools: Dict[str, List[Tool]] = {}
         self._initialized: bool = False
+        self.read_only_tools: Set[str] = set()  # 声明了只读提示的工具名称
 
     @property
     def tools(self) -> Dict[str, List[Tool]]:
@@ -238,6 +239,7 @@ class MCPClientManager:
         """
         # 收集所有MCP服务器提供的工具
         all_tools = []
+        self.read_only_tools.clear()
         # 遍历所有已连接的MCP服务器及其工具列表
         for server_name, tools in self._tools.items():
             # 遍历每个服务器上的工具
@@ -266,6 +268,10 @@ class MCPClientManager:
                 # 将构建好的工具schema添加到结果列表中
                 all_tools.append(tool_schema)
 
+                # 记录声明了只读提示的工具，这类工具可以并行执行
+                if tool.annotations and tool.annotations.readOnlyHint:
+                    self.read_only_tools.add(tool_name)
+
         # 返回所有工具的schema列表
         return all_tools
 
@@ -363,6 +369,7 @@ class MCPTool(BaseTool):
         super().__init__()
         self._initialized: bool = False
         self._tools = []
+        self._tool_names: Set[str] = set()
         self._manager: MCPClientManager | None = None
 
     async def initialize(self, mcp_config: Optional[MCPConfig] = None) -> None:
@@ -376,8 +383,11 @@ class MCPTool(BaseTool):
             # 初始化MCP客户端管理器，建立与各MCP服务器的连接
             await self._manager.initialize()
 
-            # 获取所有MCP服务器提供的工具列表
+            # 获取所有MCP服务器提供的工具列表，并建立名称集合用于快速查找
             self._tools = await self._manager.get_all_tools()
+            self._tool_names = {tool["function"]["name"] for tool in self._tools}
+            # 工具集合发生变化，递增版本号通知Agent重建工具索引
+            self.version += 1
             # 标记初始化完成状态
             self._initialized = True
 
@@ -391,10 +401,13 @@ class MCPTool(BaseTool):
         """
         检查MCP工具集合中是否存在指定工具
         """
-        for tool in self._tools:
-            if tool["function"]["name"] == tool_name:
-                return True
-        return False
+        return tool_name in self._tool_names
+
+    def is_parallel_safe(self, tool_name: str) -> bool:
+        """
+        MCP工具声明了只读提示(readOnlyHint)时可并行执行
+        """
+        return self._manager is not None and tool_name in self._manager.read_only_tools
 
     async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
         """
@@ -11,7 +11,8 @@ from .base import BaseTool, tool
 from ...models import ToolResult
 
 
-class MessageTool(BaseTool):
+class NotifyMessageTool(BaseTool):
+    """仅能通知用户的消息工具，用于并行执行步骤的辅助Agent，避免多个步骤同时向用户提问"""
 
     def __init__(self) -> None:
         super().__init__()
@@ -31,6 +32,10 @@ class MessageTool(BaseTool):
         """发送通知消息给用户，不需要用户响应"""
         return ToolResult(success=True, data="Continue")
 
+
+class MessageTool(NotifyMessageTool):
+    """消息工具，支持通知用户与向用户提问"""
+
     @tool(
         name="message_ask_user",
         description="向用户提问并等待回复。用于：请求澄清、寻求确认、或收集额外信息。",
@@ -5,7 +5,7 @@
 @Author : caixiaorong01@outlook.com
 @File   : shell.py
 """
-from typing import Optional
+from typing import Optional, Dict, Any
 
 from app.domain.external import Sandbox
 from .base import BaseTool, tool
@@ -13,11 +13,27 @@ from ...models import ToolResult
 
 
 class ShellTool(BaseTool):
+    """
+    Shell工具，每次调用后失效会话内所有文件与目录的缓存读取结果
+    后台进程在调用结束后写入的文件无法感知，不会失效对应的缓存结果
+    """
     name: str = "shell"
 
-    def __init__(self, sandbox: Sandbox) -> None:
+    def __init__(self, sandbox: Sandbox, session_prefix: str = "") -> None:
+        """
+        :param sandbox: 沙箱实例
+        :param session_prefix: Shell会话id前缀，并行执行步骤的Agent使用不同前缀，避免模型选择相同的会话id时共用同一个Shell
+        """
         super().__init__()
         self.sandbox = sandbox
+        self._session_prefix = session_prefix
+
+    def prepare_args(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """为模型给出的会话id加上前缀，工具事件中记录的也是实际使用的会话id"""
+        session_id = args.get("session_id")
+        if self._session_prefix and isinstance(session_id, str) and not session_id.startswith(self._session_prefix):
+            return {**args, "session_id": f"{self._session_prefix}{session_id}"}
+        return args
 
     @tool(
         name="shell_execute",
@@ -37,6 +53,7 @@ class ShellTool(BaseTool):
             },
         },
         required=["session_id", "exec_dir", "command"],
+        invalidates=["file:*", "dir:*"],
     )
     async def shell_execute(
             self,
@@ -56,6 +73,7 @@ class ShellTool(BaseTool):
             },
         },
         required=["session_id"],
+        invalidates=["file:*", "dir:*"],
     )
     async def read_shell_output(self, session_id: str) -> ToolResult:
         """根据会话id查看Shell会话内容"""
@@ -75,6 +93,7 @@ class ShellTool(BaseTool):
             }
         },
         required=["session_id"],
+        invalidates=["file:*", "dir:*"],
     )
     async def shell_wait_process(self, session_id: str, seconds: Optional[int] = None) -> ToolResult:
         """等待指定shell会话中正在运行的进程返回"""
@@ -98,6 +117,7 @@ class ShellTool(BaseTool):
             }
         },
         required=["session_id", "input_text", "press_enter"],
+        invalidates=["file:*", "dir:*"],
     )
     async def shell_write_input(
             self,
@@ -118,6 +138,7 @@ class ShellTool(BaseTool):
             },
         },
         required=["session_id"],
+        invalidates=["file:*", "dir:*"],
     )
     async def shell_kill_process(self, session_id: str) -> ToolResult:
         """在指定Shell会话中终止正在运行的进程"""
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 01:10
+@Author : caixiaorong01@outlook.com
+@File   : tool_cache.py
+"""
+import fnmatch
+import glob
+import json
+import logging
+import posixpath
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.domain.models import ToolResult
+from .base import ToolSpec
+
+logger = logging.getLogger(__name__)
+
+
+class _ScopeArgs(defaultdict):
+    """作用域模板的参数，模板引用的参数缺失时按通配符处理，路径参数统一规范化"""
+
+    def __init__(self, args: Dict[str, Any], escape: bool) -> None:
+        super().__init__(lambda: "*")
+        for key, value in args.items():
+            if isinstance(value, str) and key in ("filepath", "dir_path"):
+                value = posixpath.normpath(value)
+            # 作为失效模式使用时转义参数中的通配符，避免路径中的[]等字符被当作模式
+            self[key] = glob.escape(str(value)) if escape else value
+
+
+class ToolResultCache:
+    """
+    会话级只读工具结果缓存，同一会话的所有Agent共享
+    工具通过@tool声明可缓存的作用域与调用后需要失效的作用域，例如写文件会失效该路径的读取结果
+    注意: 失效只发生在工具调用时，Shell中后台运行的进程(如nohup、&启动的命令)之后写入的文件不会触发失效，
+    在TTL内读取这些文件可能得到旧结果；浏览器页面会随时变化，浏览器工具的结果不缓存
+    """
+
+    # 进程内所有会话的累计统计
+    _totals: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+    # 沙箱文件在工具声明之外被修改(如MCP工具、消息附件同步)时需要失效的作用域
+    FILE_SCOPES: List[str] = ["file:*", "dir:*"]
+
+    def __init__(self, ttl_seconds: float = 300) -> None:
+        self._ttl_seconds = ttl_seconds
+        # 缓存键->(写入时间, 作用域列表, 工具结果)
+        self._entries: Dict[str, Tuple[float, List[str], ToolResult]] = {}
+        self._generation = 0  # 每次失效递增，用于丢弃与写操作并发执行的读取结果
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @classmethod
+    def _key(cls, function_name: str, args: Dict[str, Any]) -> str:
+        """缓存键：工具名称+规范化后的参数(忽略空值、按键排序)"""
+        normalized = {key: value for key, value in args.items() if value is not None}
+        return f"{function_name}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)}"
+
+    @classmethod
+    def _render(cls, templates: List[str], args: Dict[str, Any], escape: bool = False) -> List[str]:
+        scope_args = _ScopeArgs(args, escape)
+        return [template.format_map(scope_args) for template in templates]
+
+    def _count(self, name: str, value: int = 1) -> None:
+        self._stats[name] += value
+        self._totals[name] += value
+
+    def get(self, spec: ToolSpec, function_name: str, args: Dict[str, Any]) -> Optional[ToolResult]:
+        """读取缓存的工具结果，工具不可缓存或未命中时返回None"""
+        if not self.enabled or spec.cache_scopes is None:
+            return None
+
+        key = self._key(function_name, args)
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self._ttl_seconds:
+            self._count("hits")
+            logger.info(f"工具结果缓存命中: {function_name}")
+            return entry[2].model_copy(deep=True)
+
+        self._entries.pop(key, None)
+        self._count("misses")
+        return None
+
+    def put(self, spec: ToolSpec, function_name: str, args: Dict[str, Any], result: ToolResult,
+            generation: int) -> None:
+        """
+        写入工具结果，只缓存执行成功的结果
+        :param generation: 开始执行工具时的失效版本，执行期间发生过失效时结果可能已过期，不写入
+        """
+        if not self.enabled or spec.cache_scopes is None or not result.success or generation != self._generation:
+            return
+        scopes = self._render(spec.cache_scopes, args)
+        self._entries[self._key(function_name, args)] = (time.monotonic(), scopes, result.model_copy(deep=True))
+
+    def invalidate(self, spec: ToolSpec, args: Dict[str, Any]) -> None:
+        """根据工具声明的失效规则删除受影响的缓存结果"""
+        if not spec.invalidates:
+            return
+        self.invalidate_scopes(self._render(spec.invalidates, args, escape=True))
+
+    def invalidate_scopes(self, patterns: List[str]) -> None:
+        """删除作用域匹配任一失效模式的缓存结果"""
+        self._generation += 1
+        keys = [
+            key for key, (_, scopes, _) in self._entries.items()
+            if any(fnmatch.fnmatchcase(scope, pattern) for scope in scopes for pattern in patterns)
+        ]
+        for key in keys:
+            del self._entries[key]
+        if keys:
+            self._count("invalidations", len(keys))
+
+    def stats(self) -> Dict[str, Any]:
+        """当前会话的缓存统计"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    @classmethod
+    async def get_metrics(cls) -> Dict[str, Any]:
+        """进程内所有会话的累计缓存统计"""
+        lookups = cls._totals["hits"] + cls._totals["misses"]
+        return {**cls._totals, "hit_rate": cls._totals["hits"] / lookups if lookups else 0.0}
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 23:40
+@Author : caixiaorong01@outlook.com
+@File   : tool_output.py
+"""
+from typing import Optional
+
+from .base import BaseTool, tool
+from app.domain.external import BlobStore
+from app.domain.models import ToolResult
+
+
+def tool_output_key(session_id: str, handle: str) -> str:
+    """转存的工具结果在内容存储中的键"""
+    return f"tool_output:{session_id}:{handle}"
+
+
+class ToolOutputTool(BaseTool):
+    """工具结果读取工具，用于分页读取因过长而转存的工具结果"""
+
+    name: str = "tool_output"
+
+    def __init__(self, session_id: str, blob_store: BlobStore) -> None:
+        super().__init__()
+        self._session_id = session_id
+        self._blob_store = blob_store
+
+    @tool(
+        name="read_tool_output",
+        description="分页读取因内容过长而只在上下文中保留了预览的工具结果，仅在预览内容不足以完成任务时使用。",
+        parameters={
+            "handle": {
+                "type": "string",
+                "description": "工具结果预览中给出的handle",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "(可选)读取的起始字符位置，默认为0，继续读取时使用上次返回的next_offset",
+            },
+            "limit": {
+                "type": "integer",
+                "description": "(可选)本次读取的最大字符数，默认为10000",
+            },
+        },
+        required=["handle"],
+        parallel_safe=True,
+    )
+    async def read_tool_output(self, handle: str, offset: Optional[int] = None,
+                               limit: Optional[int] = None) -> ToolResult:
+        content = await self._blob_store.get(tool_output_key(self._session_id, handle))
+        if content is None:
+            return ToolResult(success=False, message=f"工具结果[{handle}]不存在或已过期")
+
+        offset = max(offset or 0, 0)
+        limit = min(max(limit or 10000, 1), 50000)
+        end = min(offset + limit, len(content))
+        return ToolResult(
+            success=True,
+            data={
+                "handle": handle,
+                "content": content[offset:end],
+                "offset": offset,
+                "next_offset": end if end < len(content) else None,
+                "total_chars": len(content),
+            },
+        )
@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 23:30
+@Author : caixiaorong01@outlook.com
+@File   : __init__.py.py
+"""
+from .cos_blob_store import CosBlobStore
+from .redis_blob_store import RedisBlobStore
+
+__all__ = ["RedisBlobStore", "CosBlobStore"]
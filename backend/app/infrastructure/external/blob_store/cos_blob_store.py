@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 00:10
+@Author : caixiaorong01@outlook.com
+@File   : cos_blob_store.py
+"""
+import logging
+from typing import Optional
+
+from qcloud_cos import CosServiceError
+from starlette.concurrency import run_in_threadpool
+
+from app.domain.external import BlobStore
+from app.infrastructure.storage import Cos
+
+logger = logging.getLogger(__name__)
+
+
+class CosBlobStore(BlobStore):
+    """基于COS的大块内容存储，用于需要长期保留的内容(如会话事件载荷)"""
+
+    def __init__(self, bucket: str, cos: Cos, prefix: str = "blobs") -> None:
+        self.bucket = bucket
+        self.cos = cos
+        self._prefix = prefix
+
+    def _object_key(self, key: str) -> str:
+        return f"{self._prefix}/{key}"
+
+    async def put(self, key: str, content: str) -> None:
+        """写入内容"""
+        await run_in_threadpool(
+            self.cos.client.put_object,
+            Bucket=self.bucket,
+            Body=content.encode("utf-8"),
+            Key=self._object_key(key),
+            EnableMD5=False,
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        """读取内容，对象不存在时返回None"""
+        try:
+            response = await run_in_threadpool(
+                self.cos.client.get_object,
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                KeySimplifyCheck=True,
+            )
+            body = await run_in_threadpool(response["Body"].get_raw_stream().read)
+            return body.decode("utf-8")
+        except CosServiceError as e:
+            if e.get_status_code() == 404:
+                return None
+            logger.error(f"读取内容[{key}]失败: {e.get_error_msg()}")
+            raise
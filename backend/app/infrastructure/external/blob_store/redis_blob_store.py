@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 23:30
+@Author : caixiaorong01@outlook.com
+@File   : redis_blob_store.py
+"""
+import logging
+from typing import Optional
+
+from app.domain.external import BlobStore
+from app.infrastructure.storage import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBlobStore(BlobStore):
+    """基于Redis实现的大块内容存储，内容带有过期时间，避免无限占用内存"""
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600) -> None:
+        self._redis = get_redis_client()
+        self._ttl_seconds = ttl_seconds
+
+    async def put(self, key: str, content: str) -> None:
+        """写入内容并设置过期时间"""
+        await self._redis.client.set(f"blob:{key}", content, ex=self._ttl_seconds)
+
+    async def get(self, key: str) -> Optional[str]:
+        """读取内容"""
+        return await self._redis.client.get(f"blob:{key}")
@@ -5,13 +5,17 @@
 @Author : caixiaorong01@outlook.com
 @File   : cos_file_storage.py.py
 """
+import asyncio
+import hashlib
 import logging
+import mimetypes
 import os.path
 import uuid
 from datetime import datetime
-from typing import Tuple, BinaryIO, Callable
+from typing import Tuple, BinaryIO, Callable, Optional, AsyncIterator, AsyncGenerator, Dict, Any, List
 
 from fastapi import UploadFile
+from qcloud_cos import CosServiceError
 from starlette.concurrency import run_in_threadpool
 
 from app.domain.external import FileStorage
@@ -30,15 +34,50 @@ class CosFileStorage(FileStorage):
             bucket: str,
             cos: Cos,
             uow_factory: Callable[[], IUnitOfWork],
+            part_size: int = 8 * 1024 * 1024,
+            multipart_concurrency: int = 4,
     ) -> None:
-        """构造函数，完成cos文件存储桶扩展初始化"""
+        """
+        构造函数，完成cos文件存储桶扩展初始化
+        :param part_size: 流式上传的分块大小，cos要求除最后一块外每块不小于1MB
+        :param multipart_concurrency: 流式上传时同时上传的分块数
+        """
         self.bucket = bucket
         self.cos = cos
         self._uow_factory = uow_factory
-        self._uow = uow_factory()
+        self._part_size = max(part_size, 1024 * 1024)
+        self._multipart_concurrency = max(multipart_concurrency, 1)
 
-    async def upload_file(self, upload_file: UploadFile) -> File:
-        """根据传递的文件源将文件上传到腾讯云cos"""
+    @classmethod
+    def _content_key(cls, sha256: str, file_extension: str) -> str:
+        """内容寻址路径，相同内容的文件共享同一个对象"""
+        return f"sha256/{sha256[:2]}/{sha256}{file_extension}"
+
+    @classmethod
+    def _date_key(cls, file_id: str, file_extension: str) -> str:
+        """按日期组织的路径"""
+        date_path = datetime.now().strftime("%Y/%m/%d")
+        return f"{date_path}/{file_id}{file_extension}"
+
+    async def _head_object(self, cos_key: str) -> Optional[int]:
+        """查询cos中的对象，存在时返回对象大小，不存在时返回None"""
+        try:
+            response = await run_in_threadpool(self.cos.client.head_object, Bucket=self.bucket, Key=cos_key)
+            return int(response.get("Content-Length") or 0)
+        except CosServiceError as e:
+            if e.get_status_code() == 404:
+                return None
+            raise
+
+    async def _save_file(self, file: File) -> File:
+        """保存文件记录，存储实例在多个会话及后台任务间共享，每次操作使用独立的UoW"""
+        uow = self._uow_factory()
+        async with uow:
+            await uow.file.save(file)
+        return file
+
+    async def upload_file(self, upload_file: UploadFile, sha256: Optional[str] = None) -> File:
+        """根据传递的文件源将文件上传到腾讯云cos，传递内容哈希时按哈希寻址存储"""
         try:
             # 生成唯一文件ID
             file_id = str(uuid.uuid4())
@@ -48,45 +87,190 @@ class CosFileStorage(FileStorage):
             if not file_extension:
                 file_extension = ""
 
-            # 创建按日期组织的路径
-            date_path = datetime.now().strftime("%Y/%m/%d")
-            cos_key = f"{date_path}/{file_id}{file_extension}"
+            if sha256:
+                # 内容寻址路径，对象已存在时无需重复上传
+                cos_key = self._content_key(sha256, file_extension)
+                exists = await self._head_object(cos_key) is not None
+            else:
+                cos_key = self._date_key(file_id, file_extension)
+                exists = False
 
             # 将文件上传到腾讯云COS
-            await run_in_threadpool(
-                self.cos.client.put_object,
-                Bucket=self.bucket,
-                Body=upload_file.file,
-                Key=cos_key,
-                EnableMD5=False,
-            )
-            logger.info(f"文件上传成功: {upload_file.filename} (ID: {file_id})")
+            if exists:
+                logger.info(f"文件内容已存在, 跳过上传: {upload_file.filename} (ID: {file_id})")
+            else:
+                await run_in_threadpool(
+                    self.cos.client.put_object,
+                    Bucket=self.bucket,
+                    Body=upload_file.file,
+                    Key=cos_key,
+                    EnableMD5=False,
+                )
+                logger.info(f"文件上传成功: {upload_file.filename} (ID: {file_id})")
 
             # 创建文件对象并保存到数据库
-            file = File(
+            return await self._save_file(File(
                 id=file_id,
                 filename=upload_file.filename,
                 key=cos_key,
                 extension=file_extension,
                 mime_type=upload_file.content_type or "",
                 size=upload_file.size,
-            )
-            async with self._uow:
-                await self._uow.file.save(file)
-
-            return file
+                sha256=sha256 or "",
+            ))
         except Exception as e:
             logger.error(f"上传文件[{upload_file.filename}]失败: {str(e)}")
             raise
 
+    async def _upload_part(
+            self,
+            cos_key: str,
+            upload_id: str,
+            part_number: int,
+            body: bytes,
+            semaphore: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        """上传单个分块，完成后释放并发名额，使读取端可以继续读取下一块"""
+        try:
+            response = await run_in_threadpool(
+                self.cos.client.upload_part,
+                Bucket=self.bucket,
+                Key=cos_key,
+                Body=body,
+                PartNumber=part_number,
+                UploadId=upload_id,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            semaphore.release()
+
+    async def upload_stream(self, stream: AsyncIterator[bytes], filename: str, sha256: Optional[str] = None) -> File:
+        """
+        流式上传文件到腾讯云cos，文件不足一个分块时直接上传，否则使用分块上传
+        内存中最多保留一个正在填充的分块与并发上传中的分块，大小与哈希在读取过程中计算
+        """
+        file_id = str(uuid.uuid4())
+        _, file_extension = os.path.splitext(filename)
+        mime_type = mimetypes.guess_type(filename)[0] or ""
+
+        # 已知内容哈希且对象已存在时无需读取文件流
+        if sha256:
+            cos_key = self._content_key(sha256, file_extension)
+            size = await self._head_object(cos_key)
+            if size is not None:
+                logger.info(f"文件内容已存在, 跳过上传: {filename} (ID: {file_id})")
+                return await self._save_file(File(
+                    id=file_id,
+                    filename=filename,
+                    key=cos_key,
+                    extension=file_extension,
+                    mime_type=mime_type,
+                    size=size,
+                    sha256=sha256,
+                ))
+        else:
+            cos_key = self._date_key(file_id, file_extension)
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        upload_id: Optional[str] = None
+        part_tasks: List[asyncio.Task] = []
+        semaphore = asyncio.Semaphore(self._multipart_concurrency)
+        try:
+            async for chunk in stream:
+                digest.update(chunk)
+                size += len(chunk)
+                buffer += chunk
+                while len(buffer) >= self._part_size:
+                    if upload_id is None:
+                        response = await run_in_threadpool(
+                            self.cos.client.create_multipart_upload,
+                            Bucket=self.bucket,
+                            Key=cos_key,
+                        )
+                        upload_id = response["UploadId"]
+                    body = bytes(buffer[:self._part_size])
+                    del buffer[:self._part_size]
+                    # 并发上传的分块已满时暂停读取，限制内存占用
+                    await semaphore.acquire()
+                    part_tasks.append(asyncio.create_task(
+                        self._upload_part(cos_key, upload_id, len(part_tasks) + 1, body, semaphore)
+                    ))
+
+            content_sha256 = digest.hexdigest()
+            if sha256 and content_sha256 != sha256:
+                raise ValueError(f"文件内容在上传过程中发生变化: {filename}")
+
+            if upload_id is None:
+                # 文件不足一个分块，此时已得到内容哈希，按哈希寻址后直接上传
+                cos_key = self._content_key(content_sha256, file_extension)
+                if await self._head_object(cos_key) is None:
+                    await run_in_threadpool(
+                        self.cos.client.put_object,
+                        Bucket=self.bucket,
+                        Body=bytes(buffer),
+                        Key=cos_key,
+                        EnableMD5=False,
+                    )
+            else:
+                # 上传最后一个分块并合并
+                if buffer:
+                    await semaphore.acquire()
+                    part_tasks.append(asyncio.create_task(
+                        self._upload_part(cos_key, upload_id, len(part_tasks) + 1, bytes(buffer), semaphore)
+                    ))
+                    buffer.clear()
+                parts = await asyncio.gather(*part_tasks)
+                await run_in_threadpool(
+                    self.cos.client.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=cos_key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Part": parts},
+                )
+            logger.info(f"文件流式上传成功: {filename} (ID: {file_id}, 大小: {size})")
+        except BaseException as e:
+            # 取消进行中的分块并中止分块上传，避免残留未完成的分块
+            for part_task in part_tasks:
+                part_task.cancel()
+            if upload_id is not None:
+                try:
+                    await run_in_threadpool(
+                        self.cos.client.abort_multipart_upload,
+                        Bucket=self.bucket,
+                        Key=cos_key,
+                        UploadId=upload_id,
+                    )
+                except Exception as abort_error:
+                    logger.warning(f"中止分块上传[{cos_key}]失败: {abort_error}")
+            logger.error(f"流式上传文件[{filename}]失败: {str(e)}")
+            raise
+
+        return await self._save_file(File(
+            id=file_id,
+            filename=filename,
+            key=cos_key,
+            extension=file_extension,
+            mime_type=mime_type,
+            size=size,
+            sha256=content_sha256,
+        ))
+
+    async def _get_file(self, file_id: str) -> File:
+        """根据文件ID从数据库获取文件记录"""
+        uow = self._uow_factory()
+        async with uow:
+            file = await uow.file.get_by_id(file_id)
+        if not file:
+            raise ValueError(f"该文件不存在, 文件id: {file_id}")
+        return file
+
     async def download_file(self, file_id: str) -> Tuple[BinaryIO, File]:
         """根据文件id查询数据并下载文件"""
         try:
             # 根据文件ID从数据库获取文件记录
-            async with self._uow:
-                file = await self._uow.file.get_by_id(file_id)
-            if not file:
-                raise ValueError(f"该文件不存在, 文件id: {file_id}")
+            file = await self._get_file(file_id)
 
             # 从腾讯云COS下载文件内容
             response = await run_in_threadpool(
@@ -101,3 +285,32 @@ class CosFileStorage(FileStorage):
         except Exception as e:
             logger.error(f"下载文件[{file_id}]失败: {str(e)}")
             raise
+
+    async def stream_download_file(
+            self,
+            file_id: str,
+            chunk_size: int = 1024 * 1024,
+    ) -> Tuple[AsyncGenerator[bytes, None], File]:
+        """根据文件id查询数据并流式下载文件，每块在线程中读取，避免阻塞事件循环"""
+        try:
+            file = await self._get_file(file_id)
+            response = await run_in_threadpool(
+                self.cos.client.get_object,
+                Bucket=self.bucket,
+                Key=file.key,
+                KeySimplifyCheck=True
+            )
+        except Exception as e:
+            logger.error(f"下载文件[{file_id}]失败: {str(e)}")
+            raise
+
+        raw_stream = response["Body"].get_raw_stream()
+
+        async def iter_chunks() -> AsyncGenerator[bytes, None]:
+            try:
+                while chunk := await run_in_threadpool(raw_stream.read, chunk_size):
+                    yield chunk
+            finally:
+                raw_stream.close()
+
+        return iter_chunks(), file
@@ -5,7 +5,9 @@
 @Author : caixiaorong01@outlook.com
 @File   : repair_json_parser.py
 """
+import json
 import logging
+import re
 from typing import Optional, Any, Union, Dict, List
 
 import json_repair
@@ -14,15 +16,53 @@ from app.domain.external import JSONParser
 
 logger = logging.getLogger(__name__)
 
+# 模型返回内容外层的markdown代码块标记，如```json ... ```
+_CODE_FENCE_PATTERN = re.compile(r"^```[a-zA-Z]*\s*\n?(.*?)\n?```$", re.DOTALL)
+
 
 class RepairJsonParser(JSONParser):
-    """修复json解析器"""
+    """修复json解析器，优先使用标准库严格解析，失败时才使用json_repair修复"""
+
+    def __init__(self) -> None:
+        self._strict_count = 0  # 严格解析成功次数
+        self._repair_count = 0  # 需要修复的次数
+
+    @classmethod
+    def _strict_parse(cls, text: str) -> Any:
+        """严格解析json，兼容外层包裹markdown代码块的情况"""
+        try:
+            return json.loads(text)
+        except ValueError:
+            match = _CODE_FENCE_PATTERN.match(text.strip())
+            if not match:
+                raise
+            return json.loads(match.group(1))
 
     async def invoke(self, text: str, default_value: Optional[Any] = None) -> Union[Dict, List, Any]:
-        logger.info(f"开始修复json: {text}")
         if not text or text.strip() == "":
             if default_value is not None:
                 return default_value
             raise ValueError("输入文本为空")
 
+        # 1.快速路径：大部分模型输出本身就是合法的json
+        try:
+            result = self._strict_parse(text)
+            self._strict_count += 1
+            return result
+        except ValueError:
+            pass
+
+        # 2.严格解析失败时使用json_repair修复
+        self._repair_count += 1
+        logger.info(f"json严格解析失败, 使用json_repair修复, 文本长度: {len(text)}")
+        logger.debug(f"待修复的json: {text}")
         return json_repair.repair_json(text, ensure_ascii=False, return_objects=True)
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """获取严格解析与修复的次数统计"""
+        total = self._strict_count + self._repair_count
+        return {
+            "strict": self._strict_count,
+            "repaired": self._repair_count,
+            "repair_rate": round(self._repair_count / total, 4) if total else 0.0,
+        }
@@ -5,6 +5,18 @@
 @Author : caixiaorong01@outlook.com
 @File   : __init__.py.py
 """
+from .cached_llm import CachedLLM
+from .governed_llm import GovernedLLM
+from .llm_cache import LLMCache, MemoryLLMCache, RedisLLMCache
+from .llm_governor import RedisLLMGovernor
 from .openai_llm import OpenAILLM
 
-__all__ = ["OpenAILLM"]
+__all__ = [
+    "OpenAILLM",
+    "CachedLLM",
+    "GovernedLLM",
+    "LLMCache",
+    "MemoryLLMCache",
+    "RedisLLMCache",
+    "RedisLLMGovernor",
+]
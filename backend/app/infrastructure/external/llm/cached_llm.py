@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 10:40
+@Author : caixiaorong01@outlook.com
+@File   : cached_llm.py
+"""
+import hashlib
+import json
+import logging
+from contextlib import aclosing
+from typing import Dict, Any, AsyncGenerator, Optional
+
+from app.domain.external import LLM, llm_call_context
+from app.domain.models import LLMCacheConfig
+from .llm_cache import LLMCache
+
+logger = logging.getLogger(__name__)
+
+
+class CachedLLM(LLM):
+    """带精确匹配响应缓存的LLM包装器，请求完全相同时直接返回缓存的响应"""
+
+    def __init__(self, llm: LLM, cache: LLMCache, cache_config: LLMCacheConfig) -> None:
+        self._llm = llm
+        self._cache = cache
+        self._cache_config = cache_config
+
+    @property
+    def model_name(self) -> str:
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        return self._llm.max_tokens
+
+    @property
+    def context_budget(self) -> int:
+        return self._llm.context_budget
+
+    @property
+    def streaming(self) -> bool:
+        return self._llm.streaming
+
+    @property
+    def parallel_tool_calls(self) -> bool:
+        return self._llm.parallel_tool_calls
+
+    async def aclose(self) -> None:
+        await self._llm.aclose()
+
+    def _cacheable(self) -> bool:
+        """判断当前调用是否允许使用缓存: 调用方Agent已开启缓存，且(按配置)温度为0"""
+        agent = llm_call_context.get().get("agent")
+        if agent not in self._cache_config.agents:
+            return False
+        return not self._cache_config.deterministic_only or self._llm.temperature == 0
+
+    def _build_key(
+            self,
+            messages: list[Dict[str, Any]],
+            tools: list[Dict[str, Any]] = None,
+            response_format: Dict[str, Any] = None,
+            tool_choice: str = None,
+    ) -> str:
+        """将模型参数与请求内容规范化序列化后计算哈希，作为缓存键"""
+        payload = {
+            "model": self._llm.model_name,
+            "temperature": self._llm.temperature,
+            "max_tokens": self._llm.max_tokens,
+            "messages": messages,
+            "tools": tools or None,
+            "response_format": response_format,
+            "tool_choice": tool_choice,
+            "parallel_tool_calls": self._llm.parallel_tool_calls,
+        }
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        message = await self._cache.get(key)
+        if message is not None:
+            logger.info(f"模型响应缓存命中: {key[:16]}")
+        return message
+
+    async def invoke(self,
+                     messages: list[Dict[str, Any]],
+                     tools: list[Dict[str, Any]] = None,
+                     response_format: Dict[str, Any] = None,
+                     tool_choice: str = None,
+                     ) -> Dict[str, Any]:
+        # 1.不满足缓存条件则直接调用模型
+        if not self._cacheable():
+            return await self._llm.invoke(messages, tools, response_format, tool_choice)
+
+        # 2.命中缓存则直接返回
+        key = self._build_key(messages, tools, response_format, tool_choice)
+        message = await self._get_cached(key)
+        if message is not None:
+            return message
+
+        # 3.未命中则调用模型并写入缓存
+        message = await self._llm.invoke(messages, tools, response_format, tool_choice)
+        await self._cache.set(key, message)
+        return message
+
+    async def stream(self,
+                     messages: list[Dict[str, Any]],
+                     tools: list[Dict[str, Any]] = None,
+                     response_format: Dict[str, Any] = None,
+                     tool_choice: str = None,
+                     ) -> AsyncGenerator[Dict[str, Any], None]:
+        # 1.不满足缓存条件则直接透传流式输出
+        if not self._cacheable():
+            # 调用方关闭生成器时同步关闭内层的流，避免内层的清理推迟到事件循环回收生成器时
+            async with aclosing(self._llm.stream(messages, tools, response_format, tool_choice)) as stream:
+                async for chunk in stream:
+                    yield chunk
+            return
+
+        # 2.命中缓存则将完整消息作为一个增量块输出，保持流式调用的数据格式
+        key = self._build_key(messages, tools, response_format, tool_choice)
+        message = await self._get_cached(key)
+        if message is not None:
+            yield {
+                "type": "delta",
+                "content": message.get("content") or "",
+                "reasoning_content": message.get("reasoning_content") or "",
+                "tool_calls": [],
+            }
+            yield {"type": "message", "message": message}
+            return
+
+        # 3.未命中则透传流式输出，并在拿到完整消息后写入缓存
+        async with aclosing(self._llm.stream(messages, tools, response_format, tool_choice)) as stream:
+            async for chunk in stream:
+                if chunk.get("type") == "message":
+                    await self._cache.set(key, chunk["message"])
+                yield chunk
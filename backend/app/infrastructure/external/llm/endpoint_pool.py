@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 12:10
+@Author : caixiaorong01@outlook.com
+@File   : endpoint_pool.py
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import List, Optional, Callable, Awaitable, TypeVar, Set, Tuple
+
+import openai
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ErrorKind(str, Enum):
+    """模型调用错误分类"""
+    RETRYABLE = "retryable"  # 暂时性错误(限流、超时、连接失败、服务端错误)，可退避后重试
+    ENDPOINT_FATAL = "endpoint_fatal"  # 端点自身不可用(鉴权失败、模型不存在)，换端点重试
+    FATAL = "fatal"  # 请求本身有误，重试无意义
+
+
+def _parse_retry_after(error: Exception) -> Optional[float]:
+    """从响应头中解析Retry-After(秒数或HTTP日期)，解析失败返回None"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+def classify_error(error: Exception) -> Tuple[ErrorKind, Optional[float]]:
+    """对模型调用异常进行分类，返回错误类型与服务端建议的重试等待时间"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return ErrorKind.RETRYABLE, None
+    if isinstance(error, openai.APIStatusError):
+        status_code = error.status_code
+        if status_code in (408, 409, 429) or status_code >= 500:
+            return ErrorKind.RETRYABLE, _parse_retry_after(error)
+        if status_code in (401, 403, 404):
+            return ErrorKind.ENDPOINT_FATAL, None
+    return ErrorKind.FATAL, None
+
+
+class CircuitBreaker:
+    """熔断器，连续失败达到阈值后打开，冷却结束后放行试探请求，成功则关闭"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """熔断器未打开或冷却已结束(半开状态)时可用"""
+        return time.monotonic() >= self._open_until
+
+    @property
+    def remaining(self) -> float:
+        """距离冷却结束的剩余时间"""
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._open_until = 0.0
+
+    def record_failure(self, cooldown: Optional[float] = None) -> None:
+        """记录一次失败，cooldown为服务端要求的等待时间，存在时直接按该时间暂停使用"""
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            self._open_until = time.monotonic() + self._reset_seconds
+            logger.warning(f"模型端点连续失败{self._failures}次, 熔断{self._reset_seconds}秒")
+        if cooldown:
+            self._open_until = max(self._open_until, time.monotonic() + cooldown)
+
+    def trip(self) -> None:
+        """端点不可用时直接打开熔断器"""
+        self._failures = max(self._failures, self._failure_threshold)
+        self._open_until = time.monotonic() + self._reset_seconds
+
+
+class LLMEndpoint:
+    """模型端点，包含客户端、负载权重与熔断器"""
+
+    def __init__(self, name: str, client: AsyncOpenAI, weight: int, breaker: CircuitBreaker) -> None:
+        self.name = name
+        self.client = client
+        self.weight = weight
+        self.breaker = breaker
+
+
+class LLMEndpointPool:
+    """多端点模型客户端池，按权重负载均衡，失败时带抖动指数退避并故障转移到其他端点"""
+
+    def __init__(
+            self,
+            endpoints: List[LLMEndpoint],
+            max_attempts: int = 4,
+            backoff_base_seconds: float = 0.5,
+            backoff_max_seconds: float = 30.0,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("模型端点列表不能为空")
+        self._endpoints = endpoints
+        self._max_attempts = max_attempts
+        self._backoff_base_seconds = backoff_base_seconds
+        self._backoff_max_seconds = backoff_max_seconds
+
+    async def aclose(self) -> None:
+        """关闭所有端点的客户端"""
+        for endpoint in self._endpoints:
+            try:
+                await endpoint.client.close()
+            except Exception as e:
+                logger.warning(f"关闭模型端点[{endpoint.name}]客户端失败: {e}")
+
+    def _select(self, excluded: Set[str]) -> Optional[LLMEndpoint]:
+        """在可用且本轮未尝试过的端点中按权重随机选择一个"""
+        candidates = [
+            endpoint for endpoint in self._endpoints
+            if endpoint.breaker.available and endpoint.name not in excluded
+        ]
+        if not candidates:
+            return None
+        return random.choices(candidates, weights=[endpoint.weight for endpoint in candidates], k=1)[0]
+
+    def _backoff(self, attempt: int) -> float:
+        """计算退避时间: 带完全抖动的指数退避，且不短于最早恢复的端点的冷却时间"""
+        delay = random.uniform(0, min(self._backoff_max_seconds, self._backoff_base_seconds * (2 ** attempt)))
+        cooldown = min(endpoint.breaker.remaining for endpoint in self._endpoints)
+        return max(delay, cooldown)
+
+    async def execute(self, operation: Callable[[AsyncOpenAI], Awaitable[T]]) -> Tuple[T, int]:
+        """
+        在端点池上执行模型调用
+        :param operation: 接收客户端并发起调用的函数
+        :return: 调用结果与重试次数，所有尝试失败后抛出最后一次的异常
+        """
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self._max_attempts):
+            # 1.优先切换到本轮未尝试过的端点，全部尝试过后退避等待再开始新一轮
+            endpoint = self._select(tried)
+            if endpoint is None:
+                delay = self._backoff(attempt)
+                if delay > self._backoff_max_seconds * 2:
+                    break
+                logger.info(f"暂无可用的模型端点, {delay:.2f}秒后重试")
+                await asyncio.sleep(delay)
+                tried.clear()
+                endpoint = self._select(tried)
+                if endpoint is None:
+                    break
+
+            # 2.发起调用，根据错误类型决定重试、换端点或直接抛出
+            try:
+                result = await operation(endpoint.client)
+                endpoint.breaker.record_success()
+                return result, attempt
+            except Exception as e:
+                kind, retry_after = classify_error(e)
+                if kind == ErrorKind.FATAL:
+                    raise
+                logger.warning(f"模型端点[{endpoint.name}]调用失败({kind.value}): {e}")
+                if kind == ErrorKind.ENDPOINT_FATAL:
+                    endpoint.breaker.trip()
+                else:
+                    endpoint.breaker.record_failure(retry_after)
+                tried.add(endpoint.name)
+                last_error = e
+
+        if last_error is None:
+            raise RuntimeError("所有模型端点均处于熔断状态")
+        raise last_error
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 13:40
+@Author : caixiaorong01@outlook.com
+@File   : governed_llm.py
+"""
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Dict, Any, AsyncGenerator
+
+from app.domain.external import LLM, llm_call_context
+from app.domain.services.context import count_messages_tokens, count_tools_tokens, count_message_tokens
+from .llm_governor import RedisLLMGovernor
+
+logger = logging.getLogger(__name__)
+
+
+class GovernedLLM(LLM):
+    """受全局限流器约束的LLM包装器，调用前排队获取并发与token配额，调用结束后释放"""
+
+    def __init__(self, llm: LLM, governor: RedisLLMGovernor) -> None:
+        self._llm = llm
+        self._governor = governor
+
+    @property
+    def model_name(self) -> str:
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        return self._llm.max_tokens
+
+    @property
+    def context_budget(self) -> int:
+        return self._llm.context_budget
+
+    @property
+    def streaming(self) -> bool:
+        return self._llm.streaming
+
+    @property
+    def parallel_tool_calls(self) -> bool:
+        return self._llm.parallel_tool_calls
+
+    async def aclose(self) -> None:
+        await self._llm.aclose()
+
+    async def _acquire(self, messages: list[Dict[str, Any]], tools: list[Dict[str, Any]] = None) -> str:
+        """按提示词的预估token数获取配额，生成内容的token数在调用结束后补记"""
+        session_id = llm_call_context.get().get("session_id") or ""
+        tokens = count_messages_tokens(messages) + count_tools_tokens(tools)
+        return await self._governor.acquire(session_id, tokens)
+
+    async def _renew(self, lease_id: str) -> None:
+        """调用期间定期续约并发租约，耗时超过租约时长的调用(如长时间的流式输出)不会被其他请求挤占并发"""
+        interval = self._governor.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            await self._governor.renew(lease_id)
+
+    async def _release(self, lease_id: str, renewal: asyncio.Task, message: Dict[str, Any] = None) -> None:
+        renewal.cancel()
+        # 释放配额不能被取消打断，否则并发租约只能等待过期
+        tokens = count_message_tokens(message) if message else 0
+        await asyncio.shield(self._governor.release(lease_id, tokens))
+
+    async def invoke(self,
+                     messages: list[Dict[str, Any]],
+                     tools: list[Dict[str, Any]] = None,
+                     response_format: Dict[str, Any] = None,
+                     tool_choice: str = None,
+                     ) -> Dict[str, Any]:
+        lease_id = await self._acquire(messages, tools)
+        renewal = asyncio.create_task(self._renew(lease_id))
+        message = None
+        try:
+            message = await self._llm.invoke(messages, tools, response_format, tool_choice)
+            return message
+        finally:
+            await self._release(lease_id, renewal, message)
+
+    async def stream(self,
+                     messages: list[Dict[str, Any]],
+                     tools: list[Dict[str, Any]] = None,
+                     response_format: Dict[str, Any] = None,
+                     tool_choice: str = None,
+                     ) -> AsyncGenerator[Dict[str, Any], None]:
+        lease_id = await self._acquire(messages, tools)
+        renewal = asyncio.create_task(self._renew(lease_id))
+        message = None
+        try:
+            # 调用方关闭生成器时同步关闭内层的流，使其清理(遥测记录、连接关闭)在释放配额前完成
+            async with aclosing(self._llm.stream(messages, tools, response_format, tool_choice)) as stream:
+                async for chunk in stream:
+                    if chunk.get("type") == "message":
+                        message = chunk["message"]
+                    yield chunk
+        finally:
+            await self._release(lease_id, renewal, message)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 10:20
+@Author : caixiaorong01@outlook.com
+@File   : llm_cache.py
+"""
+import asyncio
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Protocol, Optional, Dict, Any, Tuple
+
+from app.infrastructure.storage.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache(Protocol):
+    """模型响应缓存后端协议"""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """根据缓存键获取模型响应消息，未命中返回None"""
+        ...
+
+    async def set(self, key: str, message: Dict[str, Any]) -> None:
+        """写入模型响应消息"""
+        ...
+
+    async def stats(self) -> Dict[str, int]:
+        """获取命中/未命中统计"""
+        ...
+
+
+class MemoryLLMCache:
+    """基于进程内存的模型响应缓存，使用LRU+TTL淘汰"""
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 1000) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            entry = self._entries.get(key)
+            # 1.未命中或已过期则记为未命中，过期条目顺带删除
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self._misses += 1
+                return None
+
+            # 2.命中则移动到末尾，标记为最近使用
+            self._entries.move_to_end(key)
+            self._hits += 1
+            # 返回副本，避免调用方修改消息影响缓存内容
+            return copy.deepcopy(entry[1])
+
+    async def set(self, key: str, message: Dict[str, Any]) -> None:
+        async with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, copy.deepcopy(message))
+            self._entries.move_to_end(key)
+
+            # 超出容量时淘汰最久未使用的条目
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    async def stats(self) -> Dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
+
+
+class RedisLLMCache:
+    """基于Redis的模型响应缓存，多个节点共享，使用TTL过期并按最近访问时间淘汰超出容量的条目"""
+
+    _prefix = "llm_cache"
+
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 1000) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._redis = get_redis_client()
+
+    @property
+    def _index_key(self) -> str:
+        """记录缓存键最近访问时间的有序集合，用于按容量淘汰"""
+        return f"{self._prefix}:index"
+
+    @property
+    def _stats_key(self) -> str:
+        return f"{self._prefix}:stats"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self._prefix}:entry:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await self._redis.client.get(self._entry_key(key))
+            if value is None:
+                await self._redis.client.hincrby(self._stats_key, "misses", 1)
+                return None
+
+            # 命中则刷新最近访问时间
+            pipe = self._redis.client.pipeline(transaction=False)
+            pipe.zadd(self._index_key, {key: time.time()})
+            pipe.hincrby(self._stats_key, "hits", 1)
+            await pipe.execute()
+            return json.loads(value)
+        except Exception as e:
+            # 缓存不可用时降级为未命中，不影响正常调用
+            logger.warning(f"读取模型响应缓存失败: {e}")
+            return None
+
+    async def set(self, key: str, message: Dict[str, Any]) -> None:
+        try:
+            pipe = self._redis.client.pipeline(transaction=False)
+            pipe.set(self._entry_key(key), json.dumps(message, ensure_ascii=False), ex=self._ttl_seconds)
+            pipe.zadd(self._index_key, {key: time.time()})
+            # 清理已过期条目的索引，并淘汰超出容量的最久未访问条目
+            pipe.zremrangebyscore(self._index_key, 0, time.time() - self._ttl_seconds)
+            pipe.zcard(self._index_key)
+            results = await pipe.execute()
+
+            overflow = results[-1] - self._max_entries
+            if overflow > 0:
+                evicted = await self._redis.client.zpopmin(self._index_key, overflow)
+                if evicted:
+                    await self._redis.client.delete(*[self._entry_key(member) for member, _ in evicted])
+        except Exception as e:
+            logger.warning(f"写入模型响应缓存失败: {e}")
+
+    async def stats(self) -> Dict[str, int]:
+        stats = await self._redis.client.hgetall(self._stats_key)
+        return {
+            "hits": int(stats.get("hits", 0)),
+            "misses": int(stats.get("misses", 0)),
+            "entries": await self._redis.client.zcard(self._index_key),
+        }
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 13:10
+@Author : caixiaorong01@outlook.com
+@File   : llm_governor.py
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional, Deque, Tuple, Dict, Any
+
+from app.infrastructure.storage.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLLMGovernor:
+    """
+    模型调用限流器，通过Redis在多个节点之间共享并发数与每分钟token数配额
+    本进程内的等待请求按会话轮询放行，避免单个会话占满配额
+    """
+
+    # 清理过期租约后，同时检查并发数与滑动窗口内的token数，均满足时登记租约并计入token
+    # 返回1表示获取成功，0表示并发已满，-1表示token配额不足
+    _acquire_script = """
+    redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+    local max_concurrency = tonumber(ARGV[4])
+    if max_concurrency > 0 and redis.call("ZCARD", KEYS[1]) >= max_concurrency then
+        return 0
+    end
+    local tpm_limit = tonumber(ARGV[5])
+    local tokens = tonumber(ARGV[6])
+    if tpm_limit > 0 then
+        local current = tonumber(redis.call("GET", KEYS[2]) or "0")
+        local previous = tonumber(redis.call("GET", KEYS[3]) or "0")
+        local used = current + previous * (1 - tonumber(ARGV[7]))
+        if used > 0 and used + tokens > tpm_limit then
+            return -1
+        end
+    end
+    redis.call("ZADD", KEYS[1], ARGV[3], ARGV[2])
+    if tpm_limit > 0 then
+        redis.call("INCRBY", KEYS[2], tokens)
+        redis.call("EXPIRE", KEYS[2], 120)
+    end
+    return 1
+    """
+
+    def __init__(
+            self,
+            scope: str,
+            max_concurrency: int = 16,
+            tokens_per_minute: int = 0,
+            lease_seconds: int = 600,
+            poll_interval: float = 0.2,
+    ) -> None:
+        """
+        :param scope: 配额作用域，同一作用域(同一模型服务)的调用共享配额
+        :param max_concurrency: 最大并发请求数，0表示不限制
+        :param tokens_per_minute: 每分钟token数上限，0表示不限制
+        :param lease_seconds: 并发租约的过期时间，防止节点异常退出后租约无法释放，调用期间由调用方定期续约
+        :param poll_interval: 配额不足时重新检查的间隔
+        """
+        self._redis = get_redis_client()
+        self._scope = scope
+        self._max_concurrency = max_concurrency
+        self._tokens_per_minute = tokens_per_minute
+        self._lease_seconds = lease_seconds
+        self._poll_interval = poll_interval
+
+        # 按会话分组的等待队列，放行时在会话之间轮询
+        self._queues: OrderedDict[str, Deque[Tuple[asyncio.Future, int]]] = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # 排队等待指标
+        self._acquired = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    @property
+    def _inflight_key(self) -> str:
+        return f"llm_governor:{self._scope}:inflight"
+
+    def _tpm_keys(self) -> Tuple[str, str, float]:
+        """获取当前与上一分钟的token计数键，以及当前分钟已经过去的比例"""
+        now = time.time()
+        minute = int(now // 60)
+        return (
+            f"llm_governor:{self._scope}:tpm:{minute}",
+            f"llm_governor:{self._scope}:tpm:{minute - 1}",
+            (now % 60) / 60,
+        )
+
+    async def _try_acquire(self, tokens: int) -> Optional[str]:
+        """尝试获取一次配额，成功返回租约id"""
+        lease_id = str(uuid.uuid4())
+        current_key, previous_key, elapsed = self._tpm_keys()
+        now = time.time()
+        script = self._redis.client.register_script(self._acquire_script)
+        result = await script(
+            keys=[self._inflight_key, current_key, previous_key],
+            args=[now, lease_id, now + self._lease_seconds, self._max_concurrency,
+                  self._tokens_per_minute, tokens, elapsed],
+        )
+        return lease_id if result == 1 else None
+
+    def _next_waiter(self) -> Optional[Tuple[str, asyncio.Future, int]]:
+        """取出队首会话的第一个有效等待者，已取消的等待者直接丢弃"""
+        while self._queues:
+            session_id, waiters = next(iter(self._queues.items()))
+            while waiters and waiters[0][0].done():
+                waiters.popleft()
+            if not waiters:
+                del self._queues[session_id]
+                continue
+            future, tokens = waiters[0]
+            return session_id, future, tokens
+        return None
+
+    async def _dispatch(self) -> None:
+        """按会话轮询依次为等待者获取配额"""
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            session_id, future, tokens = waiter
+
+            try:
+                lease_id = await self._try_acquire(tokens)
+            except Exception as e:
+                # Redis不可用时放行请求，避免限流器成为单点故障
+                logger.warning(f"获取模型调用配额失败, 直接放行: {e}")
+                lease_id = ""
+
+            if lease_id is None:
+                # 配额不足，等待其他请求释放或轮询间隔到达后重试
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # 放行该等待者，并将其所属会话移到队尾，实现会话间公平轮询
+            self._queues[session_id].popleft()
+            if self._queues[session_id]:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            if future.done():
+                await self.release(lease_id)
+            else:
+                future.set_result(lease_id)
+
+    async def acquire(self, session_id: str, tokens: int) -> str:
+        """
+        排队获取模型调用配额
+        :param session_id: 发起调用的会话id，用于会话间公平排队
+        :param tokens: 本次调用预计消耗的token数
+        :return: 租约id，调用结束后需要释放
+        """
+        started_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(session_id, deque()).append((future, tokens))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+
+        lease_id = await future
+
+        # 记录排队等待指标
+        wait_seconds = time.monotonic() - started_at
+        self._acquired += 1
+        self._wait_seconds_total += wait_seconds
+        self._wait_seconds_max = max(self._wait_seconds_max, wait_seconds)
+        if wait_seconds > 1:
+            logger.info(f"会话[{session_id}]等待模型调用配额{wait_seconds:.2f}秒")
+        return lease_id
+
+    @property
+    def lease_seconds(self) -> int:
+        return self._lease_seconds
+
+    async def renew(self, lease_id: str) -> None:
+        """续约并发租约，将过期时间重置为完整的租约时长，已释放或已过期的租约不会重新登记"""
+        if not lease_id:
+            return
+        try:
+            await self._redis.client.zadd(self._inflight_key, {lease_id: time.time() + self._lease_seconds}, xx=True)
+        except Exception as e:
+            logger.warning(f"续约模型调用配额失败: {e}")
+
+    async def release(self, lease_id: str, tokens: int = 0) -> None:
+        """
+        释放配额
+        :param lease_id: 租约id
+        :param tokens: 调用完成后新增消耗的token数(如生成内容)，计入当前分钟的配额
+        """
+        try:
+            if lease_id:
+                await self._redis.client.zrem(self._inflight_key, lease_id)
+            if tokens > 0 and self._tokens_per_minute > 0:
+                current_key, _, _ = self._tpm_keys()
+                pipe = self._redis.client.pipeline(transaction=False)
+                pipe.incrby(current_key, tokens)
+                pipe.expire(current_key, 120)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"释放模型调用配额失败: {e}")
+        finally:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取本进程的排队等待指标"""
+        return {
+            "waiting": sum(len(waiters) for waiters in self._queues.values()),
+            "acquired": self._acquired,
+            "wait_seconds_total": round(self._wait_seconds_total, 3),
+            "wait_seconds_avg": round(self._wait_seconds_total / self._acquired, 3) if self._acquired else 0.0,
+            "wait_seconds_max": round(self._wait_seconds_max, 3),
+        }
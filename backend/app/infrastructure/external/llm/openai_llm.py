@@ -5,13 +5,18 @@
 @Author : caixiaorong01@outlook.com
 @File   : openai_llm.py
 """
+import hashlib
 import logging
-from typing import Dict, Any
+import random
+import time
+from typing import Dict, Any, AsyncGenerator, List, Optional, Callable
 
-from app.application.errors.exceptions import ServerError
-from app.domain.external import LLM
-from app.domain.models import LLMConfig
+from app.application.errors.exceptions import ServerError, LLMRequestError
+from app.domain.external import LLM, LLMTelemetry, llm_call_context
+from app.domain.models import LLMConfig, LLMEndpointConfig, LLMCallRecord
+import openai
 from openai import AsyncOpenAI
+from .endpoint_pool import CircuitBreaker, LLMEndpoint, LLMEndpointPool, ErrorKind, classify_error
 
 logger = logging.getLogger(__name__)
 
@@ -19,16 +24,105 @@ logger = logging.getLogger(__name__)
 class OpenAILLM(LLM):
     """OpenAI语言模型"""
 
-    def __init__(self, llm_config: LLMConfig, **kwargs) -> None:
-        self._client = AsyncOpenAI(
-            base_url=str(llm_config.base_url),
-            api_key=llm_config.api_key,
+    # 端点熔断器注册表，按端点地址与密钥区分，在多次构建的实例之间共享端点健康状态
+    _breakers: Dict[str, CircuitBreaker] = {}
+
+    def __init__(
+            self,
+            llm_config: LLMConfig,
+            telemetry: Optional[LLMTelemetry] = None,
+            log_sample_rate: float = 0.0,
+            role: str = "",
             **kwargs,
+    ) -> None:
+        """
+        :param llm_config: 模型配置
+        :param role: 模型角色，用于遥测按角色统计用量与成本
+        :param telemetry: 模型调用遥测，为空时不记录
+        :param log_sample_rate: 以DEBUG级别记录完整模型响应的采样比例
+        """
+        # 未配置多端点时使用base_url与api_key作为唯一端点
+        endpoint_configs = llm_config.endpoints or [
+            LLMEndpointConfig(base_url=llm_config.base_url, api_key=llm_config.api_key)
+        ]
+        self._pool = LLMEndpointPool(
+            endpoints=[self._build_endpoint(index, config, **kwargs) for index, config in enumerate(endpoint_configs)],
+            max_attempts=llm_config.max_attempts,
         )
         self._model_name = llm_config.model_name
         self._temperature = llm_config.temperature
         self._max_tokens = llm_config.max_tokens
+        self._streaming = llm_config.stream
+        self._parallel_tool_calls = llm_config.parallel_tool_calls
+        self._context_budget = llm_config.context_budget
         self._timeout = 3600
+        self._telemetry = telemetry
+        self._log_sample_rate = log_sample_rate
+        self._role = role
+        self._prompt_price = llm_config.prompt_price
+        self._completion_price = llm_config.completion_price
+
+    @classmethod
+    def _build_endpoint(cls, index: int, endpoint_config: LLMEndpointConfig, **kwargs) -> LLMEndpoint:
+        """构建模型端点，重试由端点池统一处理，因此关闭客户端自带的重试"""
+        base_url = str(endpoint_config.base_url)
+        key = hashlib.sha256(f"{base_url}|{endpoint_config.api_key}".encode("utf-8")).hexdigest()
+        breaker = cls._breakers.setdefault(key, CircuitBreaker())
+        client = AsyncOpenAI(base_url=base_url, api_key=endpoint_config.api_key, max_retries=0, **kwargs)
+        return LLMEndpoint(name=f"{base_url}#{index}", client=client, weight=endpoint_config.weight, breaker=breaker)
+
+    @classmethod
+    def _to_app_error(cls, error: Exception) -> Exception:
+        """
+        将模型调用异常转换为应用异常
+        请求有误与端点不可用(端点池已完成故障转移)为不可重试的LLMRequestError，其余为ServerError
+        """
+        kind, _ = classify_error(error)
+        if isinstance(error, openai.APIStatusError) and kind != ErrorKind.RETRYABLE:
+            return LLMRequestError(f"调用模型出错({error.status_code}),请检查请求参数与模型配置")
+        return ServerError("调用模型出错")
+
+    def _new_record(self, streaming: bool) -> LLMCallRecord:
+        """根据调用上下文创建本次调用的遥测记录"""
+        context = llm_call_context.get()
+        return LLMCallRecord(
+            session_id=context.get("session_id") or "",
+            agent=context.get("agent") or "",
+            role=self._role,
+            step_id=context.get("step_id"),
+            model=self._model_name,
+            streaming=streaming,
+        )
+
+    @classmethod
+    def _apply_usage(cls, record: LLMCallRecord, usage: Any) -> None:
+        """从响应的usage中提取token用量，兼容Deepseek的缓存命中字段"""
+        if usage is None:
+            return
+        record.prompt_tokens = usage.prompt_tokens or 0
+        record.completion_tokens = usage.completion_tokens or 0
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        record.reasoning_tokens = getattr(completion_details, "reasoning_tokens", None) or 0
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        record.cached_tokens = (
+                getattr(prompt_details, "cached_tokens", None)
+                or getattr(usage, "prompt_cache_hit_tokens", None)
+                or 0
+        )
+
+    async def _record(self, record: LLMCallRecord, started_at: float) -> None:
+        """补充耗时与成本并提交遥测记录，单价按每百万token计算"""
+        record.latency_ms = (time.monotonic() - started_at) * 1000
+        record.cost = (
+                record.prompt_tokens * self._prompt_price + record.completion_tokens * self._completion_price
+        ) / 1_000_000
+        if self._telemetry:
+            await self._telemetry.record(record)
+
+    def _log_response(self, dump: Callable[[], Any]) -> None:
+        """按采样比例以DEBUG级别记录完整响应，避免每次调用都序列化并写入大段日志"""
+        if self._log_sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < self._log_sample_rate:
+            logger.debug(f"大模型返回结果: {dump()}")
 
     @property
     def model_name(self) -> str:
@@ -45,6 +139,25 @@ class OpenAILLM(LLM):
         """最大生成长度"""
         return self._max_tokens
 
+    @property
+    def context_budget(self) -> int:
+        """上下文token预算"""
+        return self._context_budget
+
+    @property
+    def streaming(self) -> bool:
+        """是否启用流式输出"""
+        return self._streaming
+
+    @property
+    def parallel_tool_calls(self) -> bool:
+        """是否允许单轮返回多个工具调用"""
+        return self._parallel_tool_calls
+
+    async def aclose(self) -> None:
+        """关闭所有端点的HTTP客户端"""
+        await self._pool.aclose()
+
     async def invoke(self,
                      messages: list[Dict[str, Any]],
                      tools: list[Dict[str, Any]] = None,
@@ -52,10 +165,12 @@ class OpenAILLM(LLM):
                      tool_choice: str = None,
                      ) -> Dict[str, Any]:
         """调用模型"""
+        record = self._new_record(streaming=False)
+        started_at = time.monotonic()
         try:
             if tools:
                 logger.info(f"调用模型携带工具信息: {self._model_name}")
-                response = await self._client.chat.completions.create(
+                response, record.retries = await self._pool.execute(lambda client: client.chat.completions.create(
                     model=self._model_name,
                     temperature=self._temperature,
                     max_tokens=self._max_tokens,
@@ -63,12 +178,12 @@ class OpenAILLM(LLM):
                     response_format=response_format,
                     tools=tools,
                     tool_choice=tool_choice,
-                    parallel_tool_calls=False,
+                    parallel_tool_calls=self._parallel_tool_calls,
                     timeout=self._timeout,
-                )
+                ))
             else:
                 logger.info(f"调用模型未携带工具信息: {self._model_name}")
-                response = await self._client.chat.completions.create(
+                response, record.retries = await self._pool.execute(lambda client: client.chat.completions.create(
                     model=self._model_name,
                     temperature=self._temperature,
                     max_tokens=self._max_tokens,
@@ -76,13 +191,112 @@ class OpenAILLM(LLM):
                     response_format=response_format,
                     parallel_tool_calls=False,
                     timeout=self._timeout,
-                )
+                ))
 
-            logger.info(f"大模型返回结果: {response.model_dump()}")
+            self._apply_usage(record, response.usage)
+            self._log_response(response.model_dump)
             return response.choices[0].message.model_dump()
         except Exception as e:
+            record.success = False
             logger.error(f"调用模型失败: {e}")
-            raise ServerError(f"调用模型出错")
+            raise self._to_app_error(e) from e
+        finally:
+            await self._record(record, started_at)
+
+    async def stream(self,
+                     messages: list[Dict[str, Any]],
+                     tools: list[Dict[str, Any]] = None,
+                     response_format: Dict[str, Any] = None,
+                     tool_choice: str = None,
+                     ) -> AsyncGenerator[Dict[str, Any], None]:
+        """流式调用模型，逐块产出增量内容，最后产出组装完成的消息"""
+        params = {
+            "model": self._model_name,
+            "temperature": self._temperature,
+            "max_tokens": self._max_tokens,
+            "messages": messages,
+            "response_format": response_format,
+            "timeout": self._timeout,
+            "stream": True,
+            # 在最后一个chunk中返回token用量
+            "stream_options": {"include_usage": True},
+        }
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = tool_choice
+            params["parallel_tool_calls"] = self._parallel_tool_calls
+
+        record = self._new_record(streaming=True)
+        started_at = time.monotonic()
+        try:
+            logger.info(f"流式调用模型: {self._model_name}, 携带工具信息: {bool(tools)}")
+            # 仅建立流式连接阶段支持故障转移，开始输出后出错无法透明重试
+            response, record.retries = await self._pool.execute(
+                lambda client: client.chat.completions.create(**params)
+            )
+
+            # 按chunk累积内容、推理内容与工具调用，用于组装最终消息
+            role = "assistant"
+            content_parts: List[str] = []
+            reasoning_parts: List[str] = []
+            tool_calls: Dict[int, Dict[str, Any]] = {}
+            async for chunk in response:
+                if chunk.usage:
+                    self._apply_usage(record, chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.role:
+                    role = delta.role
+
+                # 兼容Deepseek思考模型的reasoning_content扩展字段
+                content = delta.content or ""
+                reasoning_content = getattr(delta, "reasoning_content", None) or ""
+                content_parts.append(content)
+                reasoning_parts.append(reasoning_content)
+
+                # 工具调用按index分片返回，需要将同一index的函数名称与参数拼接起来
+                tool_call_deltas = []
+                for tool_call_delta in delta.tool_calls or []:
+                    tool_call = tool_calls.setdefault(tool_call_delta.index, {
+                        "id": None,
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    })
+                    if tool_call_delta.id:
+                        tool_call["id"] = tool_call_delta.id
+                    if tool_call_delta.function:
+                        tool_call["function"]["name"] += tool_call_delta.function.name or ""
+                        tool_call["function"]["arguments"] += tool_call_delta.function.arguments or ""
+                    tool_call_deltas.append(tool_call_delta.model_dump())
+
+                if content or reasoning_content or tool_call_deltas:
+                    if record.ttft_ms is None:
+                        record.ttft_ms = (time.monotonic() - started_at) * 1000
+                    yield {
+                        "type": "delta",
+                        "content": content,
+                        "reasoning_content": reasoning_content,
+                        "tool_calls": tool_call_deltas,
+                    }
+
+            # 组装完整消息，格式与非流式调用返回的消息保持一致
+            message = {
+                "role": role,
+                "content": "".join(content_parts),
+                "tool_calls": [tool_calls[index] for index in sorted(tool_calls)] or None,
+            }
+            reasoning_content = "".join(reasoning_parts)
+            if reasoning_content:
+                message["reasoning_content"] = reasoning_content
+            self._log_response(lambda: message)
+            yield {"type": "message", "message": message}
+        except Exception as e:
+            record.success = False
+            logger.error(f"流式调用模型失败: {e}")
+            raise self._to_app_error(e) from e
+        finally:
+            await self._record(record, started_at)
 
 
 if __name__ == "__main__":
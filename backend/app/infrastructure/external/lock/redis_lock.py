@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 10:15
+@Author : caixiaorong01@outlook.com
+@File   : redis_lock.py
+"""
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+from app.domain.external import DistributedLock
+from app.infrastructure.storage import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLock(DistributedLock):
+    """基于Redis SET NX EX实现的租约锁"""
+
+    # 仅当锁仍由当前持有者持有时才删除，避免误删其他持有者在租约过期后获取的锁
+    _release_script = """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    else
+        return 0
+    end
+    """
+
+    # 仅当锁仍由当前持有者持有时才续约
+    _renew_script = """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("EXPIRE", KEYS[1], ARGV[2])
+    else
+        return 0
+    end
+    """
+
+    def __init__(self, lease_seconds: int = 120, wait_seconds: float = 120, retry_interval: float = 0.1) -> None:
+        self._redis = get_redis_client()
+        self._lease_seconds = lease_seconds
+        self._wait_seconds = wait_seconds
+        self._retry_interval = retry_interval
+
+    async def acquire(self, key: str) -> Optional[str]:
+        """在等待时间内循环尝试获取锁"""
+        token = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._wait_seconds
+
+        while True:
+            # 锁不存在时写入凭证并设置租约
+            if await self._redis.client.set(f"lock:{key}", token, nx=True, ex=self._lease_seconds):
+                return token
+
+            # 超过等待时间仍未获取到锁
+            if loop.time() >= deadline:
+                logger.warning(f"获取分布式锁[{key}]超时")
+                return None
+
+            await asyncio.sleep(self._retry_interval)
+
+    @property
+    def lease_seconds(self) -> int:
+        return self._lease_seconds
+
+    async def renew(self, key: str, token: str) -> bool:
+        """根据锁凭证续约锁"""
+        try:
+            script = self._redis.client.register_script(self._renew_script)
+            result = await script(keys=[f"lock:{key}"], args=[token, self._lease_seconds])
+            return result == 1
+        except Exception as e:
+            logger.error(f"续约分布式锁[{key}]失败: {e}")
+            return False
+
+    async def release(self, key: str, token: str) -> bool:
+        """根据锁凭证释放锁"""
+        try:
+            script = self._redis.client.register_script(self._release_script)
+            result = await script(keys=[f"lock:{key}"], args=[token])
+            return result == 1
+        except Exception as e:
+            logger.error(f"释放分布式锁[{key}]失败: {e}")
+            return False
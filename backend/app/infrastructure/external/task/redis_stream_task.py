@@ -12,6 +12,7 @@ from typing import Optional, Dict
 
 from app.domain.external import Task, TaskRunner, MessageQueue
 from app.infrastructure.external.message_queue import RedisStreamMessageQueue
+from app.infrastructure.storage import get_redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +21,24 @@ class RedisStreamTask(Task):
     """Redis Stream任务执行器"""
 
     _task_registry: Dict[str, "RedisStreamTask"] = {}
-
-    def __init__(self, task_runner: TaskRunner):
+    _draining: bool = False  # 节点是否处于排空模式
+    _handoff_key: str = "task:handoff"  # 跨节点共享的任务移交队列
+    _heartbeat_ttl: int = 30  # 执行心跳的有效期(秒)，执行节点异常退出后心跳过期即视为任务结束
+    _heartbeat_interval: float = 10.0  # 刷新执行心跳的间隔(秒)
+
+    # 输入流为空时才删除执行心跳，与写入消息互斥，保证心跳消失后写入的消息不会被执行器遗漏
+    _release_script = """
+    if redis.call("XLEN", KEYS[1]) == 0 then
+        redis.call("DEL", KEYS[2])
+        return 1
+    else
+        return 0
+    end
+    """
+
+    def __init__(self, task_runner: Optional[TaskRunner], task_id: Optional[str] = None):
         self._task_runner = task_runner
-        self._id = str(uuid.uuid4())
+        self._id = task_id or str(uuid.uuid4())
         self._execution_task: Optional[asyncio.Task] = None
 
         input_stream_name = f"task:input:{self._id}"
@@ -31,8 +46,12 @@ class RedisStreamTask(Task):
 
         self._input_stream = RedisStreamMessageQueue(input_stream_name)
         self._output_stream = RedisStreamMessageQueue(output_stream_name)
+        self._input_stream_name = input_stream_name
+        self._heartbeat_key = f"task:running:{self._id}"
 
-        RedisStreamTask._task_registry[self._id] = self
+        # 只有本节点负责执行的任务才注册到本地注册表
+        if self._task_runner:
+            RedisStreamTask._task_registry[self._id] = self
 
     def _cleanup_registry(self) -> None:
         """清除缓存"""
@@ -47,20 +66,49 @@ class RedisStreamTask(Task):
 
         self._cleanup_registry()
 
-    async def _execute_task(self) -> None:
+    async def _heartbeat(self) -> None:
+        """执行期间定期刷新心跳，供其他节点判断任务是否仍在执行"""
+        redis = get_redis_client().client
+        while True:
+            try:
+                await redis.set(self._heartbeat_key, "1", ex=self._heartbeat_ttl)
+            except Exception as e:
+                logger.warning(f"刷新任务[{self._id}]执行心跳失败: {e}")
+            await asyncio.sleep(self._heartbeat_interval)
+
+    async def _release_heartbeat(self) -> bool:
+        """输入流为空时删除执行心跳并返回True，否则说明结束前又收到了新消息，返回False"""
+        script = get_redis_client().client.register_script(self._release_script)
+        return await script(keys=[self._input_stream_name, self._heartbeat_key]) == 1
 
+    async def _execute_task(self) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat())
         try:
-            await self._task_runner.invoke(self)
+            while True:
+                await self._task_runner.invoke(self)
+                # 排空模式下剩余的消息由接管节点处理
+                if RedisStreamTask._draining or await self._release_heartbeat():
+                    break
+                logger.info(f"任务[{self._id}]结束前收到新消息, 继续执行")
         except asyncio.CancelledError:
             logger.info(f"取消执行任务: {self._id}")
             raise
         except Exception as e:
             logger.error(f"执行任务失败: {self._id}, 错误信息: {e}")
         finally:
+            heartbeat.cancel()
+            try:
+                await get_redis_client().client.delete(self._heartbeat_key)
+            except Exception as e:
+                logger.warning(f"删除任务[{self._id}]执行心跳失败: {e}")
             self._on_task_done()
 
     async def invoke(self) -> None:
         """任务执行方法"""
+        # 关联的任务由其所在节点执行，这里不做任何处理
+        if not self._task_runner:
+            return
+
         if self.done:
             self._execution_task = asyncio.create_task(self._execute_task())
             logger.info(f"开始执行任务: {self._id}")
@@ -94,10 +142,19 @@ class RedisStreamTask(Task):
     @property
     def done(self) -> bool:
         """任务是否完成"""
+        # 无法感知其他节点任务的执行状态，由输出流中的终止事件决定何时结束
+        if not self._task_runner:
+            return False
         if self._execution_task is None:
             return True
         return self._execution_task.done()
 
+    async def is_running(self) -> bool:
+        """本节点执行的任务根据执行状态判断，关联的任务根据执行节点的心跳判断"""
+        if self._task_runner:
+            return not self.done
+        return await get_redis_client().client.exists(self._heartbeat_key) > 0
+
     @classmethod
     def get(cls, task_id: str) -> Optional["Task"]:
         """获取任务"""
@@ -106,13 +163,20 @@ class RedisStreamTask(Task):
     @classmethod
     def create(cls, task_runner: TaskRunner) -> "Task":
         """创建任务"""
+        if cls._draining:
+            raise RuntimeError("当前节点正在排空, 不再接收新任务")
         return cls(task_runner)
 
+    @classmethod
+    def attach(cls, task_id: str) -> "Task":
+        """关联任务，优先返回本节点执行的任务实例"""
+        return cls._task_registry.get(task_id) or cls(task_runner=None, task_id=task_id)
+
     @classmethod
     async def destroy(cls) -> None:
         """销毁任务"""
-        # 遍历所有注册的任务实例
-        for task_id, task in RedisStreamTask._task_registry.items():
+        # 遍历所有注册的任务实例(取消任务会修改注册表，因此先复制一份)
+        for task_id, task in list(RedisStreamTask._task_registry.items()):
             # 取消每个任务的执行
             task.cancel()
 
@@ -122,3 +186,61 @@ class RedisStreamTask(Task):
 
         # 清空任务注册表，释放所有任务引用
         cls._task_registry.clear()
+
+    @classmethod
+    def is_draining(cls) -> bool:
+        """当前节点是否处于排空模式"""
+        return cls._draining
+
+    @classmethod
+    async def drain(cls, timeout: float) -> None:
+        """排空当前节点的任务，并将未完成的任务移交给其他节点"""
+        # 进入排空模式，拒绝创建新任务
+        cls._draining = True
+        tasks = list(cls._task_registry.values())
+        logger.info(f"节点进入排空模式, 运行中的任务数: {len(tasks)}")
+
+        # 通知所有任务执行器在下一个检查点停止
+        for task in tasks:
+            if task._task_runner:
+                task._task_runner.drain()
+
+        # 在截止时间内等待任务到达检查点
+        running = [task._execution_task for task in tasks if not task.done]
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+
+            # 超时仍未停止的任务直接中断，由接管节点从最近的检查点恢复
+            for execution_task in pending:
+                execution_task.cancel()
+            if pending:
+                logger.warning(f"{len(pending)}个任务未能在{timeout}秒内到达检查点, 已中断")
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # 将需要恢复的会话写入共享移交队列，沙箱保持不变供接管节点复用
+        redis = get_redis_client().client
+        for task in tasks:
+            if not task._task_runner:
+                continue
+            try:
+                session_id = await task._task_runner.handoff(task)
+                if session_id:
+                    await redis.rpush(cls._handoff_key, session_id)
+                    logger.info(f"任务[{task.id}]已移交, 会话: {session_id}")
+            except Exception as e:
+                logger.error(f"移交任务[{task.id}]失败: {e}")
+
+        cls._task_registry.clear()
+
+    @classmethod
+    async def claim_handoff(cls, timeout: int) -> Optional[str]:
+        """从共享移交队列中认领一个待恢复的会话"""
+        if cls._draining:
+            return None
+
+        result = await get_redis_client().client.blpop([cls._handoff_key], timeout=timeout)
+        if not result:
+            return None
+
+        _, session_id = result
+        return session_id
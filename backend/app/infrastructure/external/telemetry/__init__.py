@@ -0,0 +1,10 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 14:40
+@Author : caixiaorong01@outlook.com
+@File   : __init__.py.py
+"""
+from .redis_llm_telemetry import RedisLLMTelemetry
+
+__all__ = ["RedisLLMTelemetry"]
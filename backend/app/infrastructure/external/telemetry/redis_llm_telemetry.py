@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/18 14:40
+@Author : caixiaorong01@outlook.com
+@File   : redis_llm_telemetry.py
+"""
+import logging
+from typing import Dict, Any, List, Tuple
+
+from app.domain.external import LLMTelemetry
+from app.domain.models import LLMCallRecord, LLMSessionUsage, LLMUsageStats
+from app.infrastructure.storage.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLLMTelemetry(LLMTelemetry):
+    """
+    基于Redis的模型调用遥测
+    会话用量写入Redis哈希，字段格式为"{维度}|{指标}"，多个节点的调用汇总到同一会话下
+    进程级指标按模型保存在内存中
+    """
+
+    _int_fields = ("prompt_tokens", "completion_tokens", "reasoning_tokens", "cached_tokens", "retries")
+
+    def __init__(self, ttl_seconds: int = 7 * 24 * 3600) -> None:
+        self._redis = get_redis_client()
+        self._ttl_seconds = ttl_seconds
+        self._metrics: Dict[str, LLMUsageStats] = {}
+        self._role_metrics: Dict[str, LLMUsageStats] = {}
+        self._skipped_calls: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def _session_key(cls, session_id: str) -> str:
+        return f"llm_usage:{session_id}"
+
+    @classmethod
+    def _increments(cls, record: LLMCallRecord) -> Tuple[List[Tuple[str, int]], List[Tuple[str, float]]]:
+        """将调用记录转换为各维度需要累加的整数与浮点指标"""
+        scopes = ["total", f"agent:{record.agent}"]
+        if record.role:
+            scopes.append(f"role:{record.role}")
+        if record.step_id:
+            scopes.append(f"step:{record.step_id}")
+
+        int_increments, float_increments = [], []
+        for scope in scopes:
+            int_increments.append((f"{scope}|calls", 1))
+            if not record.success:
+                int_increments.append((f"{scope}|failures", 1))
+            for field in cls._int_fields:
+                value = getattr(record, field)
+                if value:
+                    int_increments.append((f"{scope}|{field}", value))
+            float_increments.append((f"{scope}|latency_ms_total", record.latency_ms))
+            if record.cost:
+                float_increments.append((f"{scope}|cost", record.cost))
+            if record.ttft_ms is not None:
+                float_increments.append((f"{scope}|ttft_ms_total", record.ttft_ms))
+                int_increments.append((f"{scope}|ttft_count", 1))
+        return int_increments, float_increments
+
+    async def record(self, record: LLMCallRecord) -> None:
+        # 1.累加进程级指标
+        self._metrics.setdefault(record.model, LLMUsageStats()).add(record)
+        if record.role:
+            self._role_metrics.setdefault(record.role, LLMUsageStats()).add(record)
+
+        # 2.累加会话级用量，遥测失败不影响模型调用
+        if not record.session_id:
+            return
+        try:
+            key = self._session_key(record.session_id)
+            int_increments, float_increments = self._increments(record)
+            pipe = self._redis.client.pipeline(transaction=False)
+            for field, value in int_increments:
+                pipe.hincrby(key, field, value)
+            for field, value in float_increments:
+                pipe.hincrbyfloat(key, field, value)
+            pipe.expire(key, self._ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"记录模型调用遥测失败: {e}")
+
+    async def record_skipped_call(self, session_id: str, agent: str, reason: str) -> None:
+        # 1.累加进程级跳过次数
+        reasons = self._skipped_calls.setdefault(agent, {})
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+        # 2.累加会话级跳过次数，字段格式为"skipped:{Agent}|{原因}"
+        if not session_id:
+            return
+        try:
+            key = self._session_key(session_id)
+            pipe = self._redis.client.pipeline(transaction=False)
+            pipe.hincrby(key, f"skipped:{agent}|{reason}", 1)
+            pipe.expire(key, self._ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"记录跳过的模型调用失败: {e}")
+
+    async def get_session_usage(self, session_id: str) -> LLMSessionUsage:
+        values = await self._redis.client.hgetall(self._session_key(session_id))
+
+        # 按维度还原各项指标
+        scopes: Dict[str, Dict[str, float]] = {}
+        for field, value in values.items():
+            scope, _, metric = field.rpartition("|")
+            scopes.setdefault(scope, {})[metric] = float(value)
+
+        usage = LLMSessionUsage(session_id=session_id)
+        for scope, metrics in scopes.items():
+            if scope.startswith("skipped:"):
+                usage.skipped_calls[scope.removeprefix("skipped:")] = {
+                    reason: int(value) for reason, value in metrics.items()
+                }
+                continue
+            stats = LLMUsageStats.model_validate({
+                name: value if name.endswith("_ms_total") or name == "cost" else int(value)
+                for name, value in metrics.items()
+            })
+            if scope == "total":
+                usage.total = stats
+            elif scope.startswith("agent:"):
+                usage.by_agent[scope.removeprefix("agent:")] = stats
+            elif scope.startswith("role:"):
+                usage.by_role[scope.removeprefix("role:")] = stats
+            elif scope.startswith("step:"):
+                usage.by_step[scope.removeprefix("step:")] = stats
+        return usage
+
+    @classmethod
+    def _dump_stats(cls, stats: LLMUsageStats) -> Dict[str, Any]:
+        return {
+            **stats.model_dump(),
+            "latency_ms_avg": round(stats.latency_ms_avg, 2),
+            "ttft_ms_avg": round(stats.ttft_ms_avg, 2),
+        }
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "models": {model: self._dump_stats(stats) for model, stats in self._metrics.items()},
+            "roles": {role: self._dump_stats(stats) for role, stats in self._role_metrics.items()},
+            "skipped_calls": self._skipped_calls,
+        }
@@ -64,6 +64,11 @@ class FileModel(Base):
         nullable=False,
         server_default=text("0"),
     )  # 文件大小
+    sha256: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        server_default=text("''::character varying"),
+    )  # 文件内容的sha256摘要
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
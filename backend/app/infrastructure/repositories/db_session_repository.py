@@ -146,6 +146,26 @@ class DBSessionRepository(SessionRepository):
         if result.rowcount == 0:
             raise ValueError(f"会话[{session_id}]不存在，请核实后重试")
 
+    async def add_files(self, session_id: str, files: List[File]) -> None:
+        """批量往会话中新增文件，会话中已存在相同路径的文件时替换"""
+        if not files:
+            return
+
+        # 查询会话记录并加锁，防止并发修改
+        stmt = select(SessionModel).where(SessionModel.id == session_id).with_for_update()
+        result = await self.db_session.execute(stmt)
+        record = result.scalar_one_or_none()
+
+        # 如果会话不存在，抛出异常
+        if not record:
+            raise ValueError(f"会话[{session_id}]不存在，请核实后重试")
+
+        # 移除相同路径的旧文件后追加新文件，整体写入一次
+        filepaths = {file.filepath for file in files if file.filepath}
+        record.files = [
+            file for file in (record.files or []) if file.get("filepath", "") not in filepaths
+        ] + [file.model_dump(mode="json") for file in files]
+
     async def remove_file(self, session_id: str, file_id: str) -> None:
         """移除会话中的指定文件"""
         # 查询会话记录并加锁，防止并发修改
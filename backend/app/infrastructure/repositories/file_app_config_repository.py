@@ -7,7 +7,7 @@
 """
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import yaml
 from filelock import FileLock
@@ -21,7 +21,10 @@ logger = logging.getLogger(__name__)
 
 
 class FileAppConfigRepository(AppConfigRepository):
-    """文件应用配置仓库"""
+    """
+    文件应用配置仓库
+    解析后的配置缓存在内存中，以文件的修改时间与大小作为版本，文件被修改(包括进程外修改)后重新解析
+    """
 
     def __init__(self, config_path: str) -> None:
         # 获取当前目录
@@ -30,6 +33,18 @@ class FileAppConfigRepository(AppConfigRepository):
         self._config_path = root_dir.joinpath(root_dir, config_path)
         self._config_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock_file = self._config_path.with_suffix(".lock")
+        self._cached_config: Optional[AppConfig] = None
+        self._cached_version: Optional[Tuple[int, int]] = None
+
+    def _stat_version(self) -> Tuple[int, int]:
+        """以文件的修改时间(纳秒)与大小作为配置版本"""
+        stat = self._config_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def version(self) -> Optional[Tuple[int, int]]:
+        """当前缓存的配置版本，配置变化后依赖配置构建的对象需要重建"""
+        return self._cached_version
 
     def _create_default_app_config_if_not_exists(self) -> None:
         """创建文件"""
@@ -43,17 +58,23 @@ class FileAppConfigRepository(AppConfigRepository):
             self.save(default_app_config)
 
     def load(self) -> Optional[AppConfig]:
-        """加载应用配置"""
+        """加载应用配置，文件未变化时直接返回缓存配置的副本，避免调用方修改污染缓存"""
         self._create_default_app_config_if_not_exists()
 
         try:
-            with open(self._config_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                return AppConfig.model_validate(data) if data else None
+            version = self._stat_version()
+            if version != self._cached_version:
+                with open(self._config_path, "r", encoding="utf-8") as f:
+                    data = yaml.safe_load(f)
+                self._cached_config = AppConfig.model_validate(data) if data else None
+                self._cached_version = version
+                logger.info(f"加载应用配置文件: {self._config_path}")
         except Exception as e:
             logger.error(f"读取应用配置文件失败: {e}")
             raise ServerError("读取应用配置文件失败，请稍后尝试")
 
+        return self._cached_config.model_copy(deep=True) if self._cached_config else None
+
     def save(self, app_config: AppConfig) -> None:
         """保存应用配置"""
         lock = FileLock(self._lock_file, timeout=5)
@@ -63,6 +84,10 @@ class FileAppConfigRepository(AppConfigRepository):
 
                 with open(self._config_path, "w", encoding="utf-8") as f:
                     yaml.dump(data_to_dum, f, allow_unicode=True, sort_keys=False)
+
+                # 写入后直接更新缓存，无需再次解析文件
+                self._cached_config = app_config.model_copy(deep=True)
+                self._cached_version = self._stat_version()
         except TimeoutError:
             logger.error("获取应用配置文件锁失败")
             raise ServerError("保存应用配置文件失败，请稍后尝试")
@@ -10,22 +10,27 @@ import io
 import logging
 import socket
 import uuid
-from typing import Optional, Self, BinaryIO
+from typing import Optional, Self, BinaryIO, AsyncGenerator, AsyncIterator, TYPE_CHECKING
 
 import docker
 import httpx
 from async_lru import alru_cache
 from docker.models.resource import Model
 
-from app.domain.external import Sandbox, Browser
+from app.domain.external import Sandbox, Browser, LLM
 from app.domain.models import ToolResult
 from app.infrastructure.external.browser import PlaywrightBrowser
 from core.config import get_settings
 
+if TYPE_CHECKING:
+    from .docker_sandbox_pool import DockerSandboxPool
+
 logger = logging.getLogger(__name__)
 
 
 class DockerSandbox(Sandbox):
+    # 沙箱预热池，启用后创建沙箱时优先从池中取用已启动的容器
+    _pool: Optional["DockerSandboxPool"] = None
 
     def __init__(
             self,
@@ -141,6 +146,11 @@ class DockerSandbox(Sandbox):
             logger.error(f"创建docker沙盒失败: {e}")
             raise Exception(f"创建docker沙盒失败: {e}")
 
+    @classmethod
+    def use_pool(cls, pool: Optional["DockerSandboxPool"]) -> None:
+        """设置沙箱预热池，传递None时停用"""
+        cls._pool = pool
+
     @classmethod
     async def create(cls) -> Self:
         settings = get_settings()
@@ -149,6 +159,12 @@ class DockerSandbox(Sandbox):
             ip = await cls._resolve_hostname_to_ip(settings.sandbox_address)
             return DockerSandbox(ip=ip)
 
+        # 优先从预热池中取用已启动并通过健康检查的沙箱
+        if cls._pool:
+            sandbox = await cls._pool.acquire()
+            if sandbox:
+                return sandbox
+
         # 否则创建一个新的docker容器作为沙盒
         return await asyncio.to_thread(cls._create_task)
 
@@ -191,9 +207,32 @@ class DockerSandbox(Sandbox):
         # 创建并返回DockerSandbox实例
         return DockerSandbox(ip=ip, container_name=id)
 
-    async def get_browser(self) -> Browser:
-        # todo 扩展llm
-        return PlaywrightBrowser(self.cdp_url, llm=None)
+    async def get_browser(self, llm: Optional[LLM] = None) -> Browser:
+        return PlaywrightBrowser(self.cdp_url, llm=llm)
+
+    async def is_healthy(self) -> bool:
+        """单次检查沙箱中的服务是否全部处于运行状态，用于预热池的健康检查"""
+        try:
+            response = await self.client.get(f"{self._base_url}/api/supervisor/status", timeout=5)
+            response.raise_for_status()
+            tool_result = ToolResult.from_sandbox(**response.json())
+            services = tool_result.data or []
+            return tool_result.success and bool(services) and all(
+                service.get("statename", "") == "RUNNING" for service in services
+            )
+        except Exception as e:
+            logger.warning(f"沙箱[{self.id}]健康检查失败: {e}")
+            return False
+
+    async def reset_timeout(self, minutes: Optional[int] = None) -> ToolResult:
+        """重新开始沙箱的超时销毁计时，预热池中的沙箱在取用时从头计时，保留沙箱的自动保活"""
+        response = await self.client.post(
+            f"{self._base_url}/api/supervisor/reset-timeout",
+            json={
+                "minutes": minutes,
+            }
+        )
+        return ToolResult.from_sandbox(**response.json())
 
     async def ensure_sandbox(self) -> None:
         """确保沙箱一定存在/服务全部都开启了才执行后续步骤"""
@@ -346,6 +385,15 @@ class DockerSandbox(Sandbox):
         )
         return ToolResult.from_sandbox(**response.json())
 
+    async def get_file_hash(self, file_path: str) -> ToolResult:
+        response = await self.client.post(
+            f"{self._base_url}/api/file/file-hash",
+            json={
+                "filepath": file_path,
+            }
+        )
+        return ToolResult.from_sandbox(**response.json())
+
     async def delete_file(self, file_path: str) -> ToolResult:
         response = await self.client.post(
             f"{self._base_url}/api/file/delete-file",
@@ -374,6 +422,16 @@ class DockerSandbox(Sandbox):
         )
         return ToolResult.from_sandbox(**response.json())
 
+    async def upload_file_stream(self, stream: AsyncIterator[bytes], file_path: str) -> ToolResult:
+        response = await self.client.post(
+            f"{self._base_url}/api/file/upload-file-stream",
+            params={
+                "filepath": file_path,
+            },
+            content=stream,
+        )
+        return ToolResult.from_sandbox(**response.json())
+
     async def download_file(self, file_path: str) -> BinaryIO:
         response = await self.client.get(
             f"{self._base_url}/api/file/download-file",
@@ -384,6 +442,18 @@ class DockerSandbox(Sandbox):
         response.raise_for_status()
         return io.BytesIO(response.content)
 
+    async def stream_download_file(self, file_path: str, chunk_size: int = 1024 * 1024) -> AsyncGenerator[bytes, None]:
+        async with self.client.stream(
+                "GET",
+                f"{self._base_url}/api/file/download-file",
+                params={
+                    "filepath": file_path,
+                }
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
     async def exec_command(self, session_id: str, exec_dir: str, command: str) -> ToolResult:
         response = await self.client.post(
             f"{self._base_url}/api/shell/exec-command",
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 10:30
+@Author : caixiaorong01@outlook.com
+@File   : docker_sandbox_pool.py
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Tuple, Optional, Set, Dict, Any
+
+from .docker_sandbox import DockerSandbox
+
+logger = logging.getLogger(__name__)
+
+
+class DockerSandboxPool:
+    """
+    Docker沙箱预热池，预先启动一定数量并通过健康检查的沙箱容器，创建沙箱时直接取用
+    取用后在后台补充新的容器，空闲超时或健康检查失败的容器会被回收
+    """
+
+    def __init__(
+            self,
+            size: int,
+            idle_ttl_seconds: int,
+            check_interval_seconds: float = 30.0,
+    ) -> None:
+        """
+        :param size: 预热的沙箱数量，0表示不启用
+        :param idle_ttl_seconds: 沙箱在池中的最长空闲时间，超过后回收并重新启动，0表示不回收
+        :param check_interval_seconds: 健康检查与补充的间隔
+        """
+        self._size = size
+        self._idle_ttl_seconds = idle_ttl_seconds
+        self._check_interval = check_interval_seconds
+        self._ready: Deque[Tuple[DockerSandbox, float]] = deque()  # 就绪的沙箱及其就绪时间
+        self._booting = 0  # 正在启动的沙箱数量
+        self._wakeup = asyncio.Event()  # 沙箱被取用后唤醒维护任务立即补充
+        self._maintainer: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()  # 启动与销毁沙箱的后台任务
+        self._metrics: Dict[str, int] = {
+            "hits": 0,  # 从池中取到沙箱的次数
+            "misses": 0,  # 池为空需要直接创建沙箱的次数
+            "booted": 0,  # 预热启动成功的沙箱数
+            "boot_failures": 0,  # 预热启动失败的次数
+            "recycled": 0,  # 因空闲超时回收的沙箱数
+            "unhealthy": 0,  # 因健康检查失败回收的沙箱数
+        }
+
+    async def start(self) -> None:
+        """启动预热池维护任务，并让DockerSandbox在创建时优先从池中取用"""
+        if self._size <= 0 or self._maintainer is not None:
+            return
+        logger.info(f"启动沙箱预热池, 预热数量: {self._size}")
+        self._maintainer = asyncio.create_task(self._maintain())
+        DockerSandbox.use_pool(self)
+
+    async def shutdown(self) -> None:
+        """停止维护任务并销毁池中尚未取用的沙箱"""
+        if self._maintainer is None:
+            return
+        DockerSandbox.use_pool(None)
+        self._maintainer.cancel()
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(self._maintainer, *self._background_tasks, return_exceptions=True)
+        self._maintainer = None
+
+        sandboxes = [sandbox for sandbox, _ in self._ready]
+        self._ready.clear()
+        await asyncio.gather(*(sandbox.destroy() for sandbox in sandboxes), return_exceptions=True)
+        logger.info(f"沙箱预热池已关闭, 销毁沙箱数量: {len(sandboxes)}")
+
+    async def acquire(self) -> Optional[DockerSandbox]:
+        """取出一个就绪且健康的沙箱，池为空时返回None，由调用方直接创建"""
+        while self._ready:
+            # 先从池中取出再检查，取出操作不经过await，同一个沙箱不会分配给多个会话
+            sandbox, _ = self._ready.popleft()
+            self._wakeup.set()
+            if await sandbox.is_healthy():
+                try:
+                    # 沙箱的超时销毁从容器启动时开始计时，取用时重新计时
+                    await sandbox.reset_timeout()
+                except Exception as e:
+                    logger.warning(f"重置沙箱[{sandbox.id}]超时销毁计时失败: {e}")
+                self._metrics["hits"] += 1
+                logger.info(f"从预热池取用沙箱: {sandbox.id}")
+                return sandbox
+            self._metrics["unhealthy"] += 1
+            self._discard(sandbox)
+
+        self._metrics["misses"] += 1
+        self._wakeup.set()
+        return None
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """预热池的取用与回收统计"""
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "size": self._size,
+            "ready": len(self._ready),
+            "booting": self._booting,
+            "hit_rate": self._metrics["hits"] / lookups if lookups else 0.0,
+        }
+
+    def _spawn(self, coro) -> None:
+        """启动后台任务并跟踪，关闭时统一取消"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _discard(self, sandbox: DockerSandbox) -> None:
+        """在后台销毁沙箱"""
+        self._spawn(sandbox.destroy())
+
+    async def _maintain(self) -> None:
+        """定期回收空闲超时与不健康的沙箱并补充到预热数量，沙箱被取用后立即补充"""
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._recycle()
+                self._replenish()
+            except Exception as e:
+                logger.warning(f"维护沙箱预热池失败: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._check_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _recycle(self) -> None:
+        """回收空闲超时与健康检查失败的沙箱，检查期间沙箱仍留在池中可被取用"""
+        now = time.monotonic()
+        entries = list(self._ready)
+        healthy = await asyncio.gather(*(sandbox.is_healthy() for sandbox, _ in entries))
+        for entry, is_healthy in zip(entries, healthy):
+            sandbox, ready_at = entry
+            expired = self._idle_ttl_seconds > 0 and now - ready_at >= self._idle_ttl_seconds
+            if (expired or not is_healthy) and entry in self._ready:
+                # 检查期间已被取用的沙箱不再处理
+                self._ready.remove(entry)
+                self._metrics["recycled" if expired else "unhealthy"] += 1
+                logger.info(f"回收预热池沙箱[{sandbox.id}], 原因: {'空闲超时' if expired else '健康检查失败'}")
+                self._discard(sandbox)
+
+    def _replenish(self) -> None:
+        """启动缺少的沙箱，使就绪与启动中的沙箱数量达到预热数量"""
+        missing = self._size - len(self._ready) - self._booting
+        for _ in range(missing):
+            self._booting += 1
+            self._spawn(self._boot())
+
+    @classmethod
+    async def _create_container(cls) -> DockerSandbox:
+        """在线程中创建沙箱容器，线程中的docker run无法取消，被取消时等待容器创建完成后将其销毁，避免泄漏容器"""
+        creation = asyncio.ensure_future(asyncio.to_thread(DockerSandbox._create_task))
+        try:
+            return await asyncio.shield(creation)
+        except asyncio.CancelledError:
+            try:
+                sandbox = await creation
+            except Exception as e:
+                logger.warning(f"取消启动的沙箱容器创建失败: {e}")
+            else:
+                await sandbox.destroy()
+            raise
+
+    async def _boot(self) -> None:
+        """启动一个沙箱容器，等待其中的服务全部运行后放入池中"""
+        try:
+            sandbox = await self._create_container()
+            try:
+                await sandbox.ensure_sandbox()
+            except BaseException:
+                await sandbox.destroy()
+                raise
+            self._ready.append((sandbox, time.monotonic()))
+            self._metrics["booted"] += 1
+            logger.info(f"预热沙箱就绪: {sandbox.id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._metrics["boot_failures"] += 1
+            logger.warning(f"预热沙箱启动失败: {e}")
+        finally:
+            self._booting -= 1
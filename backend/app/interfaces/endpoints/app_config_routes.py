@@ -20,6 +20,13 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api-config", tags=["设置模块"])
 
 
+# LLM配置中不对外返回的密钥字段
+LLM_CONFIG_SECRET_FIELDS = {
+    "api_key": True,
+    "endpoints": {"__all__": {"api_key"}},
+    "roles": {"__all__": {"api_key"}},
+}
+
 @router.get(
     path="/llm",
     response_model=Response[LLMConfig],
@@ -33,14 +40,14 @@ async def get_llm_config(
     获取LLM配置信息
     """
     llm_config = await app_config_service.get_llm_config()
-    return Response.success(data=llm_config.model_dump(exclude={"api_key"}))
+    return Response.success(data=llm_config.model_dump(exclude=LLM_CONFIG_SECRET_FIELDS))
 
 
 @router.post(
     path="/llm",
     response_model=Response[LLMConfig],
     summary="更新LLM配置信息",
-    description="更新LLM配置信息,当api_key为空,不更新该字段"
+    description="更新LLM配置信息,当api_key(含各端点、各角色的api_key)为空,不更新该字段"
 )
 async def update_llm_config(
         new_llm_config: LLMConfig,
@@ -52,7 +59,7 @@ async def update_llm_config(
     updated_llm_config = await app_config_service.update_llm_config(new_llm_config)
     return Response.success(
         msg="更新LLM配置信息成功",
-        data=updated_llm_config.model_dump(exclude={"api_key"})
+        data=updated_llm_config.model_dump(exclude=LLM_CONFIG_SECRET_FIELDS)
     )
 
 
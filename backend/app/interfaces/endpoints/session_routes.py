@@ -18,6 +18,7 @@ from websockets import ConnectionClosed
 
 from app.application.errors import NotFoundError
 from app.application.service import SessionService, AgentService
+from app.domain.models import LLMSessionUsage
 from app.interfaces.schemas import (
     CreateSessionResponse,
     ListSessionResponse,
@@ -26,6 +27,7 @@ from app.interfaces.schemas import (
     EventMapper,
     GetSessionResponse,
     GetSessionFilesResponse,
+    ToolEventPayloadResponse,
     FileReadResponse,
     FileReadRequest,
     ShellReadResponse,
@@ -230,6 +232,21 @@ async def stop_session(
     return Response.success(msg="停止任务会话成功")
 
 
+@router.get(
+    path="/{session_id}/llm-usage",
+    response_model=Response[LLMSessionUsage],
+    summary="获取指定任务会话的模型调用用量",
+    description="获取指定任务会话的模型调用token用量与耗时，包含总计以及按Agent、按步骤的汇总",
+)
+async def get_session_llm_usage(
+        session_id: str,
+        session_service: SessionService = Depends(get_session_service),
+) -> Response[LLMSessionUsage]:
+    """获取指定任务会话的模型调用用量"""
+    usage = await session_service.get_llm_usage(session_id=session_id)
+    return Response.success(msg="获取会话模型调用用量成功", data=usage)
+
+
 @router.get(
     path="/{session_id}/files",
     response_model=Response[GetSessionFilesResponse],
@@ -248,6 +265,22 @@ async def get_session_files(
     )
 
 
+@router.get(
+    path="/{session_id}/events/payloads/{payload_ref}",
+    response_model=Response[ToolEventPayloadResponse],
+    summary="获取指定任务会话中工具事件的完整载荷",
+    description="工具事件载荷过大时事件中只保留引用与摘要，展开工具卡片时根据引用获取完整的工具内容与调用结果",
+)
+async def get_tool_event_payload(
+        session_id: str,
+        payload_ref: str,
+        session_service: SessionService = Depends(get_session_service),
+) -> Response[ToolEventPayloadResponse]:
+    """获取指定任务会话中工具事件的完整载荷"""
+    result = await session_service.get_tool_event_payload(session_id=session_id, payload_ref=payload_ref)
+    return Response.success(msg="获取工具事件载荷成功", data=result)
+
+
 @router.post(
     path="/{session_id}/file",
     response_model=Response[FileReadResponse],
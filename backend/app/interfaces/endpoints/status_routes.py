@@ -6,7 +6,7 @@
 @File   : status_routes.py
 """
 import logging
-from typing import List
+from typing import List, Dict, Any
 
 from fastapi import APIRouter, Depends
 
@@ -33,3 +33,17 @@ async def get_status(
     if any(item.status == 'ERROR' or item.status == 'error' for item in status):
         return Response.fail(503, "系统服务存在异常", status)
     return Response.success(msg="系统服务正常", data=status)
+
+
+@router.get(
+    path="/metrics",
+    response_model=Response[Dict[str, Any]],
+    summary="系统运行指标",
+    description="包含模型调用用量与耗时、限流排队、响应缓存命中等当前节点的运行指标",
+)
+async def get_metrics(
+        status_service: StatusService = Depends(get_status_service)
+) -> Response[Dict[str, Any]]:
+    """系统运行指标"""
+    metrics = await status_service.get_metrics()
+    return Response.success(msg="获取系统运行指标成功", data=metrics)
@@ -13,6 +13,7 @@ from .event import (
     AgentSSEEvent,
     CommonSSEEvent,
     MessageSSEEvent,
+    MessageDeltaSSEEvent,
     TitleSSEEvent,
     StepSSEEvent,
     PlanSSEEvent,
@@ -31,6 +32,7 @@ from .session import (
     ChatRequest,
     GetSessionResponse,
     GetSessionFilesResponse,
+    ToolEventPayloadResponse,
     FileReadRequest,
     FileReadResponse,
     ShellReadRequest,
@@ -53,6 +55,7 @@ __all__ = [
     "AgentSSEEvent",
     "CommonSSEEvent",
     "MessageSSEEvent",
+    "MessageDeltaSSEEvent",
     "TitleSSEEvent",
     "StepSSEEvent",
     "PlanSSEEvent",
@@ -64,6 +67,7 @@ __all__ = [
     "EventMapper",
     "GetSessionResponse",
     "GetSessionFilesResponse",
+    "ToolEventPayloadResponse",
     "FileReadRequest",
     "FileReadResponse",
     "ShellReadRequest",
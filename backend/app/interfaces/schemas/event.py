@@ -18,7 +18,10 @@ from app.domain.models import (
     ToolEvent,
     ToolEventStatus,
     PlanEvent,
-    StepEvent
+    PlanDraftEvent,
+    FileSyncStatus,
+    StepEvent,
+    PlanOperation
 )
 
 
@@ -107,6 +110,22 @@ class MessageSSEEvent(BaseSSEEvent):
         )
 
 
+class MessageDeltaEventData(BaseEventData):
+    """消息增量事件数据"""
+    stream_id: str  # 流id，前端据此将增量拼接为同一条消息
+    agent: str = ""  # 产生增量的Agent名称
+    content: str = ""  # 内容增量
+    reasoning_content: str = ""  # 推理内容增量
+    format: str = "text"  # 内容格式，json_object表示结构化输出的原始json片段，前端不应直接展示
+    done: bool = False  # 是否为最后一个增量
+
+
+class MessageDeltaSSEEvent(BaseSSEEvent):
+    """流式消息增量事件"""
+    event: Literal["message_delta"] = "message_delta"
+    data: MessageDeltaEventData
+
+
 class TitleEventData(BaseEventData):
     """标题事件数据"""
     title: str
@@ -143,8 +162,11 @@ class StepSSEEvent(BaseSSEEvent):
 
 
 class PlanEventData(BaseEventData):
-    """计划事件数据"""
-    steps: List[StepEventData]
+    """计划事件数据，快照事件携带全部步骤，增量事件携带相对base_version的变更操作"""
+    steps: List[StepEventData] = Field(default_factory=list)
+    version: int = 0
+    base_version: Optional[int] = None
+    operations: List[PlanOperation] = Field(default_factory=list)
 
 
 class PlanSSEEvent(BaseSSEEvent):
@@ -164,12 +186,61 @@ class PlanSSEEvent(BaseSSEEvent):
                         status=step.status,
                         description=step.description,
                     )
-                    for step in event.plan.steps
+                    for step in (event.plan.steps if event.plan else [])
+                ],
+                version=event.version,
+                base_version=event.base_version,
+                operations=event.operations,
+            )
+        )
+
+
+class PlanDraftEventData(BaseEventData):
+    """计划草稿事件数据"""
+    stream_id: str  # 流id
+    steps: List[StepEventData]  # 目前已解析出的全部步骤
+
+
+class PlanDraftSSEEvent(BaseSSEEvent):
+    """计划草稿流式事件，计划生成完成前展示计划骨架"""
+    event: Literal["plan_draft"] = "plan_draft"
+    data: PlanDraftEventData
+
+    @classmethod
+    def from_event(cls, event: PlanDraftEvent) -> Self:
+        return cls(
+            data=PlanDraftEventData(
+                **BaseEventData.base_event_data(event),
+                stream_id=event.stream_id,
+                steps=[
+                    StepEventData(
+                        **BaseEventData.base_event_data(event),
+                        id=step.id,
+                        status=step.status,
+                        description=step.description,
+                    )
+                    for step in event.steps
                 ]
             )
         )
 
 
+class FileSyncEventData(BaseEventData):
+    """文件同步事件数据"""
+    direction: Literal["to_sandbox", "to_storage"]  # 同步方向
+    filename: str  # 文件名
+    filepath: str = ""  # 文件在沙箱中的路径
+    status: FileSyncStatus  # 同步状态
+    index: int = 0  # 文件在本批附件中的序号
+    total: int = 0  # 本批附件数量
+
+
+class FileSyncSSEEvent(BaseSSEEvent):
+    """文件同步流式事件，展示附件的逐文件同步进度"""
+    event: Literal["file_sync"] = "file_sync"
+    data: FileSyncEventData
+
+
 class ToolEventData(BaseEventData):
     """工具事件数据"""
     tool_call_id: str  # 工具调用id
@@ -178,6 +249,9 @@ class ToolEventData(BaseEventData):
     function: str  # 工具名字
     args: Dict[str, Any]  # 工具参数
     content: Optional[Any] = None  # 工具调用结果
+    payload_ref: Optional[str] = None  # 外部化载荷引用，不为空时展开工具卡片需按引用读取内容
+    payload_summary: str = ""  # 外部化载荷的摘要
+    payload_size: int = 0  # 外部化载荷的长度
 
 
 class ToolSSEEvent(BaseSSEEvent):
@@ -196,6 +270,9 @@ class ToolSSEEvent(BaseSSEEvent):
                 function=event.function_name,
                 args=event.function_args,
                 content=event.tool_content,
+                payload_ref=event.payload_ref,
+                payload_summary=event.payload_summary,
+                payload_size=event.payload_size,
             )
         )
 
@@ -224,9 +301,12 @@ class ErrorSSEEvent(BaseSSEEvent):
 AgentSSEEvent = Union[
     CommonSSEEvent,
     MessageSSEEvent,
+    MessageDeltaSSEEvent,
     TitleSSEEvent,
     StepSSEEvent,
     PlanSSEEvent,
+    PlanDraftSSEEvent,
+    FileSyncSSEEvent,
     ToolSSEEvent,
     DoneSSEEvent,
     ErrorSSEEvent,
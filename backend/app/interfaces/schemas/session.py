@@ -6,7 +6,7 @@
 @File   : session.py
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Any
 
 from pydantic import BaseModel, Field
 
@@ -55,6 +55,13 @@ class GetSessionFilesResponse(BaseModel):
     files: List[File] = Field(default_factory=list)
 
 
+class ToolEventPayloadResponse(BaseModel):
+    """工具事件外部化载荷响应结构"""
+    payload_ref: str  # 载荷的内容哈希
+    content: Optional[Any] = None  # 工具扩展内容
+    result: Optional[Any] = None  # 工具调用结果
+
+
 class FileReadRequest(BaseModel):
     """需要读取的沙箱文件请求结构"""
     filepath: str
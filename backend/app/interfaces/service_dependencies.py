@@ -5,22 +5,41 @@
 @Author : caixiaorong01@outlook.com
 @File   : service_dependencies.py
 """
+import asyncio
 import logging
+import threading
 from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 
+import anyio.from_thread
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.application.service import AppConfigService, FileService, StatusService, AgentService
 from app.application.service.session_service import SessionService
+from app.infrastructure.external.blob_store import RedisBlobStore, CosBlobStore
 from app.infrastructure.external.file_storage import CosFileStorage
 from app.infrastructure.external.health_checker import PostgresHealthChecker, RedisHealthChecker
 from app.infrastructure.external.json_parser import RepairJsonParser
-from app.infrastructure.external.llm import OpenAILLM
+from app.domain.external import LLM
+from app.domain.models import LLMConfig, LLMCacheConfig, LLMCacheBackend, LLMRole
+from app.domain.services.tools import ToolResultCache
+from app.infrastructure.external.llm import (
+    OpenAILLM,
+    CachedLLM,
+    GovernedLLM,
+    LLMCache,
+    MemoryLLMCache,
+    RedisLLMCache,
+    RedisLLMGovernor,
+)
+from app.infrastructure.external.lock import RedisLock
 from app.infrastructure.external.search import BingSearchEngine
 from app.infrastructure.external.task import RedisStreamTask
+from app.infrastructure.external.telemetry import RedisLLMTelemetry
 from app.infrastructure.repositories import FileAppConfigRepository
 from app.infrastructure.sandbox.docker_sandbox import DockerSandbox
+from app.infrastructure.sandbox.docker_sandbox_pool import DockerSandboxPool
 from app.infrastructure.storage import get_db_session, RedisClient, get_redis_client, Cos, get_cos, get_uow
 from core.config import get_settings
 
@@ -29,11 +48,49 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+@lru_cache()
+def get_app_config_repository() -> FileAppConfigRepository:
+    """获取应用配置仓库，进程内共享同一个实例以复用已解析的配置缓存"""
+    logger.info("加载应用配置仓库")
+    return FileAppConfigRepository(config_path=settings.app_config_filepath)
+
+
 @lru_cache()
 def get_app_config_service() -> AppConfigService:
     """获取应用配置服务"""
     logger.info("加载获取AppConfigService")
-    return AppConfigService(app_config_repository=FileAppConfigRepository(settings.app_config_filepath))
+    return AppConfigService(app_config_repository=get_app_config_repository())
+
+
+@lru_cache()
+def get_llm_telemetry() -> RedisLLMTelemetry:
+    """获取模型调用遥测，进程内共享同一个实例以累加进程级指标"""
+    logger.info("加载模型调用遥测")
+    return RedisLLMTelemetry()
+
+
+async def get_llm_runtime_metrics() -> Dict[str, Any]:
+    """获取当前模型配置下的限流排队与响应缓存指标"""
+    app_config = get_app_config_repository().load()
+    metrics: Dict[str, Any] = {}
+    if settings.llm_governor_enabled:
+        model_names = {app_config.llm_config.for_role(role).model_name for role in LLMRole}
+        metrics["governor"] = {model_name: get_llm_governor(model_name).stats() for model_name in sorted(model_names)}
+    cache_config = app_config.llm_cache_config
+    if cache_config.enabled:
+        cache = get_llm_cache(cache_config.backend, cache_config.ttl_seconds, cache_config.max_entries)
+        metrics["cache"] = await cache.stats()
+    return metrics
+
+
+@lru_cache()
+def get_sandbox_pool() -> DockerSandboxPool:
+    """获取沙箱预热池，配置了固定沙箱地址时沙箱无需创建容器，不启用预热池"""
+    return DockerSandboxPool(
+        size=0 if settings.sandbox_address else settings.sandbox_pool_size,
+        idle_ttl_seconds=settings.sandbox_pool_idle_ttl_seconds,
+        check_interval_seconds=settings.sandbox_pool_check_interval_seconds,
+    )
 
 
 @lru_cache()
@@ -45,7 +102,16 @@ def get_status_service(
     logger.info("加载获取StatusService")
     postgres_checker = PostgresHealthChecker(db_session=db_session)
     redis_checker = RedisHealthChecker(redis_client=redis_client)
-    return StatusService(checkers=[postgres_checker, redis_checker])
+    return StatusService(
+        checkers=[postgres_checker, redis_checker],
+        metric_providers={
+            "llm_calls": get_llm_telemetry().get_metrics,
+            "llm_runtime": get_llm_runtime_metrics,
+            "json_parser": get_json_parser().get_metrics,
+            "tool_cache": ToolResultCache.get_metrics,
+            "sandbox_pool": get_sandbox_pool().get_metrics,
+        },
+    )
 
 
 @lru_cache()
@@ -57,6 +123,8 @@ def get_file_service(
         bucket=settings.cos_bucket,
         cos=cos,
         uow_factory=get_uow,
+        part_size=settings.cos_multipart_part_size,
+        multipart_concurrency=settings.cos_multipart_concurrency,
     )
 
     # 构建服务并返回
@@ -70,31 +138,197 @@ def get_file_service(
 def get_session_service() -> SessionService:
     """获取会话服务"""
     logger.info("加载获取SessionService")
-    return SessionService(uow_factory=get_uow, sandbox_cls=DockerSandbox)
+    return SessionService(
+        uow_factory=get_uow,
+        sandbox_cls=DockerSandbox,
+        llm_telemetry=get_llm_telemetry(),
+        event_payload_store=get_event_payload_store(get_cos()),
+    )
 
 
-def get_agent_service(
-        cos: Cos = Depends(get_cos),
-) -> AgentService:
-    app_config_repository = FileAppConfigRepository(config_path=settings.app_config_filepath)
-    app_config = app_config_repository.load()
+@lru_cache()
+def get_llm_cache(backend: LLMCacheBackend, ttl_seconds: int, max_entries: int) -> LLMCache:
+    """获取模型响应缓存，同一配置下复用同一个缓存实例"""
+    logger.info(f"加载模型响应缓存, 后端: {backend.value}")
+    if backend == LLMCacheBackend.MEMORY:
+        return MemoryLLMCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    return RedisLLMCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
 
-    llm = OpenAILLM(app_config.llm_config)
-    file_storage = CosFileStorage(
+
+@lru_cache()
+def get_llm_governor(scope: str) -> RedisLLMGovernor:
+    """获取模型调用限流器，同一作用域在进程内共享同一个限流器"""
+    logger.info(f"加载模型调用限流器, 作用域: {scope}")
+    return RedisLLMGovernor(
+        scope=scope,
+        max_concurrency=settings.llm_max_concurrency,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+    )
+
+
+def build_llm(llm_config: LLMConfig, cache_config: LLMCacheConfig, role: LLMRole = LLMRole.EXECUTOR) -> LLM:
+    """构建LLM，按配置依次包装全局限流与响应缓存(缓存命中时不占用限流配额)"""
+    llm: LLM = OpenAILLM(
+        llm_config,
+        telemetry=get_llm_telemetry(),
+        log_sample_rate=settings.llm_log_sample_rate,
+        role=role.value,
+    )
+    if settings.llm_governor_enabled:
+        llm = GovernedLLM(llm=llm, governor=get_llm_governor(llm_config.model_name))
+    if cache_config.enabled:
+        cache = get_llm_cache(cache_config.backend, cache_config.ttl_seconds, cache_config.max_entries)
+        llm = CachedLLM(llm=llm, cache=cache, cache_config=cache_config)
+    return llm
+
+
+def build_llms(llm_config: LLMConfig, cache_config: LLMCacheConfig) -> Dict[LLMRole, LLM]:
+    """按角色构建LLM，页面提取角色仅在显式配置时构建"""
+    return {
+        role: build_llm(llm_config.for_role(role), cache_config, role)
+        for role in LLMRole
+        if role != LLMRole.PAGE_EXTRACTOR or role in llm_config.roles
+    }
+
+
+# 配置变化后被淘汰的LLM延迟关闭的时间(秒)，与模型请求超时一致，保证使用旧配置进行中的调用可以完成
+LLM_RETIRE_DELAY_SECONDS = 3600
+_current_llms: Optional[Dict[LLMRole, LLM]] = None  # 当前配置版本对应的LLM
+_current_llms_lock = threading.Lock()
+_retiring_llms: Dict[asyncio.Task, Dict[LLMRole, LLM]] = {}  # 等待延迟关闭的LLM
+
+
+async def _close_llms(llms: Dict[LLMRole, LLM]) -> None:
+    """关闭一组LLM的HTTP客户端"""
+    results = await asyncio.gather(*(llm.aclose() for llm in llms.values()), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"关闭LLM客户端失败: {result}")
+
+
+async def _close_llms_later(llms: Dict[LLMRole, LLM]) -> None:
+    await asyncio.sleep(LLM_RETIRE_DELAY_SECONDS)
+    await _close_llms(llms)
+    logger.info("已关闭配置变化前的LLM客户端")
+
+
+def _retire_llms(llms: Dict[LLMRole, LLM]) -> None:
+    """在事件循环中调度延迟关闭被淘汰的LLM"""
+
+    def schedule() -> None:
+        task = asyncio.get_running_loop().create_task(_close_llms_later(llms))
+        _retiring_llms[task] = llms
+        task.add_done_callback(lambda done: _retiring_llms.pop(done, None))
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # 同步依赖运行在线程池中，需要切换到事件循环线程调度
+        try:
+            anyio.from_thread.run_sync(schedule)
+        except RuntimeError as e:
+            logger.warning(f"无法调度关闭被淘汰的LLM客户端: {e}")
+        return
+    schedule()
+
+
+@lru_cache(maxsize=1)
+def _load_llms(config_version: Optional[Tuple[int, int]]) -> Dict[LLMRole, LLM]:
+    logger.info(f"加载各角色LLM, 配置版本: {config_version}")
+    app_config = get_app_config_repository().load()
+    return build_llms(app_config.llm_config, app_config.llm_cache_config)
+
+
+def get_llms(config_version: Optional[Tuple[int, int]]) -> Dict[LLMRole, LLM]:
+    """获取各角色的LLM，配置版本不变时复用同一组LLM及其HTTP连接池，配置变化后重建并延迟关闭旧的LLM"""
+    global _current_llms
+    llms = _load_llms(config_version)
+    with _current_llms_lock:
+        previous, _current_llms = _current_llms, llms
+    if previous is not None and previous is not llms:
+        _retire_llms(previous)
+    return llms
+
+
+async def close_llms() -> None:
+    """应用关闭时立即关闭当前以及等待延迟关闭的LLM"""
+    pending = list(_retiring_llms.values())
+    for task in list(_retiring_llms):
+        task.cancel()
+    if _current_llms:
+        pending.append(_current_llms)
+    for llms in pending:
+        await _close_llms(llms)
+
+
+@lru_cache()
+def get_json_parser() -> RepairJsonParser:
+    """获取JSON解析器"""
+    return RepairJsonParser()
+
+
+@lru_cache()
+def get_search_engine() -> BingSearchEngine:
+    """获取搜索引擎，进程内复用同一个HTTP客户端"""
+    return BingSearchEngine()
+
+
+@lru_cache()
+def get_agent_file_storage(cos: Cos) -> CosFileStorage:
+    """获取Agent使用的文件存储"""
+    return CosFileStorage(
         bucket=settings.cos_bucket,
         cos=cos,
         uow_factory=get_uow,
+        part_size=settings.cos_multipart_part_size,
+        multipart_concurrency=settings.cos_multipart_concurrency,
+    )
+
+
+@lru_cache()
+def get_session_lock() -> RedisLock:
+    """获取会话分布式锁"""
+    return RedisLock(
+        lease_seconds=settings.session_lock_lease_seconds,
+        wait_seconds=settings.session_lock_wait_seconds,
     )
 
+
+@lru_cache()
+def get_blob_store() -> RedisBlobStore:
+    """获取大块内容存储"""
+    return RedisBlobStore(ttl_seconds=settings.blob_ttl_seconds)
+
+
+@lru_cache()
+def get_event_payload_store(cos: Cos) -> CosBlobStore:
+    """获取工具事件载荷存储，载荷随会话事件长期保留，因此使用对象存储"""
+    return CosBlobStore(bucket=settings.cos_bucket, cos=cos, prefix="event-payloads")
+
+
+def get_agent_service(
+        cos: Cos = Depends(get_cos),
+) -> AgentService:
+    """
+    获取Agent服务
+    AgentService持有按请求使用的UoW，因此每次请求构建，其依赖的配置、LLM与各类客户端均为进程内共享的长期实例
+    """
+    app_config_repository = get_app_config_repository()
+    app_config = app_config_repository.load()
+
     return AgentService(
-        llm=llm,
+        llms=get_llms(app_config_repository.version),
         agent_config=app_config.agent_config,
         mcp_config=app_config.mcp_config,
         a2a_config=app_config.a2a_config,
         sandbox_cls=DockerSandbox,
         task_cls=RedisStreamTask,
-        json_parser=RepairJsonParser(),
-        search_engine=BingSearchEngine(),
-        file_storage=file_storage,
+        json_parser=get_json_parser(),
+        search_engine=get_search_engine(),
+        file_storage=get_agent_file_storage(cos),
         uow_factory=get_uow,
+        session_lock=get_session_lock(),
+        llm_telemetry=get_llm_telemetry(),
+        blob_store=get_blob_store(),
+        event_payload_store=get_event_payload_store(cos),
     )
@@ -16,7 +16,7 @@ from app.infrastructure.logging import setup_logging
 from app.infrastructure.storage import get_redis_client, get_postgres, get_cos
 from app.interfaces.endpoints.routes import router
 from app.interfaces.errors.exception_handlers import register_exception_handlers
-from app.interfaces.service_dependencies import get_agent_service
+from app.interfaces.service_dependencies import get_agent_service, get_sandbox_pool, close_llms
 from core.config import get_settings
 
 settings = get_settings()
@@ -41,20 +41,52 @@ async def lifespan(app: FastAPI):
     await get_postgres().init()
     await get_cos().init()
 
+    # 启动沙箱预热池，会话创建沙箱时直接取用已启动的容器
+    sandbox_pool = get_sandbox_pool()
+    await sandbox_pool.start()
+
+    # 启动任务移交监听，认领其他节点下线时移交的任务
+    agent_service = get_agent_service(cos=get_cos())
+    handoff_watcher = asyncio.create_task(
+        agent_service.run_handoff_watcher(poll_seconds=settings.task_handoff_poll_seconds)
+    )
+
     try:
         # lifespan分界点
         yield
     finally:
+        # 停止认领移交任务，避免认领到自己即将移交的任务
+        handoff_watcher.cancel()
         try:
-            # 等待agent服务关闭
+            await handoff_watcher
+        except (asyncio.CancelledError, Exception):
+            pass
+
+        try:
+            # 排空agent服务，运行中的任务在检查点停止并移交给其他节点
             logger.info("正在关闭Agent服务")
-            await asyncio.wait_for(get_agent_service().shutdown(), timeout=30.0)
+            await asyncio.wait_for(
+                agent_service.shutdown(drain_timeout=settings.task_drain_timeout_seconds),
+                timeout=settings.task_drain_timeout_seconds + 10.0,
+            )
             logger.info("Agent服务成功关闭")
         except asyncio.TimeoutError:
             logger.warning("Agent服务关闭超时, 强制关闭, 部分任务将被释放")
         except Exception as e:
             logger.error(f"Agent服务关闭期间出现错误: {str(e)}")
 
+        # 关闭LLM的HTTP客户端
+        try:
+            await close_llms()
+        except Exception as e:
+            logger.error(f"关闭LLM客户端期间出现错误: {str(e)}")
+
+        # 销毁预热池中尚未取用的沙箱
+        try:
+            await sandbox_pool.shutdown()
+        except Exception as e:
+            logger.error(f"关闭沙箱预热池期间出现错误: {str(e)}")
+
         # 关闭其他应用
         await get_redis_client().close()
         await get_postgres().close()
@@ -29,6 +29,8 @@ class Settings(BaseSettings):
     cos_scheme: str = "https"
     cos_bucket: str = ""
     cos_domain: str = ""
+    cos_multipart_part_size: int = 8 * 1024 * 1024  # 流式分块上传的分块大小(字节)，最小1MB
+    cos_multipart_concurrency: int = 4  # 流式分块上传的并发分块数
 
     sandbox_address: Optional[str] = None
     sandbox_image: Optional[str] = None
@@ -39,6 +41,22 @@ class Settings(BaseSettings):
     sandbox_https_proxy: Optional[str] = None
     sandbox_http_proxy: Optional[str] = None
     sandbox_no_proxy: Optional[str] = None
+    sandbox_pool_size: int = 0  # 预热的沙箱容器数量，0表示不启用预热池，配置了沙箱地址时不生效
+    sandbox_pool_idle_ttl_seconds: int = 1800  # 预热沙箱的最长空闲时间，应小于沙箱的超时销毁时间
+    sandbox_pool_check_interval_seconds: float = 30.0  # 预热池健康检查与补充的间隔
+
+    task_drain_timeout_seconds: float = 20.0  # 停机排空时等待任务到达检查点的最长时间
+    task_handoff_poll_seconds: int = 5  # 认领移交任务的阻塞轮询间隔
+
+    session_lock_lease_seconds: int = 120  # 会话任务创建锁的租约时长
+    session_lock_wait_seconds: float = 120.0  # 等待会话任务创建锁的最长时间
+
+    blob_ttl_seconds: int = 7 * 24 * 3600  # 工具输出等大块内容在Redis中的保留时长
+
+    llm_governor_enabled: bool = True  # 是否启用跨会话、跨节点的模型调用限流
+    llm_max_concurrency: int = 16  # 同一模型的最大并发请求数，0表示不限制
+    llm_tokens_per_minute: int = 0  # 同一模型每分钟的token数上限，0表示不限制
+    llm_log_sample_rate: float = 0.01  # 以DEBUG级别记录完整模型响应的采样比例
 
     model_config = SettingsConfigDict(
         env_file=".env",
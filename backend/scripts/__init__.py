@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:00
+@Author : caixiaorong01@outlook.com
+@File   : __init__.py
+"""
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:00
+@Author : caixiaorong01@outlook.com
+@File   : bench_tool_dispatch.py
+工具分发微基准：对比按名称查找工具与过滤参数时，每次反射(旧实现)与预先计算的分发表(当前实现)的开销
+运行方式(在backend目录下): python -m scripts.bench_tool_dispatch [--number 20000]
+"""
+import argparse
+import inspect
+import timeit
+from typing import Any, Callable, Dict, List
+
+from app.domain.services.agents.base import BaseAgent
+from app.domain.services.tools import (
+    A2ATool,
+    BaseTool,
+    BrowserTool,
+    FileTool,
+    MCPTool,
+    MessageTool,
+    SearchTool,
+    ShellTool,
+)
+
+
+def legacy_has_tool(tool: BaseTool, tool_name: str) -> bool:
+    """旧实现：每次查找都反射全部绑定方法"""
+    for _, method in inspect.getmembers(tool, inspect.ismethod):
+        if getattr(method, "_tool_name", None) == tool_name:
+            return True
+    return False
+
+
+def legacy_get_tool(tools: List[BaseTool], tool_name: str) -> BaseTool:
+    """旧实现：依次在每个工具集合中反射查找"""
+    for tool in tools:
+        if legacy_has_tool(tool, tool_name):
+            return tool
+    raise ValueError(f"无效工具: {tool_name}")
+
+
+def legacy_filter_parameters(method: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """旧实现：每次调用都重新计算方法签名"""
+    sign = inspect.signature(method)
+    return {key: value for key, value in kwargs.items() if key in sign.parameters}
+
+
+def build_agent(tools: List[BaseTool]) -> BaseAgent:
+    """只构建工具索引所需的状态，跳过记忆、模型与存储的初始化"""
+    agent = BaseAgent.__new__(BaseAgent)
+    agent._tools = tools
+    agent._tool_versions = None
+    return agent
+
+
+def measure(name: str, func: Callable[[], Any], number: int) -> float:
+    """返回单次调用的平均耗时(微秒)"""
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    per_call = seconds / number * 1_000_000
+    print(f"  {name:<36}{per_call:>10.2f} us")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="工具分发微基准")
+    parser.add_argument("--number", type=int, default=20000, help="每轮调用次数")
+    args = parser.parse_args()
+
+    # 依赖(沙箱、浏览器、搜索引擎)只在工具执行时使用，分发过程不会访问
+    tools: List[BaseTool] = [
+        FileTool(None), ShellTool(None), BrowserTool(None), SearchTool(None), MessageTool(), MCPTool(), A2ATool(),
+    ]
+    agent = build_agent(tools)
+    # 取最后一个工具集合中的工具，旧实现需要遍历全部工具集合
+    tool_name = "call_remote_agent"
+    file_tool = tools[0]
+    spec = file_tool.get_spec("read_file")
+    kwargs = {"filepath": "/home/ubuntu/a.txt", "start_line": 0, "end_line": 10, "unknown": 1}
+
+    print(f"工具集合数: {len(tools)}, 每轮调用次数: {args.number}")
+    rows = [
+        ("BaseAgent._get_tool",
+         lambda: legacy_get_tool(tools, tool_name), lambda: agent._get_tool(tool_name)),
+        ("BaseTool.has_tool",
+         lambda: legacy_has_tool(tools[-1], tool_name), lambda: tools[-1].has_tool(tool_name)),
+        ("参数过滤",
+         lambda: legacy_filter_parameters(file_tool.read_file, kwargs),
+         lambda: file_tool._filter_parameters(spec, kwargs)),
+    ]
+    for name, before, after in rows:
+        print(f"{name}")
+        before_us = measure("反射(旧实现)", before, args.number)
+        after_us = measure("预计算分发表(当前实现)", after, args.number)
+        print(f"  {'加速比':<36}{before_us / after_us:>10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
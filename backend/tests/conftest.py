@@ -0,0 +1,9 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 11:55
+@Author : caixiaorong01@outlook.com
+@File   : conftest.py
+"""
+# 与应用入口保持相同的导入顺序，先加载接口层，避免直接导入应用服务包时的循环导入
+import app.interfaces  # noqa: F401
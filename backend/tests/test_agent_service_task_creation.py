@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 11:50
+@Author : caixiaorong01@outlook.com
+@File   : test_agent_service_task_creation.py
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from app.application.service import AgentService
+from app.domain.models import DoneEvent, Session, SessionStatus
+
+
+class _FakeLock:
+    lease_seconds = 3
+
+    def __init__(self) -> None:
+        self.renewals = 0
+        self.released = False
+
+    async def acquire(self, key: str) -> Optional[str]:
+        return "token"
+
+    async def renew(self, key: str, token: str) -> bool:
+        self.renewals += 1
+        return True
+
+    async def release(self, key: str, token: str) -> bool:
+        self.released = True
+        return True
+
+
+class _FakeStream:
+    def __init__(self) -> None:
+        self.messages: List[str] = []
+
+    async def put(self, message: str) -> str:
+        self.messages.append(message)
+        return f"{len(self.messages)}-0"
+
+    async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[str, Optional[str]]:
+        return "1-0", DoneEvent().model_dump_json()
+
+
+class _FakeTask:
+    running: Dict[str, bool] = {}  # 其他节点任务的执行心跳
+    registry: Dict[str, "_FakeTask"] = {}  # 本节点的任务，创建后尚未开始执行时也在注册表中
+
+    def __init__(self, task_id: str) -> None:
+        self.id = task_id
+        self.done = False
+        self.invocations = 0
+        self.input_stream = _FakeStream()
+        self.output_stream = _FakeStream()
+
+    async def invoke(self) -> None:
+        self.invocations += 1
+
+    async def is_running(self) -> bool:
+        return self.running.get(self.id, False)
+
+    @classmethod
+    def get(cls, task_id: str) -> Optional["_FakeTask"]:
+        return cls.registry.get(task_id)
+
+    @classmethod
+    def attach(cls, task_id: str) -> "_FakeTask":
+        return cls.registry.get(task_id) or cls(task_id)
+
+    @classmethod
+    def is_draining(cls) -> bool:
+        return False
+
+
+class _FakeUoW:
+    def __init__(self, session: Session) -> None:
+        repository = type("Repository", (), {})()
+
+        async def get_by_id(session_id: str) -> Session:
+            return session
+
+        async def noop(*args, **kwargs) -> None:
+            return None
+
+        repository.get_by_id = get_by_id
+        repository.update_latest_message = noop
+        repository.add_event = noop
+        repository.update_unread_message_count = noop
+        self.session = repository
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+
+class _Service(AgentService):
+    """只验证任务创建的加锁与关联逻辑，创建任务时记录调用并返回新任务"""
+
+    def __init__(self, session: Session, lock: _FakeLock, create_delay: float = 0) -> None:
+        self._task_cls = _FakeTask
+        self._session_lock = lock
+        self._uow = _FakeUoW(session)
+        self._uow_factory = lambda: _FakeUoW(session)
+        self._create_delay = create_delay
+        self.created: List[str] = []
+
+    async def _create_task(self, session: Session) -> _FakeTask:
+        # 与真实实现一致：任务注册到本节点并关联到会话，会话状态在任务开始执行后才变化
+        await asyncio.sleep(self._create_delay)
+        self.created.append(session.id)
+        task = _FakeTask(f"new-{len(self.created)}")
+        _FakeTask.registry[task.id] = task
+        session.task_id = task.id
+        return task
+
+    async def _safe_update_unread_count(self, session_id: str) -> None:
+        return None
+
+
+async def _chat(service: _Service, session: Session, message: str) -> List:
+    return [event async for event in service.chat(session_id=session.id, message=message)]
+
+
+def setup_function() -> None:
+    _FakeTask.running = {}
+    _FakeTask.registry = {}
+
+
+def test_joins_running_task():
+    session = Session(status=SessionStatus.RUNNING, task_id="remote")
+    _FakeTask.running = {"remote": True}
+    service = _Service(session, _FakeLock())
+
+    task = asyncio.run(service._create_task_exclusively(session))
+
+    assert task.id == "remote"
+    assert service.created == []
+
+
+def test_creates_task_when_running_session_has_finished_task():
+    session = Session(status=SessionStatus.RUNNING, task_id="remote")
+    lock = _FakeLock()
+    service = _Service(session, lock)
+
+    task = asyncio.run(service._create_task_exclusively(session))
+
+    assert task.id == "new-1"
+    assert service.created == [session.id]
+    assert lock.released
+
+
+def test_renews_lock_during_slow_creation():
+    session = Session(status=SessionStatus.PENDING)
+    lock = _FakeLock()
+    lock.lease_seconds = 0.03
+    service = _Service(session, lock, create_delay=0.1)
+
+    asyncio.run(service._create_task_exclusively(session))
+
+    assert lock.renewals >= 2
+    assert lock.released
+
+
+def test_joins_pending_session_with_local_task():
+    # 任务已创建但尚未开始执行，会话仍为挂起状态
+    _FakeTask.registry = {"local": _FakeTask("local")}
+    session = Session(status=SessionStatus.PENDING, task_id="local")
+    service = _Service(session, _FakeLock())
+
+    task = asyncio.run(service._create_task_exclusively(session))
+
+    assert task.id == "local"
+    assert service.created == []
+
+
+def test_joins_waiting_session_with_remote_running_task():
+    session = Session(status=SessionStatus.WAITING, task_id="remote")
+    _FakeTask.running = {"remote": True}
+    service = _Service(session, _FakeLock())
+
+    task = asyncio.run(service._create_task_exclusively(session))
+
+    assert task.id == "remote"
+    assert service.created == []
+
+
+def test_concurrent_chats_share_one_task():
+    session = Session(status=SessionStatus.PENDING)
+    service = _Service(session, _FakeLock(), create_delay=0.02)
+
+    async def run() -> None:
+        await asyncio.gather(_chat(service, session, "first"), _chat(service, session, "second"))
+
+    asyncio.run(run())
+
+    task = _FakeTask.registry[session.task_id]
+    assert service.created == [session.id]
+    assert len(task.input_stream.messages) == 2
+    assert task.invocations == 2
+
+
+def test_chat_joins_created_task_before_session_is_running():
+    session = Session(status=SessionStatus.PENDING)
+    service = _Service(session, _FakeLock())
+
+    async def run() -> None:
+        await _chat(service, session, "first")
+        # 第一个任务尚未开始执行，会话仍为挂起状态
+        assert session.status == SessionStatus.PENDING
+        await _chat(service, session, "second")
+
+    asyncio.run(run())
+
+    assert service.created == [session.id]
+    assert len(_FakeTask.registry[session.task_id].input_stream.messages) == 2
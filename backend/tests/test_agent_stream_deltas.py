@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 12:10
+@Author : caixiaorong01@outlook.com
+@File   : test_agent_stream_deltas.py
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from app.domain.models import Memory, MessageDeltaEvent
+from app.domain.services.agents.base import BaseAgent
+
+
+class _FakeContextManager:
+    def __init__(self) -> None:
+        self.budgets: List[int] = []
+
+    async def fit(self, memory, tools, budget=None) -> bool:
+        self.budgets.append(budget)
+        return False
+
+
+class _FakeLLM:
+    streaming = True
+    context_budget = 60000
+
+    def __init__(self, chunks: List[Dict[str, Any]], fail: bool = False) -> None:
+        self._chunks = chunks
+        self._fail = fail
+        self.closed = False
+
+    async def stream(self, **kwargs):
+        try:
+            for chunk in self._chunks:
+                yield chunk
+            if self._fail:
+                raise ConnectionError("stream reset")
+            # 真实模型在完整消息之后不再产出内容，调用方不会继续读取
+            yield {"content": "unreachable"}
+        finally:
+            self.closed = True
+
+
+def _agent(llm: _FakeLLM) -> BaseAgent:
+    # 只验证流式增量的产出，跳过构造函数中的存储与上下文初始化
+    agent = BaseAgent.__new__(BaseAgent)
+    agent._llm = llm
+    agent._session_id = "s"
+    agent._step_id = None
+    agent._tools = []
+    agent._tool_versions = None
+    agent._memory = Memory()
+    agent._context_manager = _FakeContextManager()
+    agent._delta_flush_interval = 0
+    return agent
+
+
+async def _collect(agent: BaseAgent, response_format=None) -> List[Any]:
+    items = []
+    async for item in agent._call_llm(response_format):
+        items.append(item)
+    return items
+
+
+def test_json_object_deltas_are_tagged():
+    llm = _FakeLLM([{"content": '{"message": "hi"}'}, {"type": "message", "message": {"role": "assistant"}}])
+
+    items = asyncio.run(_collect(_agent(llm), {"type": "json_object"}))
+
+    deltas = [item for item in items if isinstance(item, MessageDeltaEvent)]
+    assert deltas and all(delta.format == "json_object" for delta in deltas)
+    assert deltas[-1].done
+    assert items[-1] == {"role": "assistant"}
+
+
+def test_failed_stream_terminates_with_done_delta():
+    llm = _FakeLLM([{"content": "partial"}], fail=True)
+    items = []
+
+    async def run():
+        async for item in _agent(llm)._call_llm():
+            items.append(item)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(run())
+
+    assert items[-1].done
+    assert items[-1].format == "text"
+    assert {item.stream_id for item in items} == {items[0].stream_id}
+
+
+def test_stream_is_closed_before_message_is_returned():
+    llm = _FakeLLM([{"content": "hi"}, {"type": "message", "message": {"role": "assistant"}}])
+
+    async def run() -> bool:
+        async for item in _agent(llm)._call_llm():
+            if isinstance(item, dict):
+                return llm.closed
+        return False
+
+    assert asyncio.run(run())
+
+
+def test_context_is_fitted_to_the_called_llm_budget():
+    agent = _agent(_FakeLLM([]))
+    summarizer = _FakeLLM([{"type": "message", "message": {"role": "assistant"}}])
+    summarizer.context_budget = 8000
+
+    async def run() -> None:
+        async for _ in agent._call_llm(llm=summarizer):
+            pass
+
+    asyncio.run(run())
+
+    assert agent._context_manager.budgets == [8000]
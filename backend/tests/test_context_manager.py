@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 14:50
+@Author : caixiaorong01@outlook.com
+@File   : test_context_manager.py
+"""
+import asyncio
+
+from app.domain.models import Memory
+from app.domain.services.context import ContextManager, DropToolOutputsStrategy, count_messages_tokens
+
+
+def _memory() -> Memory:
+    messages = [{"role": "system", "content": "system"}]
+    for index in range(6):
+        messages.append({"role": "tool", "tool_call_id": str(index), "content": "x" * 4000})
+    return Memory(messages=messages)
+
+
+def test_fit_uses_default_budget():
+    memory = _memory()
+    manager = ContextManager(budget=100000, strategies=[DropToolOutputsStrategy(keep_recent=0)])
+
+    assert not asyncio.run(manager.fit(memory, []))
+
+
+def test_fit_uses_per_call_budget():
+    memory = _memory()
+    manager = ContextManager(budget=100000, strategies=[DropToolOutputsStrategy(keep_recent=0)])
+
+    assert asyncio.run(manager.fit(memory, [], budget=500))
+    assert count_messages_tokens(memory.messages) <= 500
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 15:30
+@Author : caixiaorong01@outlook.com
+@File   : test_docker_sandbox_pool.py
+"""
+import asyncio
+import threading
+import time
+from typing import List
+
+from app.infrastructure.sandbox.docker_sandbox import DockerSandbox
+from app.infrastructure.sandbox.docker_sandbox_pool import DockerSandboxPool
+
+
+class _FakeSandbox:
+    def __init__(self, destroyed: List[str]) -> None:
+        self.id = "sandbox"
+        self._destroyed = destroyed
+
+    async def destroy(self) -> bool:
+        self._destroyed.append(self.id)
+        return True
+
+
+def test_shutdown_during_container_creation_destroys_the_container(monkeypatch):
+    destroyed: List[str] = []
+    started = threading.Event()
+
+    def create_task() -> _FakeSandbox:
+        # 模拟耗时的docker run，取消协程无法中断线程
+        started.set()
+        time.sleep(0.05)
+        return _FakeSandbox(destroyed)
+
+    monkeypatch.setattr(DockerSandbox, "_create_task", staticmethod(create_task))
+    monkeypatch.setattr(DockerSandbox, "_pool", None)
+
+    async def run() -> DockerSandboxPool:
+        pool = DockerSandboxPool(size=1, idle_ttl_seconds=0, check_interval_seconds=60)
+        await pool.start()
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        await pool.shutdown()
+        return pool
+
+    pool = asyncio.run(run())
+
+    assert destroyed == ["sandbox"]
+    assert asyncio.run(pool.get_metrics())["ready"] == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 14:30
+@Author : caixiaorong01@outlook.com
+@File   : test_file_sync.py
+"""
+import asyncio
+from typing import List
+
+from app.domain.services.agent_task_runner import AgentTaskRunner
+
+
+class _SyncRunner(AgentTaskRunner):
+    """只保留文件同步相关状态的任务运行器，同步由测试控制"""
+
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self._enrichment_tasks = set()
+        self._pending_enrichments = {}
+        self._pending_sync_filepaths = set()
+        self._file_sync_tasks = set()
+        self._enrichment_wait_timeout = 0.01
+        self._delay = delay
+        self._fail = fail
+        self.synced: List[str] = []
+
+    async def _sync_pending_files(self, filepaths: List[str]) -> None:
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise RuntimeError("storage unavailable")
+        self.synced.extend(filepaths)
+
+
+def test_wait_timeout_does_not_drop_file_sync():
+    async def run() -> _SyncRunner:
+        runner = _SyncRunner(delay=0.05)
+        runner._pending_sync_filepaths.update({"/b", "/a"})
+        runner._schedule_file_sync()
+
+        # 等待超时后任务结束，文件同步不被取消并在结束时等待完成
+        await runner._wait_tool_enrichments()
+        runner._cancel_tool_enrichments()
+        assert runner.synced == []
+        await asyncio.gather(*runner._file_sync_tasks, return_exceptions=True)
+        return runner
+
+    assert asyncio.run(run()).synced == ["/a", "/b"]
+
+
+def test_failed_file_sync_keeps_paths_pending():
+    async def run() -> _SyncRunner:
+        runner = _SyncRunner(fail=True)
+        runner._pending_sync_filepaths.add("/a")
+        runner._schedule_file_sync()
+        assert runner._pending_sync_filepaths == set()
+
+        await asyncio.gather(*runner._file_sync_tasks, return_exceptions=True)
+        return runner
+
+    assert asyncio.run(run())._pending_sync_filepaths == {"/a"}
+
+
+def test_cancelled_file_sync_keeps_paths_pending():
+    async def run() -> _SyncRunner:
+        runner = _SyncRunner(delay=1)
+        runner._pending_sync_filepaths.add("/a")
+        runner._schedule_file_sync()
+        await asyncio.sleep(0)
+
+        for sync_task in runner._file_sync_tasks:
+            sync_task.cancel()
+        await asyncio.gather(*runner._file_sync_tasks, return_exceptions=True)
+        return runner
+
+    assert asyncio.run(run())._pending_sync_filepaths == {"/a"}
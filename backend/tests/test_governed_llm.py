@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 12:45
+@Author : caixiaorong01@outlook.com
+@File   : test_governed_llm.py
+"""
+import asyncio
+from typing import List
+
+from app.domain.models import Memory
+from app.domain.services.agents.base import BaseAgent
+from app.infrastructure.external.llm.governed_llm import GovernedLLM
+
+
+class _FakeContextManager:
+    async def fit(self, memory, tools, budget=None) -> bool:
+        return False
+
+
+class _FakeGovernor:
+    lease_seconds = 0.03
+
+    def __init__(self) -> None:
+        self.renewed: List[str] = []
+        self.released: List[str] = []
+
+    async def acquire(self, session_id: str, tokens: int) -> str:
+        return "lease"
+
+    async def renew(self, lease_id: str) -> None:
+        self.renewed.append(lease_id)
+
+    async def release(self, lease_id: str, tokens: int = 0) -> None:
+        self.released.append(lease_id)
+
+
+class _SlowLLM:
+    async def invoke(self, messages, tools=None, response_format=None, tool_choice=None):
+        await asyncio.sleep(0.1)
+        return {"role": "assistant", "content": "ok"}
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        for _ in range(3):
+            await asyncio.sleep(0.04)
+            yield {"type": "delta", "content": "."}
+        yield {"type": "message", "message": {"role": "assistant", "content": "..."}}
+
+
+def test_lease_is_renewed_during_long_invoke():
+    governor = _FakeGovernor()
+    llm = GovernedLLM(_SlowLLM(), governor)
+
+    asyncio.run(llm.invoke([{"role": "user", "content": "hi"}]))
+
+    assert len(governor.renewed) >= 2
+    assert governor.released == ["lease"]
+
+
+def test_lease_is_renewed_during_long_stream_and_stops_after_release():
+    governor = _FakeGovernor()
+    llm = GovernedLLM(_SlowLLM(), governor)
+
+    async def run():
+        chunks = [chunk async for chunk in llm.stream([{"role": "user", "content": "hi"}])]
+        renewed = len(governor.renewed)
+        await asyncio.sleep(0.1)
+        return chunks, renewed
+
+    chunks, renewed = asyncio.run(run())
+
+    assert chunks[-1]["type"] == "message"
+    assert renewed >= 2
+    assert len(governor.renewed) == renewed
+    assert governor.released == ["lease"]
+
+
+class _TrailingStreamLLM:
+    """完整消息之后仍保持连接的模型流，只有被关闭时才会结束"""
+    streaming = True
+    context_budget = 60000
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        try:
+            yield {"type": "delta", "content": "ok"}
+            yield {"type": "message", "message": {"role": "assistant", "content": "ok"}}
+            await asyncio.sleep(10)
+        finally:
+            self.closed = True
+
+
+def test_lease_is_released_when_agent_receives_final_message():
+    governor = _FakeGovernor()
+    inner = _TrailingStreamLLM()
+    llm = GovernedLLM(inner, governor)
+    agent = BaseAgent.__new__(BaseAgent)
+    agent._llm = llm
+    agent._session_id = "s"
+    agent._step_id = None
+    agent._tools = []
+    agent._tool_versions = None
+    agent._memory = Memory()
+    agent._context_manager = _FakeContextManager()
+    agent._delta_flush_interval = 0
+
+    async def run():
+        async for item in agent._call_llm(llm=llm):
+            if isinstance(item, dict):
+                return list(governor.released), inner.closed
+
+    released, closed = asyncio.run(run())
+
+    assert released == ["lease"]
+    assert closed
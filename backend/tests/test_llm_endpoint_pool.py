@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 12:30
+@Author : caixiaorong01@outlook.com
+@File   : test_llm_endpoint_pool.py
+"""
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+import openai
+import pytest
+
+from app.application.errors import LLMRequestError, ServerError
+from app.infrastructure.external.llm.endpoint_pool import (
+    CircuitBreaker,
+    ErrorKind,
+    LLMEndpoint,
+    LLMEndpointPool,
+    classify_error,
+)
+from app.infrastructure.external.llm.openai_llm import OpenAILLM
+
+_REQUEST = httpx.Request("POST", "https://llm.example.com/v1/chat/completions")
+
+
+def _status_error(status_code: int, headers: Optional[Dict[str, str]] = None) -> openai.APIStatusError:
+    response = httpx.Response(status_code, headers=headers, request=_REQUEST)
+    return openai.APIStatusError(f"status {status_code}", response=response, body=None)
+
+
+@pytest.mark.parametrize("status_code", [408, 409, 429, 500, 502, 503])
+def test_transient_status_codes_are_retryable(status_code):
+    assert classify_error(_status_error(status_code))[0] == ErrorKind.RETRYABLE
+
+
+@pytest.mark.parametrize("status_code", [401, 403, 404])
+def test_endpoint_errors_are_endpoint_fatal(status_code):
+    assert classify_error(_status_error(status_code))[0] == ErrorKind.ENDPOINT_FATAL
+
+
+@pytest.mark.parametrize("status_code", [400, 413, 422])
+def test_request_errors_are_fatal(status_code):
+    assert classify_error(_status_error(status_code))[0] == ErrorKind.FATAL
+
+
+def test_connection_errors_are_retryable():
+    assert classify_error(openai.APIConnectionError(request=_REQUEST))[0] == ErrorKind.RETRYABLE
+    assert classify_error(openai.APITimeoutError(request=_REQUEST))[0] == ErrorKind.RETRYABLE
+
+
+def test_retry_after_headers():
+    assert classify_error(_status_error(429, {"retry-after": "7"})) == (ErrorKind.RETRYABLE, 7.0)
+    assert classify_error(_status_error(503, {"retry-after-ms": "1500"})) == (ErrorKind.RETRYABLE, 1.5)
+    assert classify_error(_status_error(429, {"retry-after": "soon"})) == (ErrorKind.RETRYABLE, None)
+
+
+def test_openai_llm_maps_errors_to_typed_app_errors():
+    assert isinstance(OpenAILLM._to_app_error(_status_error(400)), LLMRequestError)
+    assert isinstance(OpenAILLM._to_app_error(_status_error(401)), LLMRequestError)
+    assert isinstance(OpenAILLM._to_app_error(_status_error(503)), ServerError)
+    assert isinstance(OpenAILLM._to_app_error(RuntimeError("所有模型端点均处于熔断状态")), ServerError)
+
+
+def _pool(*names: str) -> LLMEndpointPool:
+    endpoints = [LLMEndpoint(name=name, client=name, weight=1, breaker=CircuitBreaker()) for name in names]
+    return LLMEndpointPool(endpoints, max_attempts=3, backoff_base_seconds=0, backoff_max_seconds=0)
+
+
+def test_pool_fails_over_and_trips_endpoint_fatal():
+    pool = _pool("a", "b")
+    calls = []
+
+    async def operation(client):
+        calls.append(client)
+        if client == "a":
+            raise _status_error(401)
+        return "ok"
+
+    # 固定先选到a端点
+    pool._endpoints.sort(key=lambda endpoint: endpoint.name)
+    pool._select = lambda excluded: next(
+        (endpoint for endpoint in pool._endpoints if endpoint.breaker.available and endpoint.name not in excluded),
+        None,
+    )
+
+    result, retries = asyncio.run(pool.execute(operation))
+
+    assert (result, retries) == ("ok", 1)
+    assert calls == ["a", "b"]
+    assert not pool._endpoints[0].breaker.available
+
+
+def test_pool_raises_fatal_errors_without_retry():
+    pool = _pool("a", "b")
+    calls = []
+
+    async def operation(client):
+        calls.append(client)
+        raise _status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(pool.execute(operation))
+    assert len(calls) == 1
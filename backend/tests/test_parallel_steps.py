@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 15:10
+@Author : caixiaorong01@outlook.com
+@File   : test_parallel_steps.py
+"""
+import asyncio
+from typing import List
+
+from app.domain.models import ExecutionStatus, Message, MessageEvent, Plan, Step, WaitEvent
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools import ShellTool
+
+
+def _step(step_id: str, depends_on: List[str] = None, done: bool = False) -> Step:
+    return Step(
+        id=step_id,
+        depends_on=depends_on,
+        status=ExecutionStatus.COMPLETED if done else ExecutionStatus.PENDING,
+    )
+
+
+def test_ready_steps_with_declared_dependencies():
+    plan = Plan(steps=[_step("a", []), _step("b", []), _step("c", ["a", "b"])])
+
+    assert [step.id for step in plan.get_ready_steps()] == ["a", "b"]
+
+    plan.steps[0].status = ExecutionStatus.COMPLETED
+    plan.steps[1].status = ExecutionStatus.COMPLETED
+    assert [step.id for step in plan.get_ready_steps()] == ["c"]
+
+
+def test_steps_without_dependencies_depend_on_all_previous_steps():
+    plan = Plan(steps=[_step("a", []), _step("b"), _step("c", [])])
+
+    # b未声明依赖，需等待a完成；c声明无依赖，可与a并行
+    assert [step.id for step in plan.get_ready_steps()] == ["a", "c"]
+
+    plan.steps[0].status = ExecutionStatus.COMPLETED
+    assert [step.id for step in plan.get_ready_steps()] == ["b", "c"]
+
+
+def test_unknown_dependencies_are_satisfied_and_cycles_fall_back_to_sequential():
+    assert [step.id for step in Plan(steps=[_step("a", ["missing"])]).get_ready_steps()] == ["a"]
+
+    plan = Plan(steps=[_step("a", ["b"]), _step("b", ["a"])])
+    assert [step.id for step in plan.get_ready_steps()] == ["a"]
+
+
+class _FakeBrowserTool:
+    def __init__(self) -> None:
+        self.releases = 0
+
+    def release_lease(self) -> None:
+        self.releases += 1
+
+
+class _FakeWorker:
+    def __init__(self, name: str, events: List, delay: float = 0) -> None:
+        self.name = name
+        self._events = events
+        self._delay = delay
+        self.compacted = False
+        self.merged: List[str] = []
+
+    async def execute_step(self, plan: Plan, step: Step, message: Message):
+        for event in self._events:
+            await asyncio.sleep(self._delay)
+            yield event
+        step.status = ExecutionStatus.COMPLETED
+
+    async def compact_memory(self) -> None:
+        self.compacted = True
+
+    async def merge_step_results(self, steps: List[Step]) -> None:
+        self.merged = [step.id for step in steps]
+
+
+def _flow(react: _FakeWorker, helpers: List[_FakeWorker], plan: Plan) -> PlannerReActFlow:
+    flow = PlannerReActFlow.__new__(PlannerReActFlow)
+    flow.react = react
+    flow.helpers = helpers
+    flow.plan = plan
+    flow._browser_tools = [_FakeBrowserTool() for _ in range(len(helpers) + 1)]
+    return flow
+
+
+def test_execute_steps_defers_wait_event_and_merges_helper_results():
+    plan = Plan(steps=[_step("a", []), _step("b", []), _step("c", [])])
+    wait = WaitEvent()
+    react = _FakeWorker("react", [MessageEvent(message="ask"), wait])
+    helpers = [
+        _FakeWorker("react-1", [MessageEvent(message="b")], delay=0.02),
+        _FakeWorker("react-2", [MessageEvent(message="c")], delay=0.01),
+    ]
+    flow = _flow(react, helpers, plan)
+
+    async def run() -> List:
+        return [event async for event in flow._execute_steps(plan.steps, Message(message="go"))]
+
+    events = asyncio.run(run())
+
+    # 等待事件在其余步骤全部结束后最后发送
+    assert events[-1] is wait
+    assert sorted(event.message for event in events[:-1]) == ["ask", "b", "c"]
+    assert react.merged == ["b", "c"]
+    assert react.compacted and all(helper.compacted for helper in helpers)
+    assert all(tool.releases == 1 for tool in flow._browser_tools)
+
+
+def test_helper_shell_sessions_are_namespaced():
+    helper_shell = ShellTool(sandbox=None, session_prefix="react-1-")
+
+    args = helper_shell.prepare_args("shell_execute", {"session_id": "main", "command": "ls"})
+    assert args == {"session_id": "react-1-main", "command": "ls"}
+    # 已带前缀的会话id(如模型沿用事件中的id)不重复添加
+    assert helper_shell.prepare_args("read_shell_output", args)["session_id"] == "react-1-main"
+
+    main_shell = ShellTool(sandbox=None)
+    assert main_shell.prepare_args("shell_execute", {"session_id": "main"}) == {"session_id": "main"}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 14:00
+@Author : caixiaorong01@outlook.com
+@File   : test_plan_diff.py
+"""
+import random
+from typing import List
+
+from app.domain.models import (
+    ExecutionStatus,
+    Plan,
+    PlanEvent,
+    PlanEventStatus,
+    Session,
+    Step,
+)
+
+
+def _random_step(rng: random.Random, step_id: str) -> Step:
+    return Step(
+        id=step_id,
+        description=rng.choice(["搜索", "整理", "写入文件", "总结"]) + step_id,
+        status=rng.choice(list(ExecutionStatus)),
+        result=rng.choice([None, "", "ok", "结果" * rng.randint(1, 5)]),
+        error=rng.choice([None, "timeout"]),
+        success=rng.choice([True, False]),
+        attachments=rng.sample(["/a.md", "/b.png", "/c.csv"], rng.randint(0, 2)),
+        depends_on=rng.choice([None, [], [str(rng.randint(0, 9))]]),
+    )
+
+
+def _random_plan(rng: random.Random, ids: List[str]) -> Plan:
+    return Plan(
+        id="plan",
+        title=rng.choice(["t1", "t2"]),
+        goal=rng.choice(["g1", "g2"]),
+        language=rng.choice(["zh", "en"]),
+        message=rng.choice(["", "m"]),
+        status=rng.choice(list(ExecutionStatus)),
+        error=rng.choice([None, "e"]),
+        steps=[_random_step(rng, step_id) for step_id in ids],
+    )
+
+
+def _mutate(rng: random.Random, plan: Plan) -> Plan:
+    """随机增删、重排、修改步骤以及修改计划字段"""
+    target = plan.model_copy(deep=True)
+    steps = [step for step in target.steps if rng.random() > 0.2]
+    if rng.random() < 0.3:
+        rng.shuffle(steps)
+    steps = [
+        step.model_copy(update={"status": rng.choice(list(ExecutionStatus)), "result": "r"})
+        if rng.random() < 0.4 else step
+        for step in steps
+    ]
+    for _ in range(rng.randint(0, 3)):
+        steps.insert(rng.randint(0, len(steps)), _random_step(rng, f"n{rng.randint(0, 10 ** 6)}"))
+    target.steps = steps
+    if rng.random() < 0.5:
+        target.title = rng.choice(["t1", "t2", "t3"])
+        target.status = rng.choice(list(ExecutionStatus))
+    return target
+
+
+def test_diff_apply_round_trip_randomized():
+    rng = random.Random(43)
+    for _ in range(500):
+        current = _random_plan(rng, [str(index) for index in range(rng.randint(0, 8))])
+        target = _mutate(rng, current)
+
+        operations = current.diff(target)
+        result = current.apply(operations)
+
+        assert result.model_dump() == target.model_dump()
+        assert current.diff(current) == []
+
+
+def test_diff_apply_chain_round_trip():
+    rng = random.Random(7)
+    plan = _random_plan(rng, ["1", "2", "3"])
+    replayed = plan
+    for _ in range(100):
+        target = _mutate(rng, plan)
+        replayed = replayed.apply(plan.diff(target))
+        plan = target
+    assert replayed.model_dump() == plan.model_dump()
+
+
+def _delta(base: Plan, target: Plan, version: int, base_version: int) -> PlanEvent:
+    return PlanEvent(
+        status=PlanEventStatus.UPDATED,
+        version=version,
+        base_version=base_version,
+        operations=base.diff(target),
+    )
+
+
+def test_latest_plan_applies_consistent_deltas():
+    rng = random.Random(1)
+    v1 = _random_plan(rng, ["1", "2"])
+    v2 = _mutate(rng, v1)
+    v3 = _mutate(rng, v2)
+    session = Session(events=[
+        PlanEvent(plan=v1, status=PlanEventStatus.CREATED, version=1),
+        _delta(v1, v2, version=2, base_version=1),
+        _delta(v2, v3, version=3, base_version=2),
+    ])
+
+    assert session.get_latest_plan().model_dump() == v3.model_dump()
+
+
+def test_latest_plan_falls_back_when_version_chain_breaks():
+    rng = random.Random(2)
+    v1 = _random_plan(rng, ["1", "2"])
+    v2 = _mutate(rng, v1)
+    v3 = _mutate(rng, v2)
+    v4 = _mutate(rng, v3)
+    # 版本3的增量丢失
+    session = Session(events=[
+        PlanEvent(plan=v1, status=PlanEventStatus.CREATED, version=1),
+        _delta(v1, v2, version=2, base_version=1),
+        _delta(v3, v4, version=4, base_version=3),
+    ])
+
+    assert session.get_latest_plan().model_dump() == v2.model_dump()
+
+
+def test_latest_plan_restarts_from_newer_snapshot():
+    rng = random.Random(3)
+    v1 = _random_plan(rng, ["1"])
+    other = _random_plan(rng, ["a", "b"])
+    session = Session(events=[
+        PlanEvent(plan=v1, status=PlanEventStatus.CREATED, version=1),
+        _delta(v1, _mutate(rng, v1), version=5, base_version=4),
+        # 接管节点重新从版本1开始推送快照
+        PlanEvent(plan=other, status=PlanEventStatus.UPDATED, version=1),
+    ])
+
+    assert session.get_latest_plan().model_dump() == other.model_dump()
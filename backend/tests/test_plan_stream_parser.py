@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:45
+@Author : caixiaorong01@outlook.com
+@File   : test_plan_stream_parser.py
+"""
+import json
+import random
+
+import pytest
+
+from app.domain.services.agents.plan_stream_parser import PlanStreamParser
+
+PLAN = {
+    "message": "好的，我会按以下步骤完成",
+    "language": "zh",
+    "title": "查询天气",
+    "goal": "查询北京的天气",
+    "steps": [
+        {"id": "1", "description": "搜索 \"北京 天气\" 并记录 {温度}"},
+        {"id": "2", "description": "路径 C:\\\\tmp\\\\a.txt 与 [列表]"},
+        {"id": "3", "description": "整理结果", "depends_on": ["1", "2"]},
+    ],
+}
+
+
+def _feed_all(chunks):
+    parser = PlanStreamParser()
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(step.id for step in parser.feed(chunk))
+    return parser, emitted
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_steps_are_parsed_across_chunk_boundaries(size):
+    text = json.dumps(PLAN, ensure_ascii=False)
+
+    parser, emitted = _feed_all([text[i:i + size] for i in range(0, len(text), size)])
+
+    assert emitted == ["1", "2", "3"]
+    assert [step.description for step in parser.steps] == [step["description"] for step in PLAN["steps"]]
+    assert parser.steps[2].depends_on == ["1", "2"]
+
+
+def test_random_chunking_matches_full_parse():
+    text = json.dumps(PLAN, ensure_ascii=False, indent=2)
+    rng = random.Random(40)
+    for _ in range(50):
+        cuts = sorted(rng.sample(range(1, len(text)), 20))
+        chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        parser, emitted = _feed_all(chunks)
+        assert emitted == ["1", "2", "3"]
+
+
+def test_escaped_quotes_do_not_end_strings():
+    text = '{"steps": [{"id": "1", "description": "say \\"}]\\" done"}]}'
+
+    parser, emitted = _feed_all([text])
+
+    assert emitted == ["1"]
+    assert parser.steps[0].description == 'say "}]" done'
+
+
+def test_escaped_backslash_before_closing_quote():
+    text = json.dumps({"steps": [{"id": "1", "description": "dir\\"}, {"id": "2", "description": "b"}]})
+
+    parser, emitted = _feed_all(list(text))
+
+    assert emitted == ["1", "2"]
+    assert parser.steps[0].description == "dir\\"
+
+
+def test_nested_steps_keys_are_ignored():
+    plan = {
+        "meta": {"steps": [{"id": "x", "description": "nested"}]},
+        "steps": [{"id": "1", "description": "top", "extra": {"steps": [{"id": "y"}]}}],
+    }
+    text = json.dumps(plan)
+
+    parser, emitted = _feed_all([text[i:i + 5] for i in range(0, len(text), 5)])
+
+    assert emitted == ["1"]
+    assert parser.steps[0].description == "top"
+
+
+def test_content_after_steps_is_not_scanned():
+    text = '{"steps": [{"id": "1", "description": "a"}], "title": "t"}'
+
+    parser, emitted = _feed_all([text, '{"steps": [{"id": "2", "description": "b"}]}'])
+
+    assert emitted == ["1"]
+
+
+def test_incomplete_step_is_not_emitted():
+    parser = PlanStreamParser()
+
+    assert parser.feed('{"steps": [{"id": "1", "description": "a"}, {"id": "2", "descr') == [
+        parser.steps[0]]
+    assert [step.id for step in parser.steps] == ["1"]
+    assert [step.id for step in parser.feed('iption": "b"}]}')] == ["2"]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:50
+@Author : caixiaorong01@outlook.com
+@File   : test_repair_json_parser.py
+"""
+import asyncio
+
+import pytest
+
+from app.infrastructure.external.json_parser import RepairJsonParser
+
+
+def _parse(parser: RepairJsonParser, text: str, default_value=None):
+    return asyncio.run(parser.invoke(text, default_value))
+
+
+def test_valid_json_uses_strict_path():
+    parser = RepairJsonParser()
+
+    assert _parse(parser, '{"a": [1, 2], "b": "中文"}') == {"a": [1, 2], "b": "中文"}
+    assert asyncio.run(parser.get_metrics()) == {"strict": 1, "repaired": 0, "repair_rate": 0.0}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": 1}\n```',
+    '```\n{"a": 1}\n```',
+    '  ```json\n{"a": 1}```  ',
+])
+def test_code_fenced_json_uses_strict_path(text):
+    parser = RepairJsonParser()
+
+    assert _parse(parser, text) == {"a": 1}
+    assert asyncio.run(parser.get_metrics())["repaired"] == 0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1,}', {"a": 1}),
+    ("{'a': 'b'}", {"a": "b"}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('结果如下: {"a": 1}', {"a": 1}),
+])
+def test_invalid_json_is_repaired(text, expected):
+    parser = RepairJsonParser()
+
+    assert _parse(parser, text) == expected
+    metrics = asyncio.run(parser.get_metrics())
+    assert metrics["repaired"] == 1
+    assert metrics["repair_rate"] == 1.0
+
+
+def test_empty_text():
+    parser = RepairJsonParser()
+
+    assert _parse(parser, "  ", default_value={}) == {}
+    with pytest.raises(ValueError):
+        _parse(parser, "")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:30
+@Author : caixiaorong01@outlook.com
+@File   : test_replan_policy.py
+"""
+import asyncio
+from typing import List
+
+import pytest
+
+from app.domain.models import AgentConfig, ExecutionStatus, Plan, ReplanPolicyType, Step
+from app.domain.services.flows.replan_policy import ReplanPolicy
+
+
+class _FakePlanner:
+    def __init__(self, answer: bool) -> None:
+        self.answer = answer
+        self.calls = 0
+
+    async def needs_replan(self, plan: Plan, steps: List[Step]) -> bool:
+        self.calls += 1
+        return self.answer
+
+
+def _done(result: str = "ok", success: bool = True, attachments: List[str] = None) -> Step:
+    return Step(
+        description="s",
+        status=ExecutionStatus.COMPLETED if success else ExecutionStatus.FAILED,
+        result=result,
+        success=success,
+        attachments=attachments or [],
+    )
+
+
+def _decide(policy: ReplanPolicyType, steps: List[Step], planner: _FakePlanner = None, **config):
+    agent_config = AgentConfig(replan_policy=policy, **config)
+    return asyncio.run(ReplanPolicy(agent_config, planner or _FakePlanner(False)).decide(Plan(), steps))
+
+
+def test_always_replans():
+    assert _decide(ReplanPolicyType.ALWAYS, [_done()]) == (True, "always")
+
+
+@pytest.mark.parametrize("policy", [
+    ReplanPolicyType.ON_FAILURE,
+    ReplanPolicyType.SIGNIFICANT_RESULT,
+    ReplanPolicyType.EVERY_N_STEPS,
+    ReplanPolicyType.CLASSIFIER,
+])
+def test_failure_always_replans(policy):
+    assert _decide(policy, [_done(), _done(success=False)]) == (True, "failure")
+
+
+def test_on_failure_skips_successful_steps():
+    assert _decide(ReplanPolicyType.ON_FAILURE, [_done()]) == (False, "success")
+
+
+def test_significant_result():
+    policy = ReplanPolicyType.SIGNIFICANT_RESULT
+    assert _decide(policy, [_done("short")], replan_result_chars=10) == (False, "insignificant_result")
+    assert _decide(policy, [_done("x" * 10)], replan_result_chars=10) == (True, "significant_result")
+    assert _decide(policy, [_done("short", attachments=["/home/ubuntu/a.md"])], replan_result_chars=10) == (
+        True, "significant_result")
+
+
+def test_every_n_steps():
+    policy = ReplanPolicyType.EVERY_N_STEPS
+    assert _decide(policy, [_done()], replan_interval=2) == (False, "interval_not_reached")
+    assert _decide(policy, [_done(), _done()], replan_interval=2) == (True, "interval")
+
+
+def test_classifier_only_called_for_successful_steps():
+    planner = _FakePlanner(True)
+    assert _decide(ReplanPolicyType.CLASSIFIER, [_done()], planner) == (True, "classifier")
+    assert planner.calls == 1
+
+    planner = _FakePlanner(False)
+    assert _decide(ReplanPolicyType.CLASSIFIER, [_done()], planner) == (False, "classifier_skip")
+
+    planner = _FakePlanner(False)
+    _decide(ReplanPolicyType.CLASSIFIER, [_done(success=False)], planner)
+    assert planner.calls == 0
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 11:40
+@Author : caixiaorong01@outlook.com
+@File   : test_session_checkpoint.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.domain.models import (
+    File,
+    MessageEvent,
+    ExecutionStatus,
+    Plan,
+    PlanEvent,
+    PlanEventStatus,
+    Session,
+    SessionStatus,
+    Step,
+    StepEvent,
+    StepEventStatus,
+    ToolEvent,
+)
+from app.domain.services.agent_task_runner import AgentTaskRunner
+
+
+def _plan() -> Plan:
+    return Plan(title="t", goal="g", steps=[Step(id="1", description="a"), Step(id="2", description="b")])
+
+
+def test_finished_step_events_are_checkpoints():
+    step = Step(id="1", description="a")
+    assert AgentTaskRunner._is_checkpoint(StepEvent(step=step, status=StepEventStatus.COMPLETED))
+    assert AgentTaskRunner._is_checkpoint(StepEvent(step=step, status=StepEventStatus.FAILED))
+    assert not AgentTaskRunner._is_checkpoint(StepEvent(step=step, status=StepEventStatus.STARTED))
+    assert AgentTaskRunner._is_checkpoint(PlanEvent(plan=_plan(), status=PlanEventStatus.UPDATED))
+    assert not AgentTaskRunner._is_checkpoint(PlanEvent(plan=_plan(), status=PlanEventStatus.COMPLETED))
+
+
+def test_latest_plan_merges_finished_steps_after_plan_event():
+    plan = _plan()
+    done_step = plan.steps[0].model_copy(update={"status": ExecutionStatus.COMPLETED, "result": "ok", "success": True})
+    session = Session(events=[
+        PlanEvent(plan=plan, status=PlanEventStatus.CREATED, version=1),
+        StepEvent(step=plan.steps[0], status=StepEventStatus.STARTED),
+        StepEvent(step=done_step, status=StepEventStatus.COMPLETED),
+    ])
+
+    latest = session.get_latest_plan()
+
+    assert latest.steps[0].status == ExecutionStatus.COMPLETED
+    assert latest.steps[0].result == "ok"
+    assert latest.get_next_step().id == "2"
+    # 合并结果不修改会话中持久化的计划事件
+    assert session.events[0].plan.steps[0].status == ExecutionStatus.PENDING
+
+
+def test_latest_plan_ignores_step_events_before_plan_event():
+    plan = _plan()
+    stale = plan.steps[0].model_copy(update={"status": ExecutionStatus.FAILED})
+    session = Session(events=[
+        StepEvent(step=stale, status=StepEventStatus.FAILED),
+        PlanEvent(plan=plan, status=PlanEventStatus.UPDATED, version=2),
+        ToolEvent(tool_call_id="c", tool_name="shell", function_name="shell_exec", function_args={}),
+    ])
+
+    assert session.get_latest_plan().steps[0].status == ExecutionStatus.PENDING
+
+
+def test_latest_plan_without_plan_event():
+    assert Session().get_latest_plan() is None
+
+
+class _FakeSessionRepository:
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def get_by_id(self, session_id: str):
+        return self.session if session_id == self.session.id else None
+
+    async def update_status(self, session_id: str, status: SessionStatus) -> None:
+        self.session.status = status
+
+
+class _FakeUoW:
+    def __init__(self, session: Session) -> None:
+        self.session = _FakeSessionRepository(session)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+
+class _FakeQueue:
+    def __init__(self, empty: bool) -> None:
+        self.empty = empty
+
+    async def is_empty(self) -> bool:
+        return self.empty
+
+
+def _runner(session: Session) -> AgentTaskRunner:
+    # 只验证排空/移交逻辑，跳过构造函数中的流程与工具初始化
+    runner = AgentTaskRunner.__new__(AgentTaskRunner)
+    uow = _FakeUoW(session)
+    runner._session_id = session.id
+    runner._uow_factory = lambda: uow
+    runner._sandbox = SimpleNamespace(id="sandbox")
+    runner._draining = False
+    runner._interrupted = False
+    return runner
+
+
+def test_handoff_marks_interrupted_session_as_handoff():
+    session = Session(status=SessionStatus.RUNNING)
+    runner = _runner(session)
+    task = SimpleNamespace(id="task")
+
+    # 未被中断的任务不移交
+    assert asyncio.run(runner.handoff(task)) is None
+    assert session.status == SessionStatus.RUNNING
+
+    runner.drain()
+    runner._interrupted = True
+    assert asyncio.run(runner.handoff(task)) == session.id
+    assert session.status == SessionStatus.HANDOFF
+
+
+def test_resume_message_only_for_handoff_sessions():
+    attachment = File(id="f1", filename="a.txt", filepath="/home/ubuntu/upload/a.txt")
+    session = Session(
+        status=SessionStatus.HANDOFF,
+        files=[attachment],
+        events=[MessageEvent(role="user", message="do it", attachments=[attachment])],
+    )
+    runner = _runner(session)
+
+    message = asyncio.run(runner._get_resume_message(SimpleNamespace(input_stream=_FakeQueue(empty=True))))
+    assert message.message == "do it"
+    assert message.attachments == ["/home/ubuntu/upload/a.txt"]
+
+    # 输入流中有新消息时按新消息执行，不再恢复
+    assert asyncio.run(runner._get_resume_message(SimpleNamespace(input_stream=_FakeQueue(empty=False)))) is None
+
+    session.status = SessionStatus.WAITING
+    assert asyncio.run(runner._get_resume_message(SimpleNamespace(input_stream=_FakeQueue(empty=True)))) is None
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 14:10
+@Author : caixiaorong01@outlook.com
+@File   : test_tool_cache.py
+"""
+import asyncio
+
+from app.domain.models import AgentConfig, ToolResult
+from app.domain.services.agents.base import BaseAgent
+from app.domain.services.tools import A2ATool, BaseTool, BrowserTool, FileTool, ShellTool, ToolResultCache
+
+READ_FILE = FileTool(None).get_spec("read_file")
+LIST_FILES = FileTool(None).get_spec("list_files")
+WRITE_FILE = FileTool(None).get_spec("write_file")
+SHELL_EXECUTE = ShellTool(None).get_spec("shell_execute")
+
+
+def _read(cache: ToolResultCache, filepath: str, **kwargs):
+    return cache.get(READ_FILE, "read_file", {"filepath": filepath, **kwargs})
+
+
+def _put_read(cache: ToolResultCache, filepath: str, content: str, generation: int = None) -> None:
+    generation = cache.generation if generation is None else generation
+    cache.put(READ_FILE, "read_file", {"filepath": filepath}, ToolResult(data=content), generation)
+
+
+def test_hit_returns_copy_and_ignores_none_args():
+    cache = ToolResultCache()
+    _put_read(cache, "/home/ubuntu/a.txt", "a")
+
+    result = _read(cache, "/home/ubuntu/a.txt", start_line=None)
+    assert result.data == "a"
+
+    result.data = "changed"
+    assert _read(cache, "/home/ubuntu/a.txt").data == "a"
+    assert cache.stats()["hits"] == 2
+
+
+def test_failed_and_uncacheable_results_are_not_stored():
+    cache = ToolResultCache()
+    cache.put(READ_FILE, "read_file", {"filepath": "/a"}, ToolResult(success=False, message="x"), cache.generation)
+    cache.put(SHELL_EXECUTE, "shell_execute", {"command": "ls"}, ToolResult(data="ls"), cache.generation)
+
+    assert _read(cache, "/a") is None
+    assert cache.get(SHELL_EXECUTE, "shell_execute", {"command": "ls"}) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_browser_view_is_not_cacheable():
+    spec = BrowserTool(None).get_spec("browser_view")
+
+    assert spec.cache_scopes is None
+
+
+def test_expired_entries_miss():
+    cache = ToolResultCache(ttl_seconds=0.01)
+    _put_read(cache, "/a", "a")
+
+    asyncio.run(asyncio.sleep(0.02))
+
+    assert _read(cache, "/a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_never_stores():
+    cache = ToolResultCache(ttl_seconds=0)
+    _put_read(cache, "/a", "a")
+
+    assert not cache.enabled
+    assert _read(cache, "/a") is None
+
+
+def test_write_invalidates_same_path_and_directory_listings():
+    cache = ToolResultCache()
+    _put_read(cache, "/home/ubuntu/a.txt", "a")
+    _put_read(cache, "/home/ubuntu/b.txt", "b")
+    cache.put(LIST_FILES, "list_files", {"dir_path": "/home/ubuntu"}, ToolResult(data=["a.txt"]), cache.generation)
+
+    cache.invalidate(WRITE_FILE, {"filepath": "/home/ubuntu/./a.txt", "content": "new"})
+
+    assert _read(cache, "/home/ubuntu/a.txt") is None
+    assert _read(cache, "/home/ubuntu/b.txt").data == "b"
+    assert cache.get(LIST_FILES, "list_files", {"dir_path": "/home/ubuntu"}) is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_invalidation_escapes_glob_characters_in_paths():
+    cache = ToolResultCache()
+    _put_read(cache, "/data/a1.txt", "a1")
+
+    cache.invalidate(WRITE_FILE, {"filepath": "/data/a[0-9].txt", "content": ""})
+
+    assert _read(cache, "/data/a1.txt").data == "a1"
+
+
+def test_shell_invalidates_all_file_results():
+    cache = ToolResultCache()
+    _put_read(cache, "/a", "a")
+    _put_read(cache, "/b", "b")
+
+    cache.invalidate(SHELL_EXECUTE, {"session_id": "s", "exec_dir": "/", "command": "rm /a"})
+
+    assert _read(cache, "/a") is None
+    assert _read(cache, "/b") is None
+
+
+def test_result_started_before_invalidation_is_dropped():
+    cache = ToolResultCache()
+    generation = cache.generation
+
+    cache.invalidate(WRITE_FILE, {"filepath": "/a", "content": "new"})
+    _put_read(cache, "/a", "old", generation=generation)
+
+    assert cache.generation == generation + 1
+    assert _read(cache, "/a") is None
+
+
+def test_metrics_accumulate_across_sessions():
+    before = asyncio.run(ToolResultCache.get_metrics())
+    first, second = ToolResultCache(), ToolResultCache()
+    _put_read(first, "/a", "a")
+
+    _read(first, "/a")
+    _read(second, "/a")
+
+    after = asyncio.run(ToolResultCache.get_metrics())
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert first.stats()["hit_rate"] == 1.0
+    assert second.stats()["hit_rate"] == 0.0
+
+
+class _FakeMCPTool(BaseTool):
+    """动态注册工具，没有工具元信息"""
+    name = "mcp"
+
+    def __init__(self, read_only: bool) -> None:
+        super().__init__()
+        self._read_only = read_only
+
+    def is_parallel_safe(self, tool_name: str) -> bool:
+        return self._read_only
+
+    async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
+        return ToolResult(data="ok")
+
+
+def _agent(cache: ToolResultCache) -> BaseAgent:
+    agent = BaseAgent.__new__(BaseAgent)
+    agent._tool_cache = cache
+    agent._agent_config = AgentConfig()
+    agent._retry_interval = 0
+    return agent
+
+
+def test_non_read_only_dynamic_tools_invalidate_file_results():
+    cache = ToolResultCache()
+    agent = _agent(cache)
+    _put_read(cache, "/a", "a")
+
+    asyncio.run(agent._invoke_tool(_FakeMCPTool(read_only=True), "mcp_query", {}))
+    assert _read(cache, "/a").data == "a"
+
+    asyncio.run(agent._invoke_tool(_FakeMCPTool(read_only=False), "mcp_write", {}))
+    assert _read(cache, "/a") is None
+
+
+def test_remote_agent_call_invalidates_file_results():
+    spec = A2ATool().get_spec("call_remote_agent")
+    cache = ToolResultCache()
+    _put_read(cache, "/a", "a")
+
+    cache.invalidate(spec, {"id": "agent", "query": "write a report"})
+
+    assert _read(cache, "/a") is None
+
+
+def test_invalidate_scopes_drops_all_file_results():
+    cache = ToolResultCache()
+    _put_read(cache, "/home/ubuntu/upload/a.txt", "a")
+    cache.put(LIST_FILES, "list_files", {"dir_path": "/home/ubuntu/upload"}, ToolResult(data=[]), cache.generation)
+
+    cache.invalidate_scopes(ToolResultCache.FILE_SCOPES)
+
+    assert cache.stats()["entries"] == 0
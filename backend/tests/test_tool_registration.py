@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@Time   : 2026/10/19 13:20
+@Author : caixiaorong01@outlook.com
+@File   : test_tool_registration.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.domain.models import ToolResult
+from app.domain.services.agents.base import BaseAgent
+from app.domain.services.tools import A2ATool, FileTool, SearchTool
+
+
+class _FakeSearchEngine:
+    async def invoke(self, query: str, date_range=None) -> ToolResult:
+        return ToolResult(success=True, data={"query": query, "date_range": date_range})
+
+
+def test_search_tool_registers_search_web():
+    tool = SearchTool(_FakeSearchEngine())
+
+    assert tool.has_tool("search_web")
+    assert [schema["function"]["name"] for schema in tool.get_tools()] == ["search_web"]
+
+    result = asyncio.run(tool.invoke("search_web", query="北京 天气", data_range="past_day", unknown=1))
+    assert result.data == {"query": "北京 天气", "date_range": "past_day"}
+
+
+def test_remote_agent_call_is_not_parallel_safe():
+    tool = A2ATool()
+
+    assert tool.is_parallel_safe("get_remote_agent_cards")
+    assert not tool.is_parallel_safe("call_remote_agent")
+
+
+def _tool_call(name: str) -> dict:
+    return {"id": name, "type": "function", "function": {"name": name, "arguments": "{}"}}
+
+
+def test_tool_calls_are_filtered_by_the_called_llm():
+    agent = BaseAgent.__new__(BaseAgent)
+    agent._llm = SimpleNamespace(parallel_tool_calls=False)
+    agent._tools = [SearchTool(_FakeSearchEngine()), FileTool(None)]
+    agent._tool_versions = None
+    calls = [_tool_call("search_web"), _tool_call("read_file")]
+
+    assert len(agent._filter_tool_calls(calls, SimpleNamespace(parallel_tool_calls=True))) == 2
+    assert len(agent._filter_tool_calls(calls, agent._llm)) == 1
@@ -24,6 +24,7 @@ async def auto_extend_timeout_middleware(request: Request, call_next):
     # 判断逻辑，仅在符合条件时延长超时销毁时间3分钟
     ignore_paths = (
         "/api/supervisor/activate-timeout",
+        "/api/supervisor/reset-timeout",
         "/api/supervisor/extend-timeout",
         "/api/supervisor/cancel-timeout",
         "/api/supervisor/timeout-status",
@@ -7,7 +7,7 @@
 """
 import os
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Request
 from fastapi.responses import FileResponse
 
 from app.interfaces.schemas import (
@@ -18,6 +18,7 @@ from app.interfaces.schemas import (
     FileSearchRequest,
     FileFindRequest,
     FileCheckRequest,
+    FileHashRequest,
     FileDeleteRequest
 )
 from app.interfaces.service_dependencies import get_file_service
@@ -29,6 +30,7 @@ from app.models import (
     FileFindResult,
     FileUploadResult,
     FileCheckResult,
+    FileHashResult,
     FileDeleteResult
 )
 from app.services import FileService
@@ -169,6 +171,27 @@ async def upload_file(
     )
 
 
+@router.post(
+    path="/upload-file-stream",
+    response_model=Response[FileUploadResult],
+    summary="流式上传文件",
+    description="以请求体作为文件内容按块写入指定路径，适用于大文件上传",
+)
+async def upload_file_stream(
+        request: Request,
+        filepath: str,
+        file_service: FileService = Depends(get_file_service)
+) -> Response[FileUploadResult]:
+    result = await file_service.upload_file_stream(
+        chunks=request.stream(),
+        filepath=filepath,
+    )
+    return Response.success(
+        msg="文件上传成功",
+        data=result
+    )
+
+
 @router.get(
     path="/download-file",
     summary="下载文件",
@@ -206,6 +229,24 @@ async def check_file_exists(
     )
 
 
+@router.post(
+    path="/file-hash",
+    response_model=Response[FileHashResult],
+    summary="计算文件内容哈希",
+    description="计算文件内容的sha256摘要，调用方可据此判断文件是否变化而无需下载文件",
+)
+async def file_hash(
+        request: FileHashRequest,
+        file_service: FileService = Depends(get_file_service)
+) -> Response[FileHashResult]:
+    result = await file_service.hash_file(filepath=request.filepath)
+
+    return Response.success(
+        msg="计算文件哈希成功",
+        data=result
+    )
+
+
 @router.post(
     path="/delete-file",
     response_model=Response[FileDeleteResult],
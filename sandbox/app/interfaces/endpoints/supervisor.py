@@ -96,6 +96,22 @@ async def activate_timeout(
     )
 
 
+@router.post(
+    path="/reset-timeout",
+    response_model=Response[SupervisorTimeout],
+)
+async def reset_timeout(
+        request: TimeoutRequest,
+        supervisor_service: SupervisorService = Depends(get_supervisor_service),
+) -> Response[SupervisorTimeout]:
+    """传递分钟从当前时间重新开始超时销毁计时，保留自动保活配置，供预热池取用沙箱时使用"""
+    result = await supervisor_service.reset_timeout(request.minutes)
+    return Response.success(
+        msg=f"超时销毁已重新计时, 所有服务与沙箱将在{result.timeout_minutes}分钟后销毁",
+        data=result
+    )
+
+
 @router.post(
     path="/extend-timeout",
     response_model=Response[SupervisorTimeout],
@@ -13,6 +13,7 @@ from .file import (
     FileSearchRequest,
     FileFindRequest,
     FileCheckRequest,
+    FileHashRequest,
     FileDeleteRequest
 )
 from .shell import (
@@ -38,6 +39,7 @@ __all__ = [
     "FileSearchRequest",
     "FileFindRequest",
     "FileCheckRequest",
+    "FileHashRequest",
     "FileDeleteRequest",
     "TimeoutRequest",
 ]
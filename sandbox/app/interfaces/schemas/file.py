@@ -55,6 +55,11 @@ class FileCheckRequest(BaseModel):
     filepath: str = Field(..., description="要检查是否存在的文件绝对路径")
 
 
+class FileHashRequest(BaseModel):
+    """计算文件内容哈希请求结构体"""
+    filepath: str = Field(..., description="要计算哈希的文件绝对路径")
+
+
 class FileDeleteRequest(BaseModel):
     """删除文件请求结构体"""
     filepath: str = Field(..., description="要删除的文件绝对路径")
@@ -12,6 +12,7 @@ from .file import (
     FileSearchResult,
     FileFindResult,
     FileCheckResult,
+    FileHashResult,
     FileDeleteResult,
     FileUploadResult
 )
@@ -45,6 +46,7 @@ _all_ = [
     "FileSearchResult",
     "FileFindResult",
     "FileCheckResult",
+    "FileHashResult",
     "FileDeleteResult",
     "FileUploadResult",
     "ProcessInfo",
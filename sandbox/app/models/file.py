@@ -54,6 +54,13 @@ class FileCheckResult(BaseModel):
     exists: bool = Field(..., description="文件是否存在")
 
 
+class FileHashResult(BaseModel):
+    """文件内容哈希结果模型"""
+    filepath: str = Field(..., description="计算哈希的文件绝对路径")
+    sha256: str = Field(..., description="文件内容的sha256摘要(十六进制)")
+    size: int = Field(..., description="文件大小，单位为字节")
+
+
 class FileDeleteResult(BaseModel):
     """文件删除结果模型"""
     filepath: str = Field(..., description="需要删除文件的绝对路径")
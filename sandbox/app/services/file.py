@@ -7,16 +7,17 @@
 """
 import asyncio
 import glob
+import hashlib
 import logging
 import os.path
 import re
-from typing import Optional
+from typing import Optional, AsyncIterator
 
 from fastapi import UploadFile, File, Form
 
 from app.interfaces.errors import NotFoundException, BadRequestException, AppException
 from app.models import FileReadResult, FileWriteResult, FileReplaceResult, FileSearchResult, FileFindResult, \
-    FileUploadResult, FileCheckResult, FileDeleteResult
+    FileUploadResult, FileCheckResult, FileDeleteResult, FileHashResult
 
 logger = logging.getLogger(__name__)
 
@@ -364,6 +365,33 @@ class FileService:
                 msg=f"文件上传失败: {e}"
             )
 
+    @classmethod
+    async def upload_file_stream(cls, chunks: AsyncIterator[bytes], filepath: str) -> FileUploadResult:
+        """将请求体按块流式写入文件，不在内存中缓存整个文件"""
+        try:
+            # 初始化文件大小计数器
+            file_size = 0
+            # 确保目标目录存在，如果不存在则创建
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+            # 逐块在线程中写入，避免阻塞事件循环
+            with open(filepath, "wb") as f:
+                async for chunk in chunks:
+                    if chunk:
+                        await asyncio.to_thread(f.write, chunk)
+                        file_size += len(chunk)
+
+            return FileUploadResult(
+                filepath=filepath,
+                file_size=file_size,
+                success=True,
+            )
+        except Exception as e:
+            logger.error(f"文件流式上传失败: {e}")
+            raise AppException(
+                msg=f"文件流式上传失败: {e}"
+            )
+
     @classmethod
     async def ensure_file(cls, filepath: str) -> None:
         if not os.path.exists(filepath):
@@ -378,6 +406,34 @@ class FileService:
             exists=os.path.exists(filepath)
         )
 
+    @classmethod
+    def _sha256_file(cls, filepath: str) -> str:
+        """分块读取文件计算sha256，避免大文件一次性读入内存"""
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    async def hash_file(cls, filepath: str) -> FileHashResult:
+        # 确保文件存在
+        await cls.ensure_file(filepath)
+
+        try:
+            # 在线程中计算哈希，避免阻塞事件循环
+            sha256 = await asyncio.to_thread(cls._sha256_file, filepath)
+            return FileHashResult(
+                filepath=filepath,
+                sha256=sha256,
+                size=os.path.getsize(filepath),
+            )
+        except Exception as e:
+            logger.error(f"计算文件哈希失败: {e}")
+            raise AppException(
+                msg=f"计算文件哈希失败: {e}"
+            )
+
     async def delete_file(self, filepath: str) -> FileDeleteResult:
         # 确保文件存在
         await self.ensure_file(filepath)
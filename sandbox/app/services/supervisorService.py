@@ -205,6 +205,12 @@ class SupervisorService:
             remaining_seconds=(self.shutdown_time - datetime.now()).total_seconds(),
         )
 
+    async def reset_timeout(self, minutes: Optional[int] = None) -> SupervisorTimeout:
+        """传递指定分钟，从当前时间重新开始超时销毁计时，不修改自动保活配置"""
+        result = await self.activate_timeout(minutes)
+        result.status = "timeout_reset"
+        return result
+
     async def extend_timeout(self, minutes: Optional[int] = 3) -> SupervisorTimeout:
         """传递指定的时长，延长超时销毁的时间，单默认延长3分钟"""
         # 获取超时分钟数